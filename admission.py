@@ -0,0 +1,103 @@
+"""
+Process-wide admission control for scans.
+
+At most `max_active` scans run at once. Further requests wait in a FIFO
+queue of at most `max_queue` entries for up to `queue_timeout` seconds; a
+request that finds the queue full, or times out in it, is rejected with
+AdmissionRejected, which carries a Retry-After estimate based on recent scan
+durations. Queue waits, queue depth and rejections are exported as metrics.
+"""
+import math, threading, time
+from collections import deque
+from contextlib import contextmanager
+
+import metrics
+
+QUEUE_WAIT_SECONDS = metrics.Histogram('extractor_admission_wait_seconds',
+                                       'Time a scan waited in the admission queue', ['pool'],
+                                       buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60))
+QUEUE_LENGTH = metrics.Gauge('extractor_admission_queue_length',
+                             'Scans waiting for an admission slot', ['pool'])
+ADMITTED_ACTIVE = metrics.Gauge('extractor_admission_active',
+                                'Scans holding an admission slot', ['pool'])
+REJECTED = metrics.Counter('extractor_admission_rejected_total',
+                           'Scans rejected with 503, by reason', ['pool', 'reason'])
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Server busy ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    def __init__(self, name, max_active, max_queue, queue_timeout):
+        self.name = name
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiters = deque()
+        self.lock = threading.Lock()
+        self.avg_seconds = None   # moving average of slot hold time
+
+    def retry_after(self):
+        """Seconds until a queued request would likely get a slot"""
+        per_scan = self.avg_seconds or 5.0
+        backlog = len(self.waiters) + 1
+        return max(1, int(math.ceil(per_scan * backlog / self.max_active)))
+
+    def _reject(self, reason):
+        REJECTED.inc(pool=self.name, reason=reason)
+        raise AdmissionRejected(reason, self.retry_after())
+
+    def acquire(self):
+        with self.lock:
+            if self.active < self.max_active and not self.waiters:
+                self.active += 1
+                QUEUE_WAIT_SECONDS.observe(0, pool=self.name)
+                return
+            if len(self.waiters) >= self.max_queue:
+                self._reject('queue_full')
+            ticket = threading.Event()
+            self.waiters.append(ticket)
+
+        start = time.perf_counter()
+        with QUEUE_LENGTH.track(pool=self.name):
+            granted = ticket.wait(self.queue_timeout)
+        QUEUE_WAIT_SECONDS.observe(time.perf_counter() - start, pool=self.name)
+        if granted:
+            return
+        with self.lock:
+            if ticket.is_set():   # granted while timing out
+                return
+            self.waiters.remove(ticket)
+            self._reject('timeout')
+
+    def release(self, held_seconds):
+        with self.lock:
+            if self.avg_seconds is None:
+                self.avg_seconds = held_seconds
+            else:
+                self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * held_seconds
+            if self.waiters:
+                # Hand the slot straight to the oldest waiter
+                self.waiters.popleft().set()
+            else:
+                self.active -= 1
+
+    @contextmanager
+    def slot(self):
+        """Hold one admission slot for the duration of the block"""
+        self.acquire()
+        start = time.perf_counter()
+        ADMITTED_ACTIVE.inc(pool=self.name)
+        try:
+            yield
+        finally:
+            ADMITTED_ACTIVE.dec(pool=self.name)
+            self.release(time.perf_counter() - start)
+
+    def stats(self):
+        with self.lock:
+            return {'active': self.active, 'queued': len(self.waiters), 'max_active': self.max_active,
+                    'max_queue': self.max_queue, 'avg_scan_seconds': round(self.avg_seconds or 0, 2)}
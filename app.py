@@ -1,140 +1,659 @@
-from flask import Flask, request, jsonify
-import requests, re, tldextract, concurrent.futures, json, time
+from flask import Flask, Response, request, jsonify
+import re, tldextract, concurrent.futures, hashlib, json, time, os, tempfile, uuid
 from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
 import threading
-from collections import defaultdict, Counter
+from collections import defaultdict, Counter, deque
+from llm_client import LLMClient
+from llm_mapreduce import map_reduce_llm
+import fetcher
+from fetcher import fetch, fetch_capped
+import metrics, profiling
+from responses import json_response
+from records import (
+    PageRecord, LinkRecord, LinksRecord, ImageRecord, ScriptRecord, StylesheetRecord,
+    FormRecord, InputRecord, OptionRecord, ButtonRecord, LabelRecord, HeadingRecord,
+    TableRecord, ListRecord, TextContentRecord, PerformanceRecord, intern_str, intern_tokens
+)
+from metrics import record_error
+from frontier import PriorityFrontier, SeenFilter, ExactSeen
+from priority import PriorityScorer
+from dedup import canonicalize_url, simhash, visible_text, NearDuplicateIndex
+from url_templates import TemplateInventory, TEMPLATE_SAMPLES
+from cache import make_cache, make_key
+from singleflight import SingleFlight
+from admission import AdmissionController, AdmissionRejected
+from pools import SharedPool
+from js_mining import BundleScanner, is_script_url
+from assets import AssetStore, AssetStats
+from snapshots import SnapshotBuilder, SnapshotStore, diff_snapshots, VOLATILE_HEADERS
+from results import ResultStore, InvalidCursor, KINDS as RESULT_KINDS
+from origins import OriginMap
 
 app = Flask(__name__)
 # ---------- Ultra Fast Config ----------
-MAX_WORKERS = 20 
+MAX_WORKERS = 20  # crawl tasks in flight per scan (quota on the shared crawl pool)
 TIMEOUT = 5
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"
 }
 
+# ---------- Admission Control ----------
+MAX_CONCURRENT_SCANS = int(os.environ.get("MAX_CONCURRENT_SCANS", 4))   # scans running at once
+SCAN_QUEUE_SIZE = int(os.environ.get("SCAN_QUEUE_SIZE", 16))           # scans allowed to wait
+SCAN_QUEUE_TIMEOUT = float(os.environ.get("SCAN_QUEUE_TIMEOUT", 30))    # seconds before a 503
+MAX_OUTBOUND_CONNECTIONS = int(os.environ.get("MAX_OUTBOUND_CONNECTIONS", 64))  # across all scans
+DNS_CACHE_TTL = int(os.environ.get("DNS_CACHE_TTL", 300))        # seconds a resolved name is reused (0 = off)
+DNS_NEGATIVE_TTL = int(os.environ.get("DNS_NEGATIVE_TTL", 30))   # seconds a failed lookup is remembered
+
+fetcher.configure(max_connections=MAX_OUTBOUND_CONNECTIONS, dns_ttl=DNS_CACHE_TTL, dns_negative_ttl=DNS_NEGATIVE_TTL)
+
+# ---------- WARC Record / Replay ----------
+WARC_RECORD_DIR = os.environ.get("WARC_RECORD_DIR")  # write every fetch to WARC files in this directory
+WARC_REPLAY = os.environ.get("WARC_REPLAY")          # answer fetches from these WARC files/dirs (os.pathsep-separated)
+
+fetcher.configure(record_dir=WARC_RECORD_DIR, replay=WARC_REPLAY.split(os.pathsep) if WARC_REPLAY else None)
+admission = AdmissionController('scan', MAX_CONCURRENT_SCANS, SCAN_QUEUE_SIZE, SCAN_QUEUE_TIMEOUT)
+
+# ---------- Shared Worker Pools ----------
+CRAWL_POOL_SIZE = int(os.environ.get("CRAWL_POOL_SIZE", 40))            # page fetch+extract, all scans
+FILE_PROBE_POOL_SIZE = int(os.environ.get("FILE_PROBE_POOL_SIZE", 30))  # common-file probes, all scans
+FILE_PROBE_QUOTA = 15                                                   # probes in flight per scan
+
+# deep_crawl and scan_all_files coordinators: two per admitted scan
+scan_pool = SharedPool('scan', 2 * MAX_CONCURRENT_SCANS)
+crawl_pool = SharedPool('crawl', CRAWL_POOL_SIZE)
+file_probe_pool = SharedPool('file_probe', FILE_PROBE_POOL_SIZE)
+
+# ---------- Large Crawl Config ----------
+ADVANCED_MAX_PAGES = 30
+LARGE_CRAWL_THRESHOLD = 1000        # max_pages above this switches to large-crawl mode
+LARGE_CRAWL_MAX_PAGES = 100000
+LARGE_CRAWL_TIME = 600              # default crawl time budget (seconds) in large mode
+MAX_CRAWL_TIME = LARGE_CRAWL_TIME   # crawl_time is clamped to this; a scan holds an admission slot throughout
+LARGE_CRAWL_SEEN_CAPACITY = 2000000 # Bloom filter size for visited URLs (~4.8 MB)
+FRONTIER_HOT_LIMIT = 5000           # queued URLs kept in memory before spilling to disk
+NEAR_DUPLICATE_INDEX_LIMIT = 50000  # page fingerprints kept in large crawls (least recently matched dropped)
+FRONTIER_SPILL_DIR = os.environ.get("FRONTIER_SPILL_DIR")  # default: system temp dir
+PRIORITY_RESCORE_INTERVAL = 0.5     # min seconds between re-rankings of the frontier as forms turn up
+
+# ---------- Shared Cache ----------
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "sqlite")  # sqlite (shared by gunicorn workers) | memory | none
+CACHE_PATH = os.environ.get("CACHE_PATH", os.path.join(tempfile.gettempdir(), "extractor-cache", "cache.sqlite3"))
+CACHE_MAX_MB = int(os.environ.get("CACHE_MAX_MB", 256))
+EXTRACT_CACHE_TTL = 300     # seconds an /extract result is reused ("cache": false bypasses)
+LLM_CACHE_TTL = 3600        # seconds an LLM analysis of identical data is reused
+PAGE_CACHE_TTL = 24 * 3600  # seconds a parsed page is reused while its body is unchanged (not in large crawls)
+SNAPSHOT_TTL = 7 * 24 * 3600  # seconds a scan snapshot stays available as a diff baseline
+# Snapshots have their own store and size budget, so crawl traffic never evicts a baseline
+SNAPSHOT_PATH = os.environ.get("SNAPSHOT_PATH", os.path.join(os.path.dirname(CACHE_PATH), "snapshots.sqlite3"))
+SNAPSHOT_MAX_MB = int(os.environ.get("SNAPSHOT_MAX_MB", 64))
+
+try:
+    cache = make_cache(CACHE_BACKEND, CACHE_PATH, max_bytes=CACHE_MAX_MB * 1024 * 1024)
+except PermissionError as e:
+    # Someone else's cache file could hand us a malicious pickle
+    print(f"⚠️  Not using shared cache: {e}; falling back to a per-process memory cache")
+    CACHE_BACKEND = 'memory'
+    cache = make_cache('memory', max_bytes=CACHE_MAX_MB * 1024 * 1024)
+extract_flight = SingleFlight('extract')   # coalesces identical concurrent scans
+llm_flight = SingleFlight('llm')
+# Diff baselines must outlive a cache-less deployment's request too
+SNAPSHOT_BACKEND = 'memory' if CACHE_BACKEND == 'none' else CACHE_BACKEND
+try:
+    snapshot_cache = make_cache(SNAPSHOT_BACKEND, SNAPSHOT_PATH, max_bytes=SNAPSHOT_MAX_MB * 1024 * 1024)
+except PermissionError as e:
+    print(f"⚠️  Not using shared snapshot store: {e}; falling back to a per-process memory store")
+    SNAPSHOT_BACKEND = 'memory'
+    snapshot_cache = make_cache('memory', max_bytes=SNAPSHOT_MAX_MB * 1024 * 1024)
+snapshots = SnapshotStore(snapshot_cache, SNAPSHOT_TTL)
+
+# ---------- Stored Scan Results ----------
+# Every advanced scan's full output (pages, URLs, forms, files) is kept on disk
+# and paged through /scans/<scan_id>/<kind>; RESULTS_TTL=0 turns this off
+RESULTS_DIR = os.environ.get("RESULTS_DIR", os.path.join(tempfile.gettempdir(), "extractor-results"))
+RESULTS_TTL = int(os.environ.get("RESULTS_TTL", 3600))
+RESULTS_PAGE_SIZE = 50      # default items per page
+RESULTS_MAX_PAGE_SIZE = 500
+
+try:
+    results = ResultStore(RESULTS_DIR, RESULTS_TTL) if RESULTS_TTL > 0 else None
+except PermissionError as e:
+    print(f"⚠️  Not storing scan results: {e}")
+    results = None
+
+# ---------- JavaScript Bundle Mining ----------
+JS_MAX_BYTES = 2 * 1024 * 1024   # bytes read per script; the rest is not downloaded
+JS_MAX_SCRIPTS = 50              # distinct scripts analysed per scan
+JS_QUOTA = 4                     # script fetches in flight per scan (crawl pool)
+JS_MAX_ENDPOINTS = 1000          # endpoints reported per scan
+JS_THIRD_PARTY = os.environ.get("JS_THIRD_PARTY", "1") != "0"  # also fingerprint off-site (CDN) scripts
+
+# Script analyses are stored by URL and by body hash in the shared cache, so
+# a CDN or fingerprinted bundle seen by an earlier scan is neither downloaded
+# nor rescanned; other first-party scripts are re-fetched but not rescanned
+ASSET_URL_TTL = 3600             # seconds a pinned URL -> body digest mapping is trusted
+ASSET_CONTENT_TTL = 7 * 24 * 3600
+assets = AssetStore(cache, url_ttl=ASSET_URL_TTL, content_ttl=ASSET_CONTENT_TTL)
+
 # ---------- LLM Pollinations AI Integration ----------
-POLLINATIONS_URL = "https://gen.pollinations.ai/text"
+POLLINATIONS_URL = os.environ.get("POLLINATIONS_URL", "https://gen.pollinations.ai/text")
+API_KEY = os.environ.get("POLLINATIONS_API_KEY")  # unset: LLM calls go out unauthenticated
+if not API_KEY:
+    print("⚠️  POLLINATIONS_API_KEY is not set; LLM requests will be sent without an API key")
+LLM_TIMEOUT = 60
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", 4))
+LLM_QUEUE_TIMEOUT = 30      # seconds to wait for a free LLM slot
+LLM_MAX_RETRIES = 3         # on 429/5xx and connection errors, jittered backoff
+LLM_BREAKER_THRESHOLD = 5   # consecutive failures before failing fast
+LLM_BREAKER_RESET = 30      # seconds before a half-open trial call
+LLM_MAX_PROMPT_CHARS = int(os.environ.get("LLM_MAX_PROMPT_CHARS", 24000))  # above this, map-reduce
+LLM_REQUEST_QUOTA = int(os.environ.get("LLM_REQUEST_QUOTA", 2))  # map chunk calls in flight per request
+LLM_MAX_CHUNKS = int(os.environ.get("LLM_MAX_CHUNKS", 50))       # map chunks per request; 0 = no cap
+
+def build_llm_prompt(data):
+    """Build the pentest test-case prompt from extracted data"""
+    return (
+        "Generate exactly 40 realistic gray-box pentest test cases from website data.\n"
+        "Format: Security Test Name - Endpoint\n"
+        "Only security test names, short and meaningful.\n"
+        "No generic labels, no explanations, no payloads.\n"
+        "Example:\n"
+        "CORS Misconfiguration - /login\n"
+        "Clickjacking Check - /dashboard\n"
+        "Rate Limit Check - /forgot-password\n\n"
+        f"{json.dumps(data)}"
+    )
+
+llm_client = LLMClient(
+    POLLINATIONS_URL, API_KEY,
+    timeout=LLM_TIMEOUT,
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    queue_timeout=LLM_QUEUE_TIMEOUT,
+    max_retries=LLM_MAX_RETRIES,
+    failure_threshold=LLM_BREAKER_THRESHOLD,
+    reset_timeout=LLM_BREAKER_RESET
+)
+
+llm_pool = SharedPool('llm', LLM_MAX_CONCURRENCY)  # map-reduce chunk calls
+
+llm_client.listeners.append(
+    lambda seconds, outcome: metrics.FETCH_SECONDS.observe(seconds, phase='llm')
+)
+metrics.Gauge('extractor_llm_in_flight', 'LLM calls holding a concurrency slot',
+              callback=lambda: [({}, llm_client.stats()['in_flight'])])
+metrics.Gauge('extractor_llm_circuit_open', '1 while the LLM circuit breaker is not closed',
+              callback=lambda: [({}, int(llm_client.breaker.state != 'closed'))])
 
 def query_llm(data):
     """Send extracted data to Pollinations AI LLM"""
     try:
-        API_KEY = "sk_XPRYHc6qZa2uOaFHHq2OYWRZjPR9elJT"
-
-        prompt = (
-    "Generate exactly 40 realistic gray-box pentest test cases from website data.\n"
-    "Format: Security Test Name - Endpoint\n"
-    "Only security test names, short and meaningful.\n"
-    "No generic labels, no explanations, no payloads.\n"
-    "Example:\n"
-    "CORS Misconfiguration - /login\n"
-    "Clickjacking Check - /dashboard\n"
-    "Rate Limit Check - /forgot-password\n\n"
-    f"{json.dumps(data)}"
-)
-        response = requests.post(
-            "https://gen.pollinations.ai/text",
-            json={
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            },
-            timeout=60,
-            headers={
-                "Authorization": f"Bearer {API_KEY}",
-                "Content-Type": "application/json",
-                "User-Agent": "Mozilla/5.0"
-            }
-        )
+        return llm_client.complete(build_llm_prompt(data)).strip()
+    except Exception as e:
+        record_error('llm', e)
+        return f"Error: {str(e)}"
 
-        print(f"📥 Status Code: {response.status_code}")
-        print(response.text[:500])
+def stored_items(scan_id, kind):
+    """Every stored item of one kind for a scan, read page by page"""
+    cursor = None
+    while True:
+        page = results.page(scan_id, kind, cursor, RESULTS_MAX_PAGE_SIZE)
+        if page is None:
+            return
+        items, cursor = page
+        yield from items
+        if not cursor:
+            return
 
-        if response.status_code == 200:
-            return response.text.strip()
+def stored_crawl(data):
+    """data with its scan's full stored pages and URLs in place of the /extract samples, if still stored"""
+    scan_id = data.get('scan_id')
+    if not (results and scan_id and data.get('stored_results') and results.meta(scan_id)):
+        return data
+    structure = dict(data.get('website_structure', {}),
+                     pages=stored_items(scan_id, 'pages'), all_urls=stored_items(scan_id, 'urls'))
+    return dict(data, website_structure=structure)
 
-        return (
-            f"Error: Pollinations API returned "
-            f"{response.status_code} | {response.text[:500]}"
-        )
+def truncated_crawl(data):
+    """True when the /extract payload holds only a sample of the crawl's pages"""
+    summary = data.get('extraction_summary', {})
+    pages = data.get('website_structure', {}).get('pages', [])
+    return bool(data.get('stored_results')) and summary.get('total_pages_extracted', 0) > len(pages)
 
-    except Exception as e:
-        return f"Error: {str(e)}"
+def analyze_llm(data, llm_mode='auto'):
+    """Single prompt for small crawls, map-reduce over chunks (of the whole stored crawl) for large ones"""
+    if llm_mode == 'auto':
+        large = len(json.dumps(data)) > LLM_MAX_PROMPT_CHARS or truncated_crawl(data)
+        llm_mode = 'map_reduce' if large else 'single'
+
+    if llm_mode == 'map_reduce':
+        try:
+            result, info = map_reduce_llm(llm_client, stored_crawl(data), LLM_MAX_PROMPT_CHARS,
+                                          pool=llm_pool.quota(LLM_REQUEST_QUOTA), max_chunks=LLM_MAX_CHUNKS)
+            return result, dict(info, llm_mode='map_reduce')
+        except Exception as e:
+            record_error('llm', e)
+            return f"Error: {str(e)}", {'llm_mode': 'map_reduce'}
+
+    return query_llm(data), {'llm_mode': 'single', 'chunks': 1}
+
+# Per-run values that say nothing about the site: timings, ids, crawl
+# diagnostics and cache counters. Dropped (with volatile response headers)
+# from the LLM cache key, and lists are sorted because their order follows
+# crawl completion order.
+LLM_KEY_VOLATILE = frozenset(('extraction_time', 'profile', 'scan_id', 'stored_results', 'deduplication',
+                              'canonical_origins', 'crawl_priority', 'asset_cache'))
+LLM_KEY_HEADER_FIELDS = frozenset(('headers', 'response_headers', 'security_headers'))
+
+def llm_key_data(value, field=None):
+    """value normalized so that two scans of an unchanged site compare equal"""
+    if isinstance(value, dict):
+        if field in LLM_KEY_HEADER_FIELDS:
+            return {k: llm_key_data(v) for k, v in value.items() if k.lower() not in VOLATILE_HEADERS}
+        return {k: llm_key_data(v, k) for k, v in value.items() if k not in LLM_KEY_VOLATILE}
+    if isinstance(value, (list, tuple)):
+        items = [llm_key_data(v) for v in value]
+        return sorted(items, key=lambda v: json.dumps(v, sort_keys=True, default=str))
+    return value
+
+def llm_cache_key(data, llm_mode):
+    """Cache key parts for an analysis, ignoring per-run values and ordering"""
+    return (POLLINATIONS_URL, llm_mode, llm_key_data(data))
+
+def cached_analyze_llm(data, llm_mode='auto'):
+    """analyze_llm through the shared cache and single-flight; failures are not stored"""
+    key = llm_cache_key(data, llm_mode)
+    hit = cache.get('llm', *key)
+    if hit is not None:
+        result, info = hit
+        return result, dict(info, cached=True)
+
+    def analyze():
+        result, info = analyze_llm(data, llm_mode)
+        if not result.startswith('Error:') and not info.get('failed_chunks'):
+            cache.set('llm', *key, value=(result, info), ttl=LLM_CACHE_TTL)
+        return result, info
+
+    (result, info), shared = llm_flight.do(make_key('llm', *key), analyze)
+    return result, dict(info, coalesced=True) if shared else dict(info)
+
+def stream_llm(data):
+    """Stream Pollinations AI output, yielding text chunks as they arrive"""
+    return llm_client.stream(build_llm_prompt(data))
+
+def stream_llm_lines(data):
+    """Re-chunk streamed LLM output into complete, non-empty lines"""
+    buffer = ''
+    for chunk in stream_llm(data):
+        buffer += chunk
+        while '\n' in buffer:
+            line, buffer = buffer.split('\n', 1)
+            if line.strip():
+                yield line.strip()
+    if buffer.strip():
+        yield buffer.strip()
+
+def sse_event(event, data):
+    """Format one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 # ---------- Deep Crawler ----------
-def deep_crawl(start_url, max_pages=50):
+def deep_crawl(start_url, max_pages=50, time_budget=20, large=False, on_page=None, keep_pages=None,
+               crawl_stats=None, templates=None, on_urls=None, js_report=None, origins=None,
+               priority_report=None):
     """Extremely deep crawler that gets EVERYTHING"""
-    visited = set()
+    scorer = PriorityScorer(start_url)
+    if large:
+        frontier = PriorityFrontier(scorer.score, FRONTIER_HOT_LIMIT, FRONTIER_SPILL_DIR)
+        deferred = PriorityFrontier(scorer.score, FRONTIER_HOT_LIMIT, FRONTIER_SPILL_DIR)
+        seen = SeenFilter(LARGE_CRAWL_SEEN_CAPACITY)
+    else:
+        frontier = PriorityFrontier(scorer.score)
+        deferred = PriorityFrontier(scorer.score)   # over the template cap; fetched once frontier is empty
+        seen = ExactSeen()
     results = []
-    url_queue = []
-    url_queue.append(start_url)
     domain = tldextract.extract(start_url).domain
+    fingerprints = NearDuplicateIndex(max_entries=NEAR_DUPLICATE_INDEX_LIMIT if large else None)
+    if templates is None:
+        templates = TemplateInventory()
+    if origins is None:
+        origins = OriginMap(start_url)
+    # Canonical keys on their canonical origin, as fetched (under lock); a
+    # Bloom filter in large crawls, like seen
+    dispatched = SeenFilter(LARGE_CRAWL_SEEN_CAPACITY) if large else ExactSeen()
+    stats = {'canonical_duplicates': 0, 'near_duplicates': 0, 'near_duplicate_examples': [],
+             'template_deferred_fetched': 0}
+    
+    # Scripts go to the JS mining stage instead of the page frontier
+    scripts_seen = set()
+    script_queue = deque()
+    js = {'scripts_scanned': 0, 'bytes_scanned': 0, 'truncated_scripts': 0, 'endpoints': {},
+          'api_calls': {}, 'graphql_operations': {}, 'source_maps': {}, 'libraries': {}}
+    asset_stats = AssetStats()
+    
+    def queue_script(url):
+        canonical = canonicalize_url(url)
+        if canonical not in scripts_seen and len(scripts_seen) < JS_MAX_SCRIPTS:
+            scripts_seen.add(canonical)
+            script_queue.append(url.split('#', 1)[0])
+    
+    def enqueue(url):
+        if is_script_url(url):
+            queue_script(url)
+            return False
+        # Dedup on the canonical form on the canonical origin, but fetch the
+        # URL as found; the origin rewrite itself happens at dispatch
+        key = canonicalize_url(origins.canonical(url))
+        if not seen.add(key):
+            if key != url:
+                stats['canonical_duplicates'] += 1
+                metrics.CRAWL_SKIPPED.inc(reason='canonical_url')
+            return False
+        if not templates.admit(key):
+            deferred.push(url.split('#', 1)[0])
+            return False
+        frontier.push(url.split('#', 1)[0])
+        return True
     
     # First, get ALL URLs from sitemap and robots
-    initial_urls = get_all_urls_from_sitemap(start_url)
-    url_queue.extend(initial_urls)
+    with profiling.span('get_all_urls_from_sitemap'):
+        initial_urls = get_all_urls_from_sitemap(start_url, origins)
+    for url in [start_url] + initial_urls:
+        enqueue(url)
+    
+    lock = threading.Lock()  # guards stats and the near-duplicate index shared by page tasks
+    deadline = time.time() + time_budget
+    pages = 0
+    max_depth = len(frontier)
+    metrics.QUEUE_DEPTH.inc(len(frontier))
+    
+    def crawl_page(url):
+        """Fetch and extract one URL; returns (page_data, new_links), page_data None when skipped"""
+        with profiling.span('crawl_page', url=url):
+            # Fast request
+            with profiling.span('fetch'):
+                resp = fetch(url, 'crawl', headers=HEADERS, timeout=TIMEOUT, allow_redirects=True, origins=origins)
+            if resp.status_code != 200:
+                return None, []
+            # Redirected onto a URL this crawl already fetched
+            if resp.history:
+                final = canonicalize_url(resp.url)
+                with lock:
+                    duplicate = not dispatched.add(final)
+                    if duplicate:
+                        stats['canonical_duplicates'] += 1
+                if duplicate:
+                    metrics.CRAWL_SKIPPED.inc(reason='canonical_url')
+                    return None, []
+            content = resp.text
+            
+            # A body this URL served before is not parsed again
+            digest = hashlib.sha256(resp.content).hexdigest()
+            parsed = cache.get('page', url, digest) if not large else None
+            if parsed is not None:
+                fingerprint, page_data, new_links = parsed
+                page_data.response_headers = dict(resp.headers)
+            else:
+                with profiling.span('simhash'):
+                    fingerprint = simhash(visible_text(content))
+            
+            # Skip pages whose text nearly matches one already crawled
+            if fingerprint is not None:
+                with lock:
+                    original = fingerprints.find(fingerprint)
+                    if original is None:
+                        fingerprints.add(fingerprint, url)
+                    else:
+                        stats['near_duplicates'] += 1
+                        if len(stats['near_duplicate_examples']) < 20:
+                            stats['near_duplicate_examples'].append({'url': url, 'duplicate_of': original})
+                if original is not None:
+                    metrics.CRAWL_SKIPPED.inc(reason='near_duplicate')
+                    return None, []
+            
+            if parsed is not None:
+                return page_data, new_links
+            
+            # Extract page data
+            with metrics.PARSE_SECONDS.time(), profiling.span('extract_all_data'):
+                page_data = extract_all_data(url, content, resp.headers)
+            page_data.content_digest = digest
+            
+            # Extract MORE links from this page
+            with profiling.span('extract_all_links'):
+                new_links = extract_all_links(content, url, domain)
+            if not large:
+                cache.set('page', url, digest, value=(fingerprint, page_data, new_links), ttl=PAGE_CACHE_TTL)
+            return page_data, new_links
     
-    lock = threading.Lock()
+    def merge_script(findings):
+        js['scripts_scanned'] += 1
+        js['bytes_scanned'] += findings['bytes']
+        js['truncated_scripts'] += findings['truncated']
+        for library in findings['libraries']:
+            js['libraries'].setdefault((library['name'], library['version']), findings['url'])
+        if domain not in findings['url']:
+            return []   # off-site scripts only contribute fingerprints
+        for call in findings['api_calls']:
+            js['api_calls'].setdefault((call['method'], call['url']), findings['url'])
+        for operation in findings['graphql_operations']:
+            js['graphql_operations'].setdefault(operation, findings['url'])
+        for source_map in findings['source_maps']:
+            js['source_maps'].setdefault(source_map, findings['url'])
+        
+        discovered = []
+        for endpoint in findings['endpoints'] + [call['url'] for call in findings['api_calls']]:
+            if len(js['endpoints']) < JS_MAX_ENDPOINTS:
+                js['endpoints'].setdefault(endpoint, findings['url'])
+            full_url = normalize_url(start_url, endpoint)
+            if full_url and domain in full_url and '{param}' not in full_url:
+                discovered.append(origins.canonical(full_url))
+        if on_urls:
+            on_urls(discovered)
+        return discovered
     
-    def worker():
+    # This thread owns the frontier; page tasks run in the shared crawl pool,
+    # at most MAX_WORKERS of them for this crawl at a time, plus JS_QUOTA
+    # script analyses
+    quota = crawl_pool.quota(MAX_WORKERS)
+    task = profiling.wrap(crawl_page)
+    js_quota = crawl_pool.quota(JS_QUOTA)
+    js_task = profiling.wrap(analyze_script)
+    in_flight = set()
+    scripts_in_flight = set()
+    rescore_pending = False
+    last_rescore = 0
+    seeded = False
+    try:
         while True:
-            with lock:
-                if not url_queue or len(results) >= max_pages:
-                    break
-                url = url_queue.pop(0)
-                if url in visited:
+            if rescore_pending and time.time() - last_rescore >= PRIORITY_RESCORE_INTERVAL:
+                with profiling.span('frontier_rescore'):
+                    frontier.rescore()
+                    deferred.rescore()
+                rescore_pending = False
+                last_rescore = time.time()
+            # The start page goes out alone: its links and forms seed the
+            # ranking, and it always beats a same-content page to the index
+            while ((frontier or deferred) and len(in_flight) < (quota.limit if seeded else 1)
+                   and pages + len(in_flight) < max_pages and time.time() < deadline):
+                if frontier:
+                    url = origins.rewrite(frontier.pop())
+                    metrics.QUEUE_DEPTH.dec()
+                else:
+                    url = origins.rewrite(deferred.pop())
+                    stats['template_deferred_fetched'] += 1
+                # Queued before its origin redirect was learned, and now a duplicate
+                key = canonicalize_url(url)
+                with lock:
+                    duplicate = not dispatched.add(key)
+                    if duplicate:
+                        stats['canonical_duplicates'] += 1
+                if duplicate:
+                    metrics.CRAWL_SKIPPED.inc(reason='canonical_url')
                     continue
-                visited.add(url)
+                scorer.note_fetched(url)
+                in_flight.add(quota.submit(task, url))
+            while script_queue and len(scripts_in_flight) < js_quota.limit and time.time() < deadline:
+                scripts_in_flight.add(js_quota.submit(js_task, script_queue.popleft(), asset_stats, domain))
+            if not in_flight and not scripts_in_flight:
+                break
             
-            try:
-                # Fast request
-                resp = requests.get(url, headers=HEADERS, timeout=TIMEOUT, allow_redirects=True)
-                if resp.status_code == 200:
-                    content = resp.text
-                    
-                    # Extract page data
-                    page_data = extract_all_data(url, content, resp.headers)
-                    
-                    with lock:
-                        results.append(page_data)
-                    
-                    # Extract MORE links from this page
-                    if len(results) < max_pages:
-                        new_links = extract_all_links(content, url, domain)
-                        for link in new_links:
-                            if link not in visited and link not in url_queue:
-                                url_queue.append(link)
-                                
-            except:
-                continue
-    
-    # Start many workers
-    threads = []
-    for _ in range(min(MAX_WORKERS, max_pages)):
-        t = threading.Thread(target=worker)
-        t.daemon = True
-        t.start()
-        threads.append(t)
-    
-    # Wait with timeout
-    start_time = time.time()
-    for t in threads:
-        t.join(timeout=20)
+            done, _ = concurrent.futures.wait(in_flight | scripts_in_flight,
+                                              timeout=max(0, deadline - time.time()),
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            if not done:
+                break  # time budget spent
+            new_links = []
+            for future in done & scripts_in_flight:
+                try:
+                    new_links.extend(merge_script(future.result()))
+                except Exception as e:
+                    record_error('script', e)
+            scripts_in_flight -= done
+            seeded = seeded or bool(done & in_flight)
+            
+            for future in done & in_flight:
+                try:
+                    page_data, page_links = future.result()
+                except Exception as e:
+                    record_error('crawl', e)
+                    continue
+                if page_data is None or pages >= max_pages:
+                    continue
+                pages += 1
+                if keep_pages is None or len(results) < keep_pages:
+                    results.append(page_data)
+                if on_page:
+                    on_page(page_data)
+                new_links.extend(page_links)
+                # Forms make their targets and sibling pages worth fetching sooner
+                if scorer.note_forms(page_data.url, page_data.forms, page_links):
+                    rescore_pending = True
+                for script in page_data.scripts:
+                    script_url = script.get('full_url')
+                    if script_url and (JS_THIRD_PARTY or domain in script_url):
+                        queue_script(script_url)
+            in_flight -= done
+            
+            if pages < max_pages:
+                for link in new_links:
+                    if enqueue(link):
+                        metrics.QUEUE_DEPTH.inc()
+                max_depth = max(max_depth, len(frontier))
+    finally:
+        # Late tasks finish in the pool; queued ones are dropped
+        for future in in_flight | scripts_in_flight:
+            future.cancel()
+        metrics.QUEUE_DEPTH.dec(len(frontier))
+        metrics.CRAWL_SKIPPED.inc(len(deferred), reason='template_cap')   # deferred and never reached
+        if large:
+            print(f"🗂️  Large crawl: {pages} pages, {len(seen)} URLs seen, frontier {frontier.stats()}, "
+                  f"deferred {deferred.stats()}")
+        frontier.close()
+        deferred.close()
+    
+    if crawl_stats is not None:
+        with lock:
+            crawl_stats.update(stats, template_capped=templates.capped,
+                               near_duplicate_index_evictions=fingerprints.evicted)
+    if priority_report is not None:
+        priority_report.update(scorer.report(), rescores=frontier.rescores)
+    if js_report is not None:
+        js_report.update(
+            scripts_scanned=js['scripts_scanned'],
+            bytes_scanned=js['bytes_scanned'],
+            truncated_scripts=js['truncated_scripts'],
+            endpoints=[{'endpoint': e, 'source': src} for e, src in js['endpoints'].items()],
+            api_calls=[{'method': m, 'url': u, 'source': src} for (m, u), src in js['api_calls'].items()],
+            graphql_operations=[{'operation': o, 'source': src} for o, src in js['graphql_operations'].items()],
+            source_maps=[{'url': u, 'source': src} for u, src in js['source_maps'].items()],
+            libraries=[{'name': n, 'version': v, 'source': src} for (n, v), src in js['libraries'].items()],
+            asset_cache=asset_stats.to_dict()
+        )
+    metrics.QUEUE_DEPTH_MAX.observe(max_depth)
+    metrics.PAGES_PER_SCAN.observe(pages)
     
     return results
 
-def get_all_urls_from_sitemap(base_url):
+def fetch_script(url):
+    """Script body as decoded chunks, at most JS_MAX_BYTES; chunks are None unless 200"""
+    chunks = []
+    resp, read, truncated = fetch_capped(url, 'script', JS_MAX_BYTES, chunks.append,
+                                         headers=HEADERS, timeout=TIMEOUT)
+    meta = {'status': resp.status_code, 'bytes': read, 'truncated': truncated,
+            'source_map': resp.headers.get('SourceMap') or resp.headers.get('X-SourceMap'),
+            'immutable': 'immutable' in resp.headers.get('Cache-Control', '').lower()}
+    return (chunks if resp.status_code == 200 else None), meta
+
+def scan_script(chunks):
+    scanner = BundleScanner()
+    for chunk in chunks:
+        scanner.feed(chunk)
+    return scanner.close()
+
+def analyze_script(url, asset_stats=None, site_domain=None):
+    """Findings for one script; pinned assets already analysed by any scan are reused"""
+    third_party = site_domain is not None and tldextract.extract(url).domain != site_domain
+    with profiling.span('analyze_script', url=url):
+        findings, meta, result = assets.analyze(url, fetch_script, scan_script, asset_stats, third_party)
+    # Stored analyses are shared, so build a fresh dict
+    findings = dict(findings or BundleScanner().findings())
+    source_maps = list(findings['source_maps'])
+    if meta['source_map'] and meta['source_map'] not in source_maps:
+        source_maps.append(meta['source_map'])
+    findings.update(url=url, status=meta['status'], bytes=meta['bytes'], truncated=meta['truncated'],
+                    asset=result, source_maps=[urljoin(url, source_map) for source_map in source_maps])
+    return findings
+
+class CrawlTotals:
+    """Running totals over every crawled page, so large crawls need not keep pages"""
+
+    def __init__(self, large=False, url_sample_limit=100, on_url=None):
+        self.pages = 0
+        self.forms = 0
+        self.images = 0
+        self.scripts = 0
+        self.links = 0
+        self.words = 0
+        self.technology_hints = []
+        self.urls = SeenFilter(LARGE_CRAWL_SEEN_CAPACITY) if large else ExactSeen()
+        self.url_sample = []
+        self.url_sample_limit = url_sample_limit
+        self.on_url = on_url   # called once per new URL
+
+    def url_list(self):
+        """Every URL seen, or the sample when a Bloom filter holds them"""
+        return list(self.urls.items) if isinstance(self.urls, ExactSeen) else list(self.url_sample)
+
+    def add_urls(self, urls):
+        for url in urls:
+            url = canonicalize_url(url)
+            if self.urls.add(url):
+                if len(self.url_sample) < self.url_sample_limit:
+                    self.url_sample.append(url)
+                if self.on_url:
+                    self.on_url(url)
+
+    def add(self, page):
+        if not self.pages:
+            self.technology_hints = page.technology_hints
+        self.pages += 1
+        self.forms += len(page.forms)
+        self.images += len(page.images)
+        self.scripts += len(page.scripts)
+        self.links += page.links.total
+        self.words += page.word_count
+        self.add_urls([page.url] + [link.full_url for link in page.links.internal if link.full_url])
+
+def get_all_urls_from_sitemap(base_url, origins=None):
     """Get ALL URLs from sitemap.xml and robots.txt"""
     urls = []
     
     # Check sitemap.xml
     sitemap_url = urljoin(base_url, 'sitemap.xml')
     try:
-        resp = requests.get(sitemap_url, timeout=3)
+        resp = fetch(sitemap_url, 'sitemap', timeout=3, origins=origins)
         if resp.status_code == 200:
             # Parse sitemap
             locs = re.findall(r'<loc>(.*?)</loc>', resp.text, re.IGNORECASE)
@@ -144,32 +663,34 @@ def get_all_urls_from_sitemap(base_url):
             sitemap_index = re.findall(r'<sitemap>\s*<loc>(.*?)</loc>', resp.text, re.IGNORECASE)
             for index_url in sitemap_index:
                 try:
-                    idx_resp = requests.get(index_url.strip(), timeout=3)
+                    idx_resp = fetch(index_url.strip(), 'sitemap', timeout=3, origins=origins)
                     if idx_resp.status_code == 200:
                         sub_locs = re.findall(r'<loc>(.*?)</loc>', idx_resp.text, re.IGNORECASE)
                         urls.extend([loc.strip() for loc in sub_locs if loc.strip()])
-                except:
+                except Exception as e:
+                    record_error('sitemap', e)
                     continue
-    except:
-        pass
+    except Exception as e:
+        record_error('sitemap', e)
     
     # Check robots.txt for sitemap
     robots_url = urljoin(base_url, 'robots.txt')
     try:
-        resp = requests.get(robots_url, timeout=3)
+        resp = fetch(robots_url, 'sitemap', timeout=3, origins=origins)
         if resp.status_code == 200:
             # Extract sitemap from robots.txt
             sitemaps = re.findall(r'Sitemap:\s*(.*)', resp.text, re.IGNORECASE)
             for sitemap in sitemaps:
                 try:
-                    sm_resp = requests.get(sitemap.strip(), timeout=3)
+                    sm_resp = fetch(sitemap.strip(), 'sitemap', timeout=3, origins=origins)
                     if sm_resp.status_code == 200:
                         locs = re.findall(r'<loc>(.*?)</loc>', sm_resp.text, re.IGNORECASE)
                         urls.extend([loc.strip() for loc in locs if loc.strip()])
-                except:
+                except Exception as e:
+                    record_error('sitemap', e)
                     continue
-    except:
-        pass
+    except Exception as e:
+        record_error('sitemap', e)
     
     return list(set(urls))
 
@@ -213,18 +734,18 @@ def extract_all_data(url, html_content, headers):
     soup = BeautifulSoup(html_content, 'html.parser')
     
     # 1. Basic Info
-    data = {
-        'url': url,
-        'title': soup.title.string[:200] if soup.title else '',
-        'meta_description': '',
-        'meta_keywords': '',
-        'word_count': len(soup.get_text().split()),
-        'character_count': len(soup.get_text()),
-        'language': soup.html.get('lang', '') if soup.html else '',
-        'doctype': get_doctype(html_content),
-        'response_headers': dict(headers),
-        'status_code': 200
-    }
+    data = PageRecord(
+        url=url,
+        title=(soup.title.string or '')[:200] if soup.title else '',
+        meta_description='',
+        meta_keywords='',
+        word_count=len(soup.get_text().split()),
+        character_count=len(soup.get_text()),
+        language=intern_str(soup.html.get('lang', '')) if soup.html else '',
+        doctype=intern_str(get_doctype(html_content)),
+        response_headers={intern_str(k): v for k, v in headers.items()},
+        status_code=200
+    )
     
     # 2. Meta Tags
     meta_data = {}
@@ -232,196 +753,197 @@ def extract_all_data(url, html_content, headers):
         name = meta.get('name') or meta.get('property') or meta.get('http-equiv') or ''
         content = meta.get('content', '')
         if name and content:
-            meta_data[name.lower()] = content[:500]
+            meta_data[intern_str(name.lower())] = content[:500]
         
         if name.lower() == 'description':
-            data['meta_description'] = content[:500]
+            data.meta_description = content[:500]
         elif name.lower() == 'keywords':
-            data['meta_keywords'] = content[:500]
+            data.meta_keywords = content[:500]
     
-    data['meta_tags'] = meta_data
+    data.meta_tags = meta_data
     
     # 3. All Links
     all_links = []
     internal_links = []
     external_links = []
+    domain = tldextract.extract(url).domain
     for link in soup.find_all('a', href=True):
         href = link['href']
         text = link.get_text(strip=True)[:100]
         full_url = normalize_url(url, href)
         
-        link_data = {
-            'text': text,
-            'href': href,
-            'full_url': full_url,
-            'title': link.get('title', '')[:100],
-            'rel': link.get('rel', [])
-        }
+        link_data = LinkRecord(
+            text=text,
+            href=href,
+            full_url=full_url,
+            title=link.get('title', '')[:100],
+            rel=intern_tokens(link.get('rel', []))
+        )
         
         all_links.append(link_data)
         
         if full_url:
-            if tldextract.extract(url).domain in full_url:
+            if domain in full_url:
                 internal_links.append(link_data)
             else:
                 external_links.append(link_data)
     
-    data['links'] = {
-        'total': len(all_links),
-        'internal': internal_links[:50],  # Limit
-        'external': external_links[:50]   # Limit
-    }
+    data.links = LinksRecord(
+        total=len(all_links),
+        internal=internal_links[:50],  # Limit
+        external=external_links[:50]   # Limit
+    )
     
     # 4. All Images
     images = []
     for img in soup.find_all('img'):
         src = img.get('src', '')
         if src:
-            images.append({
-                'src': src,
-                'alt': img.get('alt', '')[:100],
-                'title': img.get('title', '')[:100],
-                'width': img.get('width'),
-                'height': img.get('height'),
-                'full_url': normalize_url(url, src)
-            })
+            images.append(ImageRecord(
+                src=src,
+                alt=img.get('alt', '')[:100],
+                title=img.get('title', '')[:100],
+                width=intern_str(img.get('width')),
+                height=intern_str(img.get('height')),
+                full_url=normalize_url(url, src)
+            ))
     
-    data['images'] = images[:50]  # Limit
+    data.images = images[:50]  # Limit
     
     # 5. All Scripts
     scripts = []
     for script in soup.find_all('script'):
-        script_data = {
-            'src': script.get('src', ''),
-            'type': script.get('type', ''),
-            'async': script.get('async', False),
-            'defer': script.get('defer', False),
-            'has_content': bool(script.string and script.string.strip()),
-            'content_length': len(script.string or '')
-        }
+        script_data = ScriptRecord(
+            src=script.get('src', ''),
+            type=intern_str(script.get('type', '')),
+            async_=intern_str(script.get('async', False)),
+            defer=intern_str(script.get('defer', False)),
+            has_content=bool(script.string and script.string.strip()),
+            content_length=len(script.string or '')
+        )
         
-        if script_data['src']:
-            script_data['full_url'] = normalize_url(url, script_data['src'])
+        if script_data.src:
+            script_data.full_url = normalize_url(url, script_data.src)
         
         scripts.append(script_data)
     
-    data['scripts'] = scripts
+    data.scripts = scripts
     
     # 6. All Stylesheets
     styles = []
     for link in soup.find_all('link', rel='stylesheet'):
         href = link.get('href', '')
         if href:
-            styles.append({
-                'href': href,
-                'media': link.get('media', ''),
-                'full_url': normalize_url(url, href)
-            })
+            styles.append(StylesheetRecord(
+                href=href,
+                media=intern_str(link.get('media', '')),
+                full_url=normalize_url(url, href)
+            ))
     
     for style in soup.find_all('style'):
-        styles.append({
-            'inline': True,
-            'content_length': len(style.string or '') if style.string else 0
-        })
+        styles.append(StylesheetRecord(
+            inline=True,
+            content_length=len(style.string or '') if style.string else 0
+        ))
     
-    data['stylesheets'] = styles
+    data.stylesheets = styles
     
     # 7. All Forms with EVERYTHING
     forms = []
     for form in soup.find_all('form'):
-        form_data = {
-            'action': form.get('action', ''),
-            'method': form.get('method', 'GET').upper(),
-            'enctype': form.get('enctype', ''),
-            'target': form.get('target', ''),
-            'id': form.get('id', ''),
-            'name': form.get('name', ''),
-            'class': form.get('class', []),
-            'inputs': [],
-            'buttons': [],
-            'labels': []
-        }
+        form_data = FormRecord(
+            action=form.get('action', ''),
+            method=intern_str(form.get('method', 'GET').upper()),
+            enctype=intern_str(form.get('enctype', '')),
+            target=intern_str(form.get('target', '')),
+            id=form.get('id', ''),
+            name=form.get('name', ''),
+            class_=intern_tokens(form.get('class', [])),
+            inputs=[],
+            buttons=[],
+            labels=[]
+        )
         
         # All inputs
         for inp in form.find_all(['input', 'textarea', 'select']):
-            input_data = {
-                'tag': inp.name,
-                'type': inp.get('type', 'text'),
-                'name': inp.get('name', ''),
-                'id': inp.get('id', ''),
-                'class': inp.get('class', []),
-                'placeholder': inp.get('placeholder', ''),
-                'value': inp.get('value', ''),
-                'required': inp.get('required') is not None,
-                'disabled': inp.get('disabled') is not None,
-                'readonly': inp.get('readonly') is not None,
-                'maxlength': inp.get('maxlength'),
-                'minlength': inp.get('minlength'),
-                'pattern': inp.get('pattern', ''),
-                'autocomplete': inp.get('autocomplete', ''),
-                'aria_label': inp.get('aria-label', '')
-            }
+            input_data = InputRecord(
+                tag=intern_str(inp.name),
+                type=intern_str(inp.get('type', 'text')),
+                name=inp.get('name', ''),
+                id=inp.get('id', ''),
+                class_=intern_tokens(inp.get('class', [])),
+                placeholder=inp.get('placeholder', ''),
+                value=inp.get('value', ''),
+                required=inp.get('required') is not None,
+                disabled=inp.get('disabled') is not None,
+                readonly=inp.get('readonly') is not None,
+                maxlength=intern_str(inp.get('maxlength')),
+                minlength=intern_str(inp.get('minlength')),
+                pattern=inp.get('pattern', ''),
+                autocomplete=intern_str(inp.get('autocomplete', '')),
+                aria_label=inp.get('aria-label', '')
+            )
             
             # For select options
             if inp.name == 'select':
                 options = []
                 for option in inp.find_all('option'):
-                    options.append({
-                        'value': option.get('value', ''),
-                        'text': option.get_text(strip=True)[:100],
-                        'selected': option.get('selected') is not None
-                    })
-                input_data['options'] = options
+                    options.append(OptionRecord(
+                        value=option.get('value', ''),
+                        text=option.get_text(strip=True)[:100],
+                        selected=option.get('selected') is not None
+                    ))
+                input_data.options = options
             
-            form_data['inputs'].append(input_data)
+            form_data.inputs.append(input_data)
         
         # All buttons
         for btn in form.find_all('button'):
-            form_data['buttons'].append({
-                'type': btn.get('type', 'submit'),
-                'name': btn.get('name', ''),
-                'value': btn.get('value', ''),
-                'text': btn.get_text(strip=True)[:100]
-            })
+            form_data.buttons.append(ButtonRecord(
+                type=intern_str(btn.get('type', 'submit')),
+                name=btn.get('name', ''),
+                value=btn.get('value', ''),
+                text=btn.get_text(strip=True)[:100]
+            ))
         
         # Associated labels
         for lbl in soup.find_all('label'):
             if lbl.get('for'):
-                form_data['labels'].append({
-                    'for': lbl.get('for'),
-                    'text': lbl.get_text(strip=True)[:100]
-                })
+                form_data.labels.append(LabelRecord(
+                    for_=lbl.get('for'),
+                    text=lbl.get_text(strip=True)[:100]
+                ))
         
         forms.append(form_data)
     
-    data['forms'] = forms
+    data.forms = forms
     
     # 8. Headings Structure
     headings = defaultdict(list)
     for level in range(1, 7):
         for h in soup.find_all(f'h{level}'):
-            headings[f'h{level}'].append({
-                'text': h.get_text(strip=True)[:200],
-                'id': h.get('id', ''),
-                'class': h.get('class', [])
-            })
+            headings[f'h{level}'].append(HeadingRecord(
+                text=h.get_text(strip=True)[:200],
+                id=h.get('id', ''),
+                class_=intern_tokens(h.get('class', []))
+            ))
     
-    data['headings'] = dict(headings)
+    data.headings = dict(headings)
     
     # 9. Tables
     tables = []
     for table in soup.find_all('table'):
-        table_data = {
-            'id': table.get('id', ''),
-            'class': table.get('class', []),
-            'caption': table.find('caption').get_text(strip=True)[:200] if table.find('caption') else '',
-            'headers': [],
-            'rows': []
-        }
+        table_data = TableRecord(
+            id=table.get('id', ''),
+            class_=intern_tokens(table.get('class', [])),
+            caption=table.find('caption').get_text(strip=True)[:200] if table.find('caption') else '',
+            headers=[],
+            rows=[]
+        )
         
         # Headers
         for th in table.find_all('th'):
-            table_data['headers'].append(th.get_text(strip=True)[:100])
+            table_data.headers.append(th.get_text(strip=True)[:100])
         
         # Rows
         for tr in table.find_all('tr'):
@@ -429,43 +951,43 @@ def extract_all_data(url, html_content, headers):
             for td in tr.find_all('td'):
                 row.append(td.get_text(strip=True)[:100])
             if row:
-                table_data['rows'].append(row)
+                table_data.rows.append(row)
         
         tables.append(table_data)
     
-    data['tables'] = tables[:10]  # Limit
+    data.tables = tables[:10]  # Limit
     
     # 10. Lists
     lists = []
     for ul in soup.find_all(['ul', 'ol']):
-        list_data = {
-            'type': ul.name,
-            'id': ul.get('id', ''),
-            'class': ul.get('class', []),
-            'items': [li.get_text(strip=True)[:100] for li in ul.find_all('li')]
-        }
+        list_data = ListRecord(
+            type=intern_str(ul.name),
+            id=ul.get('id', ''),
+            class_=intern_tokens(ul.get('class', [])),
+            items=[li.get_text(strip=True)[:100] for li in ul.find_all('li')]
+        )
         lists.append(list_data)
     
-    data['lists'] = lists[:10]  # Limit
+    data.lists = lists[:10]  # Limit
     
     # 11. Comments
     comments = []
     for comment in soup.find_all(string=lambda text: isinstance(text, str) and text.strip().startswith('<!--')):
         comments.append(comment.strip()[:500])
     
-    data['html_comments'] = comments[:20]  # Limit
+    data.html_comments = comments[:20]  # Limit
     
     # 12. Text Content Analysis
     all_text = soup.get_text()
     lines = [line.strip() for line in all_text.split('\n') if line.strip()]
     paragraphs = [p.get_text(strip=True) for p in soup.find_all('p')]
     
-    data['text_content'] = {
-        'lines': lines[:100],  # First 100 non-empty lines
-        'paragraphs': paragraphs[:50],  # First 50 paragraphs
-        'most_common_words': get_most_common_words(all_text, 20),
-        'longest_words': get_longest_words(all_text, 10)
-    }
+    data.text_content = TextContentRecord(
+        lines=lines[:100],  # First 100 non-empty lines
+        paragraphs=paragraphs[:50],  # First 50 paragraphs
+        most_common_words=get_most_common_words(all_text, 20),
+        longest_words=get_longest_words(all_text, 10)
+    )
     
     # 13. JSON-LD and Structured Data
     json_ld = []
@@ -474,10 +996,11 @@ def extract_all_data(url, html_content, headers):
             try:
                 json_data = json.loads(script.string)
                 json_ld.append(json_data)
-            except:
+            except Exception as e:
+                record_error('parse', e)
                 json_ld.append({'raw': script.string[:500]})
     
-    data['structured_data'] = json_ld
+    data.structured_data = json_ld
     
     # 14. Open Graph and Twitter Cards
     og_tags = {}
@@ -487,24 +1010,25 @@ def extract_all_data(url, html_content, headers):
         content = meta.get('content', '')
         
         if prop.startswith('og:'):
-            og_tags[prop] = content
+            og_tags[intern_str(prop)] = content
         elif prop.startswith('twitter:'):
-            twitter_tags[prop] = content
+            twitter_tags[intern_str(prop)] = content
     
-    data['open_graph'] = og_tags
-    data['twitter_cards'] = twitter_tags
+    data.open_graph = og_tags
+    data.twitter_cards = twitter_tags
     
     # 15. Technology Detection
-    data['technology_hints'] = detect_tech_hints(html_content, headers)
+    with profiling.span('detect_tech_hints'):
+        data.technology_hints = detect_tech_hints(html_content, headers)
     
     # 16. Performance Hints
-    data['performance'] = {
-        'html_size': len(html_content),
-        'image_count': len(images),
-        'script_count': len(scripts),
-        'stylesheet_count': len(styles),
-        'dom_elements': len(soup.find_all())
-    }
+    data.performance = PerformanceRecord(
+        html_size=len(html_content),
+        image_count=len(images),
+        script_count=len(scripts),
+        stylesheet_count=len(styles),
+        dom_elements=len(soup.find_all())
+    )
     
     return data
 
@@ -562,12 +1086,12 @@ def normalize_url(base, href):
         parsed = urlparse(full)
         if parsed.scheme in ('http', 'https'):
             return full
-    except:
-        pass
+    except Exception as e:
+        record_error('parse', e)
     return None
 
 # ---------- Security Files Scanner ----------
-def scan_all_files(base_url):
+def scan_all_files(base_url, origins=None):
     """Scan ALL common files"""
     common_files = [
         # Security files
@@ -613,10 +1137,11 @@ def scan_all_files(base_url):
     def check_file(file_path):
         url = urljoin(base_url, file_path)
         try:
-            resp = requests.head(url, timeout=2, allow_redirects=False)
+            resp = fetch(url, 'file_probe', method='HEAD', timeout=2, allow_redirects=False, origins=origins)
             if resp.status_code < 400:
                 # If HEAD worked, try GET for content
-                resp_get = requests.get(url, timeout=3)
+                url = resp.url
+                resp_get = fetch(url, 'file_probe', timeout=3, origins=origins)
                 return {
                     'file': file_path,
                     'url': url,
@@ -624,29 +1149,56 @@ def scan_all_files(base_url):
                     'size': len(resp_get.content),
                     'content_preview': resp_get.text[:1000]
                 }
-        except:
-            pass
+        except Exception as e:
+            record_error('file_probe', e)
         return None
     
-    with concurrent.futures.ThreadPoolExecutor(max_workers=15) as executor:
-        futures = [executor.submit(check_file, f) for f in common_files]
-        for future in concurrent.futures.as_completed(futures):
-            result = future.result()
-            if result:
-                results[result['file']] = result
+    quota = file_probe_pool.quota(FILE_PROBE_QUOTA)
+    task = profiling.wrap(check_file)
+    futures = [quota.submit(task, f) for f in common_files]
+    for future in concurrent.futures.as_completed(futures):
+        result = future.result()
+        if result:
+            results[result['file']] = result
     
     return results
 
 # ---------- LLM Endpoint ----------
+# /llm and /llm/stream pass these through to /extract
+LLM_EXTRACT_OPTIONS = ('max_pages', 'crawl_time', 'large_crawl', 'template_samples', 'baseline')
+
+def extract_for_llm(website_url, mode, data):
+    """Run /extract in-process and return its JSON payload (a diff when data has a baseline)"""
+    body = {'website_url': website_url, 'mode': mode}
+    body.update((key, data[key]) for key in LLM_EXTRACT_OPTIONS if data.get(key) is not None)
+    with app.test_request_context('/extract', method='POST', json=body):
+        extract_response = extract()
+
+        if isinstance(extract_response, tuple):
+            payload = extract_response[0].get_json()
+            if extract_response[1] == 503:
+                raise AdmissionRejected('extract', payload.get('retry_after', 1))
+            return payload
+        return extract_response.get_json()
+
 @app.route('/llm', methods=['POST'])
 def llm_pentest():
     """
     Extract website data and send to Pollinations AI for pentesting analysis
     """
+    data = json_body()
+    if data is None:
+        return jsonify({'error': 'request body must be a JSON object'}), 400
+    if data.get('profile') and not profiling.active():
+        return profiled_response(run_llm_pentest)
+    return run_llm_pentest()
+
+def run_llm_pentest():
     try:
-        data = request.get_json() or {}
+        data = json_body() or {}
         website_url = data.get('website_url', '').strip()
         mode = data.get('mode', 'basic').lower()  # default to basic
+        llm_mode = data.get('llm_mode', 'auto').lower()  # auto | single | map_reduce
         
         if not website_url:
             return jsonify({'error': 'website_url is required'}), 400
@@ -654,44 +1206,166 @@ def llm_pentest():
         print(f"🤖 LLM Pentest Analysis for: {website_url} | Mode: {mode}")
         
         # First extract data using existing extract function
-        with app.test_request_context('/extract', method='POST', 
-                                     json={'website_url': website_url, 'mode': mode}):
-            extract_response = extract()
-            
-            if isinstance(extract_response, tuple):
-                extract_data = extract_response[0].get_json()
-            else:
-                extract_data = extract_response.get_json()
-            
-            if 'error' in extract_data:
-                return jsonify({'error': 'Failed to extract data', 'details': extract_data}), 400
+        with profiling.span('extract'):
+            extract_data = extract_for_llm(website_url, mode, data)
+        if 'error' in extract_data:
+            return jsonify({'error': 'Failed to extract data', 'details': extract_data}), 400
         
         # Send to LLM
         print("📤 Sending data to Pollinations AI...")
-        llm_result = query_llm(extract_data)
+        llm_start = time.time()
+        with profiling.span('llm'):
+            llm_result, llm_info = cached_analyze_llm(extract_data, llm_mode)
+        llm_info['llm_time'] = round(time.time() - llm_start, 2)
         
         # Add LLM analysis to response
         extract_data['llm_pentest_analysis'] = llm_result
         
-        return jsonify({
+        with profiling.span('serialization'):
+            return json_response(app, {
     'mode': mode,
     'website_url': website_url,
     'llm_pentest_analysis': llm_result,
+    'llm_analysis_info': llm_info,
     'extraction_time': extract_data.get('extraction_time', 0) if isinstance(extract_data, dict) else 0
-})
+}, stream=not profiling.active())
         
+    except AdmissionRejected as e:
+        return busy_response(e)
     except Exception as e:
+        record_error('llm', e)
         return jsonify({'error': str(e), 'message': 'LLM analysis failed'}), 500
 
+@app.route('/llm/stream', methods=['POST'])
+def llm_pentest_stream():
+    """
+    Same as /llm, but streams the result as server-sent events:
+    'extraction' once data is extracted, one 'test_case' per line, then 'done'
+    """
+    data = json_body()
+    if data is None:
+        return jsonify({'error': 'request body must be a JSON object'}), 400
+    website_url = data.get('website_url', '').strip()
+    mode = data.get('mode', 'basic').lower()
+
+    if not website_url:
+        return jsonify({'error': 'website_url is required'}), 400
+
+    print(f"🤖 LLM Pentest Stream for: {website_url} | Mode: {mode}")
+
+    # Extract before the stream starts, so a shed or failed scan is still a
+    # proper 503/4xx/5xx with headers rather than an 'error' event after a 200
+    start_time = time.time()
+    try:
+        extract_data = extract_for_llm(website_url, mode, data)
+    except AdmissionRejected as e:
+        return busy_response(e)
+    except Exception as e:
+        record_error('llm', e)
+        return jsonify({'error': str(e), 'message': 'LLM analysis failed'}), 500
+    extraction_time = round(time.time() - start_time, 2)
+    if 'error' in extract_data:
+        return jsonify({'error': 'Failed to extract data', 'details': extract_data}), 400
+
+    def generate():
+        try:
+            yield sse_event('extraction', {
+                'mode': mode,
+                'website_url': website_url,
+                'extraction_time': extraction_time
+            })
+
+            llm_start = time.time()
+            first_line_time = None
+            count = 0
+            for line in stream_llm_lines(extract_data):
+                if first_line_time is None:
+                    first_line_time = round(time.time() - llm_start, 2)
+                count += 1
+                yield sse_event('test_case', {'index': count, 'line': line})
+
+            yield sse_event('done', {
+                'test_cases': count,
+                'extraction_time': extraction_time,
+                'llm_first_line_time': first_line_time,
+                'llm_time': round(time.time() - llm_start, 2),
+                'total_time': round(time.time() - start_time, 2)
+            })
+
+        except Exception as e:
+            record_error('llm', e)
+            yield sse_event('error', {'error': str(e), 'message': 'LLM analysis failed'})
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 # ---------- Main Endpoint ----------
 @app.route('/extract', methods=['POST'])
 def extract():
+    data = json_body()
+    if data is None:
+        return jsonify({'error': 'request body must be a JSON object'}), 400
+    if data.get('profile') and not profiling.active():
+        return profiled_response(run_extract)
+    return run_extract()
+
+def profiled_response(view):
+    """Run a view under a Profile and attach the report as 'profile'"""
+    with profiling.Profile(request.path) as profile:
+        response = app.make_response(view())
+
+    payload = getattr(response, 'json_payload', None) or response.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return response
+    payload['profile'] = profile.report()
+    profiled = json_response(app, payload, response.status_code)
+    # Keep the view's own headers (Retry-After, X-Cache); the body ones belong to the new response
+    for name, value in response.headers.items():
+        if name.lower() not in ('content-type', 'content-length', 'content-encoding', 'vary'):
+            profiled.headers[name] = value
+    return profiled
+
+def json_body():
+    """The request's JSON object; {} without a JSON body, None when the JSON is not an object"""
+    data = request.get_json(silent=True)
+    if data is None:
+        return {}
+    return data if isinstance(data, dict) else None
+
+def busy_response(e):
+    """503 with Retry-After for a scan shed by admission control"""
+    return jsonify({"error": str(e), "message": "Server busy", "retry_after": e.retry_after}), 503, {
+        'Retry-After': str(e.retry_after)
+    }
+
+def extract_response(result, status=200, source=None):
+    """Serialize an /extract result; source (HIT, MISS, COALESCED) goes in X-Cache"""
+    if status != 200:
+        return jsonify(result), status
+    with profiling.span('serialization'):
+        response = json_response(app, result, stream=not profiling.active())
+    if source:
+        response.headers['X-Cache'] = source
+    return response
+
+def run_extract():
     start_time = time.time()
 
     try:
-        data = request.get_json() or {}
+        data = json_body() or {}
         url = data.get('website_url', '').strip()
         mode = data.get('mode', 'advanced').lower()  # <-- DEFAULT advanced
+        try:
+            max_pages = min(int(data.get('max_pages', ADVANCED_MAX_PAGES)), LARGE_CRAWL_MAX_PAGES)
+            large = bool(data.get('large_crawl')) or max_pages > LARGE_CRAWL_THRESHOLD
+            crawl_time = min(float(data.get('crawl_time', LARGE_CRAWL_TIME if large else 20)), MAX_CRAWL_TIME)
+            template_samples = int(data.get('template_samples', TEMPLATE_SAMPLES))  # 0 = no cap
+        except (TypeError, ValueError):
+            return jsonify({"error": "max_pages, crawl_time and template_samples must be numbers"}), 400
+        if max_pages < 1 or not crawl_time > 0 or template_samples < 0:
+            return jsonify({"error": "max_pages must be >= 1, crawl_time > 0 and template_samples >= 0"}), 400
 
         if not url:
             return jsonify({'error': 'website_url is required'}), 400
@@ -699,15 +1373,100 @@ def extract():
         if not url.startswith(('http://', 'https://')):
             url = 'https://' + url
 
-        print(f"🔍 Extracting: {url} | Mode: {mode}")
+        if mode not in ('basic', 'advanced'):
+            return jsonify({"error": "mode must be 'basic' or 'advanced'"}), 400
+
+        options = (max_pages, large, crawl_time, template_samples)
+
+        # Diff mode: compare against a stored scan id or a snapshot the client kept
+        baseline_id = data.get('baseline')
+        baseline = data.get('baseline_snapshot')
+        if baseline_id or baseline:
+            if mode != 'advanced':
+                return jsonify({"error": "baseline diffs need mode 'advanced'"}), 400
+            if baseline is None:
+                baseline = snapshots.get(str(baseline_id))
+                if baseline is None:
+                    return jsonify({"error": f"Baseline scan {baseline_id} not found, expired or evicted from the snapshot store"}), 404
+
+        # A diff needs a fresh scan: a cached result could be the baseline itself
+        use_cache = bool(data.get('cache', True)) and baseline is None
+        result, status, source = cached_scan(url, mode, options, start_time, use_cache)
+        if baseline is not None and status == 200:
+            result, status = scan_diff(result, baseline_id, baseline)
+        return extract_response(result, status, source)
+
+    except AdmissionRejected as e:
+        return busy_response(e)
+    except Exception as e:
+        record_error('extract', e)
+        return jsonify({"error": str(e), "message": "Internal error"}), 500
+
+def cached_scan(url, mode, options, start_time, use_cache=True):
+    """scan_target() through the result cache and single-flight; returns (payload, status, source)"""
+    # Profiled runs always do the work so the report means something
+    if profiling.active():
+        with admission.slot():
+            result, status, _ = scan_target(url, mode, options, start_time)
+        return result, status, None
+
+    # Identical requests share one cache entry and one in-flight scan
+    key = (canonicalize_url(url), mode) + options
+    if use_cache:
+        cached = cache.get('extract', *key)
+        if cached is not None:
+            return cached, 200, 'HIT'
 
-        # ---------------- BASIC MODE ----------------
-        if mode == "basic":
+    # Coalesced waiters queue behind the leader, not for a slot of their own
+    def scan():
+        with admission.slot():
+            result, status, cacheable = scan_target(url, mode, options, start_time)
+        if use_cache and cacheable:
+            cache.set('extract', *key, value=result, ttl=EXTRACT_CACHE_TTL)
+        return result, status
+
+    (result, status), shared = extract_flight.do(make_key('extract', *key), scan)
+    return result, status, 'COALESCED' if shared else 'MISS'
+
+def scan_diff(result, baseline_id, baseline):
+    """Diff payload for a finished advanced scan against its baseline snapshot"""
+    current = snapshots.get(result['scan_id']) if result.get('scan_id') else None
+    if current is None:
+        return {"error": "Scan did not complete, nothing to diff", "scan_id": result.get('scan_id')}, 504
+    try:
+        diff = diff_snapshots(baseline, current)
+    except (KeyError, TypeError, AttributeError):
+        return {"error": "baseline_snapshot is not a scan snapshot (see GET /snapshots/<scan_id>)"}, 400
+    return {
+        "mode": "diff",
+        "scan_id": result['scan_id'],
+        "baseline_scan_id": baseline_id,
+        "target_url": result['extraction_summary']['target_url'],
+        "baseline_target_url": baseline.get('target_url'),
+        "baseline_created": baseline.get('created'),
+        "summary": diff['summary'],
+        "changes": diff['changes'],
+        "unchanged_pages": diff['unchanged_pages'],
+        "snapshot_limits": diff['limits'],
+        "extraction_time": result['extraction_summary']['extraction_time']
+    }, 200
+
+def scan_target(url, mode, options, start_time):
+    """Run a basic or advanced scan; returns (payload, status, cacheable)"""
+    max_pages, large, crawl_time, template_samples = options
+    print(f"🔍 Extracting: {url} | Mode: {mode}")
+
+    # ---------------- BASIC MODE ----------------
+    if mode == "basic":
+        with metrics.SCANS_ACTIVE.track(mode='basic'), metrics.SCAN_SECONDS.time(mode='basic'):
             try:
-                resp = requests.get(url, headers=HEADERS, timeout=7)
-                soup = BeautifulSoup(resp.text, "html.parser")
+                with profiling.span('fetch'):
+                    resp = fetch(url, 'basic', headers=HEADERS, timeout=7)
+                with profiling.span('parse'):
+                    soup = BeautifulSoup(resp.text, "html.parser")
 
-                tech = detect_tech_hints(resp.text, resp.headers)
+                with profiling.span('detect_tech_hints'):
+                    tech = detect_tech_hints(resp.text, resp.headers)
                 links = list(set(a.get("href") for a in soup.find_all("a", href=True)))[:50]
 
                 basic_result = {
@@ -719,79 +1478,167 @@ def extract():
                     "endpoints": links,
                     "extraction_time": round(time.time() - start_time, 2)
                 }
-                return jsonify(basic_result)
+                return basic_result, 200, True
 
             except Exception as e:
-                return jsonify({"error": str(e), "message": "Basic extraction failed"}), 500
+                record_error('basic', e)
+                return {"error": str(e), "message": "Basic extraction failed"}, 500, False
 
-        # ---------------- ADVANCED MODE ----------------
-        elif mode == "advanced":
-            with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-                crawl_future = executor.submit(deep_crawl, url, 30)
-                files_future = executor.submit(scan_all_files, url)
+    # ---------------- ADVANCED MODE ----------------
+    scan_id = uuid.uuid4().hex
+    writer = results.writer(scan_id, url) if results else None
+    try:
+        totals = CrawlTotals(large, on_url=(lambda u: writer.add('urls', u)) if writer else None)
+        crawl_stats = {}
+        js_report = {}
+        priority_report = {}
+        templates = TemplateInventory(template_samples)
+        snapshot = SnapshotBuilder()
+        origins = OriginMap(url)   # origin redirects learned during this scan
+        cacheable = True
+    
+        def on_page(page):
+            totals.add(page)
+            snapshot.add_page(page)
+            if writer:
+                writer.add('pages', page)
+                for form in page.forms:
+                    writer.add('forms', dict(form.to_dict(), page=page.url))
+    
+        with metrics.SCANS_ACTIVE.track(mode='advanced'), metrics.SCAN_SECONDS.time(mode='advanced'):
+            crawl_future = scan_pool.submit(profiling.wrap(deep_crawl, 'deep_crawl'), url, max_pages, crawl_time,
+                                            large=large, on_page=on_page, keep_pages=5, crawl_stats=crawl_stats,
+                                            templates=templates, on_urls=totals.add_urls, js_report=js_report,
+                                            origins=origins, priority_report=priority_report)
+            files_future = scan_pool.submit(profiling.wrap(scan_all_files, 'scan_all_files'), url, origins)
 
-                try:
-                    headers_resp = requests.get(url, headers=HEADERS, timeout=5)
-                    headers_info = dict(headers_resp.headers)
-                except:
-                    headers_info = {}
+            try:
+                with profiling.span('headers'):
+                    headers_resp = fetch(url, 'headers', headers=HEADERS, timeout=5, origins=origins)
+                headers_info = dict(headers_resp.headers)
+            except Exception as e:
+                record_error('headers', e)
+                headers_info = {}
 
-                try:
-                    pages_data = crawl_future.result(timeout=30)
-                    files_data = files_future.result(timeout=15)
-                except concurrent.futures.TimeoutError:
-                    pages_data = []
-                    files_data = {}
-
-            # All URLs found
-            all_urls = set()
-            for page in pages_data:
-                all_urls.add(page['url'])
-                for link in page.get('links', {}).get('internal', []):
-                    if link.get('full_url'):
-                        all_urls.add(link['full_url'])
-
-            result = {
-                "mode": "advanced",
-                "extraction_summary": {
-                    "target_url": url,
-                    "total_pages_extracted": len(pages_data),
-                    "total_urls_found": len(all_urls),
-                    "total_files_found": len(files_data),
-                    "extraction_time": round(time.time() - start_time, 2)
-                },
-                "website_structure": {
-                    "pages": pages_data[:5],
-                    "all_urls": list(all_urls)[:100],
-                    "sitemap_urls": get_all_urls_from_sitemap(url)[:50]
-                },
-                "technical_data": {
-                    "headers": headers_info,
-                    "detected_files": files_data,
-                    "file_types_found": list(files_data.keys()),
-                    "technology_hints": pages_data[0]['technology_hints'] if pages_data else []
-                },
-                "content_analysis": {
-                    "total_forms": sum(len(page.get('forms', [])) for page in pages_data),
-                    "total_images": sum(len(page.get('images', [])) for page in pages_data),
-                    "total_scripts": sum(len(page.get('scripts', [])) for page in pages_data),
-                    "total_links": sum(page.get('links', {}).get('total', 0) for page in pages_data),
-                    "word_count": sum(page.get('word_count', 0) for page in pages_data)
-                },
-                "llm_ready_data": {
-                    "pages_count": len(pages_data),
-                    "forms_count": sum(len(page.get('forms', [])) for page in pages_data),
-                    "endpoints_found": len(all_urls),
-                    "technologies": pages_data[0]['technology_hints'] if pages_data else []
-                }
+            try:
+                pages_data = crawl_future.result(timeout=crawl_time + 10)
+            except concurrent.futures.TimeoutError as e:
+                record_error('advanced', e)
+                pages_data = []
+                cacheable = False  # partial result, don't reuse it
+            # A slow file probe degrades the scan; it doesn't throw away the crawl
+            try:
+                files_data = files_future.result(timeout=15)
+            except concurrent.futures.TimeoutError as e:
+                record_error('file_probe', e)
+                print(f"⚠️  File probes for {url} timed out; returning the crawl without detected files")
+                files_data = {}
+                cacheable = False
+
+        with profiling.span('get_all_urls_from_sitemap'):
+            sitemap_urls = get_all_urls_from_sitemap(url, origins)[:50]
+
+        # Only complete scans become diff baselines
+        if cacheable:
+            libraries = [f"{lib['name']} {lib['version']}" for lib in js_report.get('libraries', [])]
+            snapshots.put(snapshot.build(url, totals.url_list(), files_data, headers_info,
+                                         totals.technology_hints + libraries), scan_id)
+    
+        stored = None
+        if writer:
+            for info in files_data.values():
+                writer.add('files', info)
+            try:
+                counts = writer.close(complete=cacheable)
+                stored = dict(counts, expires_in=RESULTS_TTL,
+                              endpoints={kind: f"/scans/{scan_id}/{kind}" for kind in RESULT_KINDS})
+            except Exception as e:
+                record_error('results', e)
+                writer.abort()
+
+        result = {
+            "mode": "advanced",
+            "scan_id": scan_id,
+            "extraction_summary": {
+                "target_url": url,
+                "total_pages_extracted": totals.pages,
+                "total_urls_found": len(totals.urls),
+                "total_files_found": len(files_data),
+                "deduplication": crawl_stats,
+                "canonical_origins": origins.report(),
+                "crawl_priority": priority_report,
+                "extraction_time": round(time.time() - start_time, 2)
+            },
+            "stored_results": stored,
+            "website_structure": {
+                "pages": pages_data[:5],
+                "all_urls": totals.url_sample,
+                "url_templates": templates.inventory(),
+                "js_endpoints": js_report.get('endpoints', []),
+                "sitemap_urls": sitemap_urls
+            },
+            "technical_data": {
+                "headers": headers_info,
+                "detected_files": files_data,
+                "file_types_found": list(files_data.keys()),
+                "technology_hints": totals.technology_hints,
+                "javascript_analysis": {k: v for k, v in js_report.items() if k != 'endpoints'}
+            },
+            "content_analysis": {
+                "total_forms": totals.forms,
+                "total_images": totals.images,
+                "total_scripts": totals.scripts,
+                "total_links": totals.links,
+                "word_count": totals.words
+            },
+            "llm_ready_data": {
+                "pages_count": totals.pages,
+                "forms_count": totals.forms,
+                "endpoints_found": len(totals.urls),
+                "technologies": totals.technology_hints
             }
-            return jsonify(result)
+        }
+        return result, 200, cacheable
+    finally:
+        # Never leave a half-written results file behind, whatever went wrong
+        if writer and not writer.closed:
+            writer.abort()
 
-        else:
-            return jsonify({"error": "mode must be 'basic' or 'advanced'"}), 400
+@app.route('/snapshots/<scan_id>', methods=['GET'])
+def get_snapshot(scan_id):
+    """Structural snapshot of a completed advanced scan, usable as baseline_snapshot"""
+    snapshot = snapshots.get(scan_id)
+    if snapshot is None:
+        return jsonify({'error': f'Scan {scan_id} not found or expired'}), 404
+    return json_response(app, snapshot)
 
-    except Exception as e:
-        return jsonify({"error": str(e), "message": "Internal error"}), 500
+@app.route('/scans/<scan_id>', methods=['GET'])
+def get_scan(scan_id):
+    """Counts and expiry of a scan's stored results"""
+    meta = results.meta(scan_id) if results else None
+    if meta is None:
+        return jsonify({'error': f'Results for scan {scan_id} not found or expired'}), 404
+    meta['endpoints'] = {kind: f"/scans/{scan_id}/{kind}" for kind in RESULT_KINDS}
+    return jsonify(meta)
+
+@app.route('/scans/<scan_id>/<kind>', methods=['GET'])
+def get_scan_items(scan_id, kind):
+    """One page of a scan's stored pages, urls, forms or files: ?cursor=<next_cursor>&limit=N"""
+    if kind not in RESULT_KINDS:
+        return jsonify({'error': f"kind must be one of {', '.join(RESULT_KINDS)}"}), 404
+    try:
+        limit = max(1, min(int(request.args.get('limit', RESULTS_PAGE_SIZE)), RESULTS_MAX_PAGE_SIZE))
+        page = results.page(scan_id, kind, request.args.get('cursor'), limit) if results else None
+    except (InvalidCursor, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    if page is None:
+        return jsonify({'error': f'Results for scan {scan_id} not found or expired'}), 404
+    items, next_cursor = page
+    return json_response(app, {'scan_id': scan_id, 'kind': kind, 'items': items, 'next_cursor': next_cursor})
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -799,10 +1646,22 @@ def health_check():
         'status': 'healthy',
         'service': 'Deep Website Extractor',
         'version': '1.0',
+        'llm_client': llm_client.stats(),
+        'cache': cache.stats(),
+        'snapshots': snapshot_cache.stats(),
+        'in_flight': {'extract': extract_flight.in_flight(), 'llm': llm_flight.in_flight()},
+        'admission': admission.stats(),
+        'pools': {pool.name: pool.stats() for pool in (scan_pool, crawl_pool, file_probe_pool, llm_pool)},
+        'assets': assets.stats(),
+        'dns': fetcher.dns_stats(),
         'description': 'Extracts EVERYTHING from websites for LLM processing',
         'endpoints': {
             '/extract': 'POST - Extract website data',
             '/llm': 'POST - Send extracted data to LLM for pentesting analysis',
+            '/llm/stream': 'POST - Same as /llm, streamed as server-sent events',
+            '/snapshots/<scan_id>': 'GET - Structural snapshot of a scan, for diffs',
+            '/scans/<scan_id>/<kind>': 'GET - Stored pages, urls, forms or files of a scan, cursor-paginated',
+            '/metrics': 'GET - Prometheus metrics',
             '/health': 'GET - Health check'
         }
     })
@@ -822,3 +1681,41 @@ if __name__ == '__main__':
 # LLM Pentest Analysis:
 # curl -X POST http://127.0.0.1:6000/llm -H "Content-Type: application/json" -d "{\"website_url\":\"https://example.com\", \"mode\":\"basic\"}"
 # curl -X POST http://127.0.0.1:6000/llm -H "Content-Type: application/json" -d "{\"website_url\":\"https://example.com\", \"mode\":\"advanced\"}"
+
+# Timing tree and sampled CPU profile for one request (works on /extract and /llm):
+# curl -X POST http://127.0.0.1:6000/extract -H "Content-Type: application/json" -d "{\"website_url\":\"https://example.com\", \"profile\":true}"
+
+# Large crawl (disk-spilling frontier, Bloom-filter visited set; large_crawl is implied above 1000 pages):
+# curl -X POST http://127.0.0.1:6000/extract -H "Content-Type: application/json" -d "{\"website_url\":\"https://example.com\", \"max_pages\":50000, \"crawl_time\":1800}"
+
+# Skip the shared result cache (CACHE_BACKEND=sqlite|memory|none, CACHE_PATH, CACHE_MAX_MB):
+# curl -X POST http://127.0.0.1:6000/extract -H "Content-Type: application/json" -d "{\"website_url\":\"https://example.com\", \"cache\":false}"
+
+# Only what changed since an earlier advanced scan (its scan_id), or since a snapshot kept client-side
+# (baselines live in their own store: SNAPSHOT_PATH, SNAPSHOT_MAX_MB):
+# curl -X POST http://127.0.0.1:6000/extract -H "Content-Type: application/json" -d "{\"website_url\":\"https://example.com\", \"baseline\":\"<scan_id>\"}"
+# curl http://127.0.0.1:6000/snapshots/<scan_id> > baseline.json   # later: {"baseline_snapshot": <baseline.json>}
+
+# Page through everything a scan found (kind: pages | urls | forms | files), without crawling again:
+# curl "http://127.0.0.1:6000/scans/<scan_id>/pages?limit=20"
+# curl "http://127.0.0.1:6000/scans/<scan_id>/pages?limit=20&cursor=<next_cursor>"
+
+# Record every fetch to WARC, then re-run extraction offline from the archive (no network):
+# WARC_RECORD_DIR=warcs gunicorn app:app
+# WARC_REPLAY=warcs python batch_scan.py targets.txt --output replayed.ndjson
+
+# Offline batch scans without the server (NDJSON out, resumable):
+# python batch_scan.py targets.txt --output results.ndjson --processes 4 --concurrency 8
+
+# Force map-reduce analysis (auto-selected when the data exceeds LLM_MAX_PROMPT_CHARS):
+# curl -X POST http://127.0.0.1:6000/llm -H "Content-Type: application/json" -d "{\"website_url\":\"https://example.com\", \"mode\":\"advanced\", \"llm_mode\":\"map_reduce\"}"
+
+# Streamed LLM Pentest Analysis (server-sent events):
+# curl -N -X POST http://127.0.0.1:6000/llm/stream -H "Content-Type: application/json" -d "{\"website_url\":\"https://example.com\", \"mode\":\"basic\"}"
+
+# The LLM API key comes only from the environment:
+# POLLINATIONS_API_KEY=<key> python app.py
+
+# Local stand-in LLM (streams tokens, no API key needed):
+# python mock_llm.py --port 6100
+# POLLINATIONS_URL=http://127.0.0.1:6100/text python app.py
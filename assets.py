@@ -0,0 +1,123 @@
+"""
+Content-addressed store for per-asset analysis results, shared across scans.
+
+Analyses (not bodies) are kept in the shared cache under two keys:
+
+  asset-url  URL -> (body digest, response metadata), for url_ttl seconds
+  asset      sha256 of the body -> analysis result, for content_ttl seconds
+
+The URL mapping is only kept, and only trusted, for assets whose URL pins
+their content: fingerprinted file names (app.3f9a1c2e.js), responses sent
+with Cache-Control: immutable, and third-party (CDN) assets when the caller
+says so. A first-party app.js redeployed at the same URL is always fetched
+again, so a changed bundle is never reported from a stale analysis.
+
+A scan that references a known, pinned URL skips both the download and the
+analysis. An unknown URL whose body hashes to a known digest (the same
+jQuery build served from another CDN path, a vendored copy on the target)
+is downloaded but not analysed again. Concurrent lookups of the same URL
+within a process share one fetch. Hits and misses are counted per process,
+per scan (AssetStats) and as metrics.
+"""
+import hashlib, re, threading
+from urllib.parse import urlsplit
+
+import metrics
+from singleflight import SingleFlight
+
+ASSET_LOOKUPS = metrics.Counter('extractor_asset_lookups_total',
+                                'Asset analyses by how they were satisfied', ['result'])
+ASSET_BYTES_SAVED = metrics.Counter('extractor_asset_bytes_saved_total',
+                                    'Asset bytes not downloaded because the URL was already known')
+
+RESULTS = ('url_hit', 'content_hit', 'miss', 'uncacheable')
+
+# A build hash in the file name: at least 8 letters/digits, with a digit
+FINGERPRINT = re.compile(r'[.\-_](?=[A-Za-z0-9]*\d)[A-Za-z0-9]{8,}\.[A-Za-z0-9]+$')
+
+def fingerprinted(url):
+    """True when the asset's file name carries a content hash, so the URL changes with the content"""
+    return bool(FINGERPRINT.search(urlsplit(url).path))
+
+class AssetStats:
+    """Lookup outcomes for one scan (or the whole process)"""
+
+    def __init__(self):
+        self.counts = dict.fromkeys(RESULTS, 0)
+        self.bytes_saved = 0
+        self.lock = threading.Lock()
+
+    def add(self, result, bytes_saved=0):
+        with self.lock:
+            self.counts[result] += 1
+            self.bytes_saved += bytes_saved
+
+    def to_dict(self):
+        with self.lock:
+            lookups = sum(self.counts.values())
+            hits = self.counts['url_hit'] + self.counts['content_hit']
+            return dict(self.counts, bytes_saved=self.bytes_saved,
+                        hit_rate=round(hits / lookups, 3) if lookups else 0.0)
+
+class AssetStore:
+    def __init__(self, cache, url_ttl=3600, content_ttl=7 * 24 * 3600):
+        self.cache = cache
+        self.url_ttl = url_ttl
+        self.content_ttl = content_ttl
+        self.flight = SingleFlight('asset')
+        self.totals = AssetStats()
+
+    def analyze(self, url, fetch, analyze, scan_stats=None, third_party=False):
+        """Return (analysis, meta, result) for the asset at url
+
+        fetch(url) -> (chunks, meta), chunks being the body as a list of str
+        (None when the response must not be stored); meta is a small dict
+        that should include 'bytes' and 'immutable' (Cache-Control: immutable).
+        analyze(chunks) -> analysis. third_party lets the URL mapping be used
+        for an asset that is not fingerprinted.
+        """
+        pinned = third_party or fingerprinted(url)
+        (analysis, meta, result), shared = self.flight.do(
+            (url, pinned), lambda: self._analyze(url, fetch, analyze, pinned))
+        if shared and result != 'uncacheable':
+            result = 'url_hit'   # another scan fetched it a moment ago
+        self._count(result, meta, scan_stats)
+        return analysis, meta, result
+
+    def _analyze(self, url, fetch, analyze, pinned):
+        entry = self.cache.get('asset-url', url)
+        if entry is not None and (pinned or entry[1].get('immutable')):
+            digest, meta = entry
+            analysis = self.cache.get('asset', digest)
+            if analysis is not None:
+                return analysis, meta, 'url_hit'
+
+        chunks, meta = fetch(url)
+        if chunks is None:
+            return None, meta, 'uncacheable'
+        digest = hashlib.sha256()
+        for chunk in chunks:
+            digest.update(chunk.encode('utf-8', 'surrogatepass'))
+        digest = digest.hexdigest()
+
+        analysis = self.cache.get('asset', digest)
+        result = 'content_hit'
+        if analysis is None:
+            analysis = analyze(chunks)
+            result = 'miss'
+            self.cache.set('asset', digest, value=analysis, ttl=self.content_ttl)
+        if pinned or meta.get('immutable'):
+            self.cache.set('asset-url', url, value=(digest, meta), ttl=self.url_ttl)
+        return analysis, meta, result
+
+    def _count(self, result, meta, scan_stats):
+        saved = meta.get('bytes', 0) if result == 'url_hit' else 0
+        ASSET_LOOKUPS.inc(result=result)
+        if saved:
+            ASSET_BYTES_SAVED.inc(saved)
+        self.totals.add(result, saved)
+        if scan_stats is not None:
+            scan_stats.add(result, saved)
+
+    def stats(self):
+        return self.totals.to_dict()
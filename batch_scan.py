@@ -0,0 +1,182 @@
+"""
+Headless batch scanner: run /extract scans over a list of targets without
+the Flask server.
+
+Targets (one URL per line, '#' comments allowed) are read from a file or
+stdin and spread over --processes worker processes. Each worker imports
+app.py once and scans --concurrency targets at a time on threads, so it runs
+the same scan_target / deep_crawl / scan_all_files / extract_all_data code
+as the server, with the same pools, connection cap and caches, but without
+admission control or the result cache. One NDJSON record per target is
+written to stdout or --output as soon as the target finishes:
+
+    {"target": ..., "status": "ok" | "error", "http_status": ..., "elapsed": ..., "result": {...}}
+
+With --output, targets that already have a record in the file are skipped,
+so an interrupted batch resumes where it stopped (--retry-errors scans
+failed targets again). Throughput is reported on stderr.
+
+    python batch_scan.py targets.txt --output results.ndjson --processes 4 --concurrency 8
+    cat targets.txt | python batch_scan.py - --mode basic > results.ndjson
+"""
+import argparse, json, multiprocessing, os, queue, sys, time
+
+def read_targets(source):
+    stream = sys.stdin if source == '-' else open(source, encoding='utf-8')
+    try:
+        targets = []
+        for line in stream:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if not line.startswith(('http://', 'https://')):
+                line = 'https://' + line
+            targets.append(line)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return list(dict.fromkeys(targets))
+
+def completed_targets(path, retry_errors=False):
+    """Targets that already have a record in an earlier output file"""
+    done = set()
+    if not path or not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a record cut short by the interruption
+            if record.get('status') == 'ok' or not retry_errors:
+                done.add(record.get('target'))
+    return done
+
+def open_output(path):
+    if not path:
+        return sys.stdout
+    # Start on a fresh line if the last run died mid-record
+    if os.path.exists(path) and os.path.getsize(path):
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            partial = f.read(1) != b'\n'
+        out = open(path, 'a', encoding='utf-8')
+        if partial:
+            out.write('\n')
+        return out
+    return open(path, 'w', encoding='utf-8')
+
+def worker(tasks, results, options):
+    """Worker process: scan targets from `tasks` on options['concurrency'] threads"""
+    import threading
+
+    # Scan logs must not end up in the NDJSON stream
+    sys.stdout = open(os.devnull, 'w') if options['quiet'] else sys.stderr
+    os.environ.setdefault('MAX_CONCURRENT_SCANS', str(options['concurrency']))
+    os.environ.setdefault('RESULTS_TTL', '0')
+    import app
+    from records import json_default
+
+    scan_options = (options['max_pages'], options['large'], options['crawl_time'], options['template_samples'])
+
+    def scan(target):
+        start = time.time()
+        try:
+            payload, status, _ = app.scan_target(target, options['mode'], scan_options, start)
+            record = {'target': target, 'status': 'ok' if status == 200 else 'error', 'http_status': status}
+        except Exception as e:
+            app.record_error('batch', e)
+            payload = {'error': str(e)}
+            record = {'target': target, 'status': 'error', 'http_status': None}
+        record.update(elapsed=round(time.time() - start, 3), result=payload)
+        pages = (payload.get('extraction_summary') or {}).get('total_pages_extracted', 0)
+        return json.dumps(record, default=json_default, separators=(',', ':')), record['status'], pages
+
+    def loop():
+        while True:
+            target = tasks.get()
+            if target is None:
+                return
+            results.put(scan(target))
+
+    threads = [threading.Thread(target=loop) for _ in range(options['concurrency'])]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+def report(label, done, ok, pages, elapsed):
+    rate = done / elapsed if elapsed else 0
+    print(f"⏱️  {label}: {done} targets ({ok} ok, {done - ok} errors) in {elapsed:.1f}s, "
+          f"{rate:.2f} targets/s, {pages / elapsed if elapsed else 0:.1f} pages/s", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description='Scan many targets offline, one NDJSON record per target')
+    parser.add_argument('targets', help="file with one URL per line, or '-' for stdin")
+    parser.add_argument('--output', '-o', help='NDJSON file to append to (default: stdout); enables resume')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--concurrency', type=int, default=4, help='targets scanned at once per process')
+    parser.add_argument('--mode', choices=('basic', 'advanced'), default='advanced')
+    parser.add_argument('--max-pages', type=int, default=30)
+    parser.add_argument('--crawl-time', type=float, default=20)
+    parser.add_argument('--large', action='store_true', help='disk-spilling frontier for big crawls')
+    parser.add_argument('--template-samples', type=int, default=5, help='URLs crawled per route template (0 = no cap)')
+    parser.add_argument('--retry-errors', action='store_true', help='on resume, scan failed targets again')
+    parser.add_argument('--quiet', action='store_true', help='silence per-scan logs')
+    args = parser.parse_args()
+
+    targets = read_targets(args.targets)
+    done_before = completed_targets(args.output, args.retry_errors)
+    pending = [t for t in targets if t not in done_before]
+    print(f"🎯 {len(targets)} targets, {len(targets) - len(pending)} already done, {len(pending)} to scan",
+          file=sys.stderr)
+    if not pending:
+        return
+
+    options = dict(mode=args.mode, max_pages=args.max_pages, crawl_time=args.crawl_time, large=args.large,
+                   template_samples=args.template_samples, concurrency=max(1, args.concurrency),
+                   quiet=args.quiet)
+    processes = max(1, min(args.processes, (len(pending) + options['concurrency'] - 1) // options['concurrency']))
+    tasks, results = multiprocessing.Queue(), multiprocessing.Queue()
+    for target in pending:
+        tasks.put(target)
+    for _ in range(processes * options['concurrency']):
+        tasks.put(None)
+    workers = [multiprocessing.Process(target=worker, args=(tasks, results, options), daemon=True)
+               for _ in range(processes)]
+    for p in workers:
+        p.start()
+
+    out = open_output(args.output)
+    start = time.time()
+    done = ok = pages = 0
+    last_report = start
+    try:
+        while done < len(pending):
+            try:
+                line, status, scanned = results.get(timeout=1)
+            except queue.Empty:
+                if not any(p.is_alive() for p in workers):
+                    print("❌ All workers exited before the batch finished", file=sys.stderr)
+                    break
+                continue
+            out.write(line + '\n')
+            out.flush()
+            done += 1
+            ok += status == 'ok'
+            pages += scanned or 0
+            if time.time() - last_report >= 10:
+                last_report = time.time()
+                report(f"{done}/{len(pending)}", done, ok, pages, last_report - start)
+    except KeyboardInterrupt:
+        print("🛑 Interrupted; re-run with the same --output to resume", file=sys.stderr)
+    finally:
+        for p in workers:
+            if p.is_alive():
+                p.terminate()
+        if out is not sys.stdout:
+            out.close()
+    report('batch', done, ok, pages, time.time() - start)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Cross-process cache benchmark: hit rate and hit latency per backend.
+
+Simulates gunicorn workers: --processes worker processes each serve
+--requests lookups drawn from one shared key space. A miss "computes" the
+value (sleeps --compute-ms) and stores it. With the per-process memory
+backend every worker has to warm its own copy; with the sqlite backend a
+value stored by one worker is a hit in all of them.
+
+    python bench/cache_bench.py --processes 4 --keys 200 --requests 2000 --value-kb 20
+"""
+import argparse, json, multiprocessing, os, random, sys, tempfile, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cache import make_cache
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+def worker(backend, path, args, seed, out):
+    cache = make_cache(backend, path, max_bytes=args.max_mb * 1024 * 1024)
+    rng = random.Random(seed)
+    value = {'payload': 'x' * (args.value_kb * 1024)}
+    hits, misses, hit_latency = 0, 0, []
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        key = rng.randrange(args.keys)
+        t = time.perf_counter()
+        cached = cache.get('bench', key)
+        elapsed = time.perf_counter() - t
+        if cached is not None:
+            hits += 1
+            hit_latency.append(elapsed)
+        else:
+            misses += 1
+            time.sleep(args.compute_ms / 1000.0)
+            cache.set('bench', key, value=value)
+    out.put({'hits': hits, 'misses': misses, 'hit_latency': hit_latency,
+             'seconds': time.perf_counter() - start})
+
+def run_backend(backend, args):
+    tmpdir = tempfile.mkdtemp(prefix='cache-bench-')
+    path = os.path.join(tmpdir, 'cache.sqlite3')
+    if backend == 'sqlite':
+        make_cache(backend, path)  # create the schema before workers race for it
+    out = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=worker, args=(backend, path, args, seed, out))
+             for seed in range(args.processes)]
+    for p in procs:
+        p.start()
+    results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    hits = sum(r['hits'] for r in results)
+    total = hits + sum(r['misses'] for r in results)
+    latency = [s for r in results for s in r['hit_latency']]
+    wall = max(r['seconds'] for r in results)
+    return {
+        'processes': args.processes,
+        'hit_rate': round(hits / total, 4) if total else 0,
+        'hit_latency_p50_us': round(percentile(latency, 0.50) * 1e6, 1),
+        'hit_latency_p99_us': round(percentile(latency, 0.99) * 1e6, 1),
+        'requests_per_sec': round(total / wall, 1) if wall else 0
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Cross-process cache benchmark')
+    parser.add_argument('--backends', default='memory,sqlite')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--keys', type=int, default=200, help='distinct keys in the shared key space')
+    parser.add_argument('--requests', type=int, default=2000, help='lookups per process')
+    parser.add_argument('--value-kb', type=int, default=20)
+    parser.add_argument('--compute-ms', type=float, default=5, help='cost of a miss')
+    parser.add_argument('--max-mb', type=int, default=256)
+    parser.add_argument('--output', help='write results as JSON')
+    args = parser.parse_args()
+
+    results = {}
+    for backend in args.backends.split(','):
+        results[backend] = result = run_backend(backend.strip(), args)
+        print(f"⏱️  {backend}: hit rate {result['hit_rate']:.1%}, hit p50 {result['hit_latency_p50_us']}µs, "
+              f"p99 {result['hit_latency_p99_us']}µs, {result['requests_per_sec']} req/s "
+              f"across {result['processes']} processes")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+        print(f"📝 Wrote {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""
+End-to-end crawl benchmark for /extract against a synthetic local site.
+
+Starts bench/synthetic_site.py in a subprocess (so its CPU and memory are not
+counted), drives /extract in-process through the Flask test client, and
+records pages/sec, p50/p99 latency, peak RSS and peak thread count per mode.
+Results are written as JSON; --compare flags regressions against a previous
+run.
+
+    python bench/crawl_bench.py --pages 300 --latency-ms 10 --iterations 5 --output bench_results.json
+    python bench/crawl_bench.py --compare bench_results.json
+"""
+import argparse, contextlib, io, json, os, platform, resource, socket, statistics
+import subprocess, sys, threading, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_site import add_site_arguments, site_options
+
+# Metrics where a higher number is worse
+LOWER_IS_BETTER = ('latency_p50', 'latency_p99', 'peak_rss_mb', 'peak_threads')
+HIGHER_IS_BETTER = ('pages_per_sec',)
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_site_process(options):
+    port = free_port()
+    cmd = [sys.executable, os.path.join(ROOT, 'bench', 'synthetic_site.py'), '--port', str(port)]
+    for key, value in options.items():
+        flag = '--' + key.replace('_', '-')
+        if isinstance(value, bool):
+            if value:
+                cmd.append(flag)
+        else:
+            cmd += [flag, str(value)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return proc, f"http://127.0.0.1:{port}/"
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError('synthetic site did not start')
+
+def current_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0
+
+class PeakSampler:
+    """Poll RSS and live thread count in the background, keeping the peaks"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak_rss_mb = 0.0
+        self.peak_threads = 0
+        self.stop = threading.Event()
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+        return False
+
+    def run(self):
+        while not self.stop.is_set():
+            self.peak_rss_mb = max(self.peak_rss_mb, current_rss_mb())
+            # Minus this sampler thread
+            self.peak_threads = max(self.peak_threads, threading.active_count() - 1)
+            self.stop.wait(self.interval)
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+def run_mode(client, target, mode, iterations, warmup):
+    latencies = []
+    pages = 0
+    errors = 0
+    for i in range(warmup + iterations):
+        start = time.perf_counter()
+        # Every synthetic page is /page/{id}; lift the per-template cap so the
+        # benchmark keeps measuring raw crawl throughput. Skip the result cache:
+        # a HIT would time a cache lookup, not a crawl
+        with contextlib.redirect_stdout(io.StringIO()):
+            response = client.post('/extract', json={'website_url': target, 'mode': mode,
+                                                      'template_samples': 0, 'cache': False})
+        elapsed = time.perf_counter() - start
+        if response.headers.get('X-Cache') == 'HIT':
+            raise RuntimeError(f"{mode} iteration {i} was served from the result cache")
+        if i < warmup:
+            continue
+        latencies.append(elapsed)
+        payload = response.get_json(silent=True) or {}
+        if response.status_code != 200 or 'error' in payload:
+            errors += 1
+        elif mode == 'advanced':
+            pages += payload.get('extraction_summary', {}).get('total_pages_extracted', 0)
+        else:
+            pages += 1
+    total = sum(latencies) or 1e-9
+    return {
+        'iterations': iterations,
+        'errors': errors,
+        'pages': pages,
+        'pages_per_sec': round(pages / total, 2),
+        'latency_mean': round(statistics.mean(latencies), 4) if latencies else 0,
+        'latency_p50': round(percentile(latencies, 0.50), 4),
+        'latency_p99': round(percentile(latencies, 0.99), 4)
+    }
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def compare(current, baseline, tolerance):
+    """Return human-readable regressions of current vs baseline beyond tolerance"""
+    regressions = []
+    for mode, result in current['results'].items():
+        before = baseline.get('results', {}).get(mode)
+        if not before:
+            continue
+        for key in LOWER_IS_BETTER:
+            if before.get(key) and result[key] > before[key] * (1 + tolerance):
+                regressions.append(f"{mode}.{key}: {before[key]} -> {result[key]}")
+        for key in HIGHER_IS_BETTER:
+            if before.get(key) and result[key] < before[key] * (1 - tolerance):
+                regressions.append(f"{mode}.{key}: {before[key]} -> {result[key]}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end /extract crawl benchmark')
+    add_site_arguments(parser)
+    parser.add_argument('--modes', default='basic,advanced')
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help='previous results JSON to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression')
+    args = parser.parse_args()
+
+    import app
+
+    options = site_options(args)
+    proc, target = start_site_process(options)
+    client = app.app.test_client()
+    results = {}
+    try:
+        for mode in [m.strip() for m in args.modes.split(',') if m.strip()]:
+            with PeakSampler() as sampler:
+                result = run_mode(client, target, mode, args.iterations, args.warmup)
+            result['peak_rss_mb'] = round(sampler.peak_rss_mb, 1)
+            result['peak_threads'] = sampler.peak_threads
+            results[mode] = result
+            print(f"⏱️  {mode}: {result['pages_per_sec']} pages/s, p50 {result['latency_p50']}s, "
+                  f"p99 {result['latency_p99']}s, peak RSS {result['peak_rss_mb']} MB, "
+                  f"peak threads {result['peak_threads']}")
+    finally:
+        proc.kill()
+        proc.wait()
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'site': options,
+        'results': results
+    }
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        report['regressions'] = regressions
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"📝 Wrote {args.output}")
+
+    for line in regressions:
+        print(f"❌ Regression {line}")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
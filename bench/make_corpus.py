@@ -0,0 +1,109 @@
+"""
+Regenerate the pinned micro-benchmark corpus in bench/corpus/.
+
+The output is deterministic; the generated files are committed so the
+benchmark inputs never drift between versions. Only re-run this when the
+corpus itself is meant to change (and refresh the baseline afterwards).
+
+    python bench/make_corpus.py
+"""
+import os, random
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+WORDS = ("account admin api login search product order cart profile upload report invoice "
+         "settings billing support contact blog news docs help team security password token "
+         "session customer payment shipping review rating dashboard analytics").split()
+
+def words(rng, n):
+    return ' '.join(rng.choice(WORDS) for _ in range(n))
+
+def head(title, extra=''):
+    return ('<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">'
+            f'<title>{title}</title>'
+            '<meta name="description" content="Benchmark corpus page">'
+            '<meta name="keywords" content="bench,corpus">'
+            '<meta property="og:title" content="Corpus"><meta name="twitter:card" content="summary">'
+            '<meta name="generator" content="WordPress 6.4">'
+            f'{extra}</head>')
+
+def tiny(rng):
+    return head('Tiny') + '<body><h1>Hello</h1><p>Small page.</p><a href="/about">About</a></body></html>'
+
+def huge(rng):
+    parts = [head('Huge'), '<body>']
+    for section in range(180):
+        parts.append(f'<section id="s{section}"><h2>{words(rng, 5)}</h2>')
+        for _ in range(4):
+            parts.append(f'<p>{words(rng, 60)}</p>')
+        parts.append('<ul>' + ''.join(
+            f'<li><a href="/{rng.choice(WORDS)}/{rng.randrange(10000)}?ref={rng.choice(WORDS)}">{words(rng, 2)}</a></li>'
+            for _ in range(6)) + '</ul>')
+        parts.append(f'<img src="/img/{section}.png" alt="{words(rng, 3)}" width="100" height="80">')
+        parts.append('</section>')
+    parts.append('<a href="https://cdn.example.org/lib.js">cdn</a></body></html>')
+    return ''.join(parts)
+
+def form_heavy(rng):
+    parts = [head('Forms'), '<body>']
+    for f in range(40):
+        parts.append(f'<form id="f{f}" action="/{rng.choice(WORDS)}/submit" method="{rng.choice(["get", "post"])}" enctype="multipart/form-data">')
+        for i in range(12):
+            kind = rng.choice(['text', 'email', 'password', 'hidden', 'file', 'checkbox', 'number'])
+            parts.append(f'<label for="f{f}i{i}">{words(rng, 2)}</label>'
+                         f'<input id="f{f}i{i}" type="{kind}" name="{rng.choice(WORDS)}_{i}" '
+                         f'placeholder="{words(rng, 2)}" maxlength="64" required>')
+        parts.append('<select name="choice">' + ''.join(
+            f'<option value="{o}">{words(rng, 2)}</option>' for o in range(15)) + '</select>')
+        parts.append('<textarea name="notes"></textarea><button type="submit" name="go" value="1">Send</button></form>')
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+def script_heavy(rng):
+    scripts = ''.join(f'<script src="/static/js/chunk.{i}.{rng.randrange(1 << 32):08x}.js" defer></script>' for i in range(60))
+    inline = ''.join(
+        '<script>window.__STATE_%d__ = {"api": "/api/v1/%s", "react": true, "vue": false, "items": [%s]};</script>'
+        % (i, rng.choice(WORDS), ','.join(str(rng.randrange(1000)) for _ in range(200)))
+        for i in range(40))
+    ld = '<script type="application/ld+json">{"@context": "https://schema.org", "@type": "Organization", "name": "Corpus"}</script>'
+    return head('Scripts', scripts + ld) + f'<body><div id="root" data-url="/api/v1/bootstrap">{inline}</div>' \
+        '<script src="https://code.jquery.com/jquery-3.7.1.min.js"></script></body></html>'
+
+def table_heavy(rng):
+    parts = [head('Tables'), '<body>']
+    for t in range(30):
+        parts.append(f'<table id="t{t}"><caption>{words(rng, 4)}</caption><tr>' +
+                     ''.join(f'<th>{rng.choice(WORDS)}</th>' for _ in range(8)) + '</tr>')
+        for _ in range(40):
+            parts.append('<tr>' + ''.join(f'<td>{words(rng, 2)}</td>' for _ in range(8)) + '</tr>')
+        parts.append('</table>')
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+def malformed(rng):
+    parts = ['<html><head><title>Broken<title><meta name=description content=unquoted>',
+             '<body><div><p>unclosed <b>bold <i>italic</div>']
+    for i in range(300):
+        parts.append(f'<a href=/path/{i}>link {i}<a href="/q?x={i}&y=<{i}>">'
+                     f'<form action=/post{i}><input name=x{i} <input name="y{i}"></form>'
+                     f'<!-- comment {i} --><td>stray cell</tr>&notanentity; &#xZZ;')
+    parts.append('<script>var x = "</scr" + "ipt>";</script><img src="data:image/png;base64,AAAA">')
+    return ''.join(parts)
+
+CORPUS = {
+    'tiny': tiny,
+    'huge': huge,
+    'form_heavy': form_heavy,
+    'script_heavy': script_heavy,
+    'table_heavy': table_heavy,
+    'malformed': malformed
+}
+
+if __name__ == '__main__':
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+    for name, build in CORPUS.items():
+        html = build(random.Random(name))
+        path = os.path.join(CORPUS_DIR, f'{name}.html')
+        with open(path, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(html)
+        print(f"📄 {path} ({len(html)} bytes)")
@@ -0,0 +1,255 @@
+"""
+Per-function micro-benchmarks over the pinned corpus in bench/corpus/.
+
+Times extract_all_data, extract_all_links, detect_tech_hints,
+get_most_common_words and normalize_url in isolation for every corpus page,
+reporting ops/sec (best of --repeat rounds) and allocations per call
+(tracemalloc peak bytes and block count). Results are compared with a stored
+baseline and the run fails when a function regresses beyond the threshold.
+
+Absolute ops/sec depend on the machine and drift with its load, so a fixed
+pure-Python reference workload is timed in rounds interleaved with every
+case's rounds, and throughput is compared as a ratio to it ('relative' in the results). A
+baseline recorded on a faster, slower or busier host stays comparable; a
+baseline without ratios is compared on ops/sec.
+
+--against <git ref> skips the stored baseline and measures that revision in
+the same run instead: its app runs in a helper process, and each case
+alternates timing rounds between the two trees, so both see the same host.
+This is the comparison to gate a change on.
+
+    python bench/micro_bench.py --against main       # compare with main, measured alongside
+    python bench/micro_bench.py                      # compare with bench/micro_baseline.json
+    python bench/micro_bench.py --update-baseline    # record a new baseline
+    python bench/micro_bench.py --only extract_all_data --threshold 0.1
+"""
+import argparse, contextlib, io, json, os, re, shutil, subprocess, sys, tempfile, time, tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT, 'bench')
+
+CORPUS_DIR = os.path.join(BENCH_DIR, 'corpus')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'micro_baseline.json')
+BASE_URL = 'https://bench.example.com/section/page.html'
+HEADERS = {'Server': 'nginx/1.25', 'Content-Type': 'text/html; charset=utf-8'}
+
+HREF = re.compile(r'(?:href|src|action)=[\'"]?([^\'" >]+)', re.IGNORECASE)
+
+REFERENCE_TEXT = ' '.join(f'word{i % 97} <a href="/p/{i}">item {i}</a>' for i in range(2000))
+
+def reference_workload():
+    """Regex, dict and JSON work of the same flavour as extraction, independent of app code"""
+    counts = {}
+    for word in re.findall(r'\w+', REFERENCE_TEXT):
+        counts[word] = counts.get(word, 0) + 1
+    return json.loads(json.dumps(sorted(counts.items())))
+
+def load_corpus():
+    corpus = {}
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        if name.endswith('.html'):
+            with open(os.path.join(CORPUS_DIR, name), encoding='utf-8') as f:
+                corpus[name[:-5]] = f.read()
+    return corpus
+
+def build_cases(app, corpus):
+    """Return {function: {page: zero-arg callable}}"""
+    from bs4 import BeautifulSoup
+
+    cases = {name: {} for name in ('extract_all_data', 'extract_all_links', 'detect_tech_hints',
+                                   'get_most_common_words', 'normalize_url')}
+    for page, html in corpus.items():
+        text = BeautifulSoup(html, 'html.parser').get_text()
+        hrefs = HREF.findall(html) or ['/']
+
+        cases['extract_all_data'][page] = lambda html=html: app.extract_all_data(BASE_URL, html, HEADERS)
+        cases['extract_all_links'][page] = lambda html=html: app.extract_all_links(html, BASE_URL, 'example')
+        cases['detect_tech_hints'][page] = lambda html=html: app.detect_tech_hints(html, HEADERS)
+        cases['get_most_common_words'][page] = lambda text=text: app.get_most_common_words(text, 20)
+        cases['normalize_url'][page] = lambda hrefs=hrefs: [app.normalize_url(BASE_URL, h) for h in hrefs]
+    return cases
+
+def time_call(fn, min_time, repeat):
+    """Best ops/sec over `repeat` rounds of at least `min_time` seconds each"""
+    fn()  # warm caches
+    best = 0.0
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < min_time:
+            fn()
+            calls += 1
+            elapsed = time.perf_counter() - start
+        best = max(best, calls / elapsed)
+    return best
+
+def measure_allocations(fn):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        del result
+    finally:
+        tracemalloc.stop()
+    blocks = sum(max(0, stat.count_diff) for stat in after.compare_to(before, 'filename'))
+    return peak, blocks
+
+def load_app(root):
+    sys.path.insert(0, root)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+    return app
+
+class OtherTree:
+    """The same cases against another git revision, timed round by round in a helper process"""
+
+    def __init__(self, ref, min_time):
+        self.tmpdir = tempfile.mkdtemp(prefix='micro-bench-')
+        archive = subprocess.run(['git', '-C', ROOT, 'archive', ref], check=True, capture_output=True).stdout
+        subprocess.run(['tar', '-x', '-C', self.tmpdir], input=archive, check=True)
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--serve', self.tmpdir, '--min-time', str(min_time)],
+            cwd=self.tmpdir, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+
+    def __call__(self, func, page):
+        self.process.stdin.write(json.dumps([func, page]) + '\n')
+        self.process.stdin.flush()
+        return json.loads(self.process.stdout.readline())
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+def serve(root, min_time):
+    """Helper-process side of OtherTree: one timing round per request line"""
+    out = sys.stdout
+    cases = build_cases(load_app(root), load_corpus())
+    for line in sys.stdin:
+        func, page = json.loads(line)
+        with contextlib.redirect_stdout(io.StringIO()):
+            ops = time_call(cases[func][page], min_time, 1)
+        out.write(json.dumps(ops) + '\n')
+        out.flush()
+
+def run(cases, min_time, repeat, other=None):
+    """Time every case; 'relative' is ops/sec over the reference workload, or over `other` when given"""
+    results = {}
+    for func, pages in cases.items():
+        results[func] = {}
+        for page, fn in pages.items():
+            with contextlib.redirect_stdout(io.StringIO()):
+                # Alternate rounds so both sides see the same host speed
+                ops = reference = 0.0
+                for _ in range(repeat):
+                    reference = max(reference, other(func, page) if other else
+                                    time_call(reference_workload, min_time, 1))
+                    ops = max(ops, time_call(fn, min_time, 1))
+                peak, blocks = measure_allocations(fn)
+            results[func][page] = {
+                'ops_per_sec': round(ops, 2),
+                'relative': round(ops / reference, 6),
+                'alloc_peak_bytes': peak,
+                'alloc_blocks': blocks
+            }
+            if other:
+                results[func][page]['against_ops_per_sec'] = round(reference, 2)
+            print(f"  {func:<22} {page:<13} {ops:>12.1f} ops/s  {peak / 1024:>9.1f} KiB peak  {blocks:>7} blocks"
+                  + (f"  ({ops / reference - 1:+.0%} vs other tree)" if other else ''))
+    return results
+
+def find_regressions(results, baseline, default_threshold):
+    thresholds = baseline.get('thresholds', {})
+    regressions = []
+    for func, pages in results.items():
+        limit = thresholds.get(func, default_threshold)
+        for page, result in pages.items():
+            before = baseline.get('results', {}).get(func, {}).get(page)
+            if not before or not before.get('ops_per_sec'):
+                continue
+            # Reference-relative when both sides have it, so host speed cancels out
+            metric = 'relative' if before.get('relative') and result.get('relative') else 'ops_per_sec'
+            drop = 1 - result[metric] / before[metric]
+            if drop > limit:
+                regressions.append(f"{func}[{page}]: {before['ops_per_sec']} -> {result['ops_per_sec']} ops/s "
+                                   f"(-{drop:.0%} {metric}, limit {limit:.0%})")
+    return regressions
+
+def report(regressions):
+    for line in regressions:
+        print(f"❌ Regression {line}")
+    if not regressions:
+        print("✅ No regressions beyond threshold")
+    return 1 if regressions else 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Extraction micro-benchmarks')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed ops/sec drop vs baseline (per-function overrides in the baseline file)')
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds per timing round')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', help='comma-separated function names')
+    parser.add_argument('--output', help='also write this run as JSON')
+    parser.add_argument('--against', metavar='REF', help='measure this git revision alongside instead of the baseline')
+    parser.add_argument('--serve', metavar='ROOT', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.min_time)
+        return 0
+
+    cases = build_cases(load_app(ROOT), load_corpus())
+    if args.only:
+        wanted = {name.strip() for name in args.only.split(',')}
+        cases = {name: pages for name, pages in cases.items() if name in wanted}
+
+    print("⏱️  Micro-benchmarks" + (f" against {args.against}" if args.against else ''))
+    other = OtherTree(args.against, args.min_time) if args.against else None
+    try:
+        results = run(cases, args.min_time, args.repeat, other)
+    finally:
+        if other:
+            other.close()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'results': results}, f, indent=2)
+
+    if other:
+        # The other tree is the baseline, with ratio 1 for every case
+        baseline = {'results': {func: {page: {'ops_per_sec': result['against_ops_per_sec'], 'relative': 1.0}
+                                       for page, result in pages.items()}
+                                for func, pages in results.items()}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline['thresholds'] = json.load(f).get('thresholds', {})
+        return report(find_regressions(results, baseline, args.threshold))
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.setdefault('thresholds', {})
+        baseline.setdefault('results', {}).update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"📝 Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️  No baseline at {args.baseline}; run with --update-baseline first")
+        return 0
+
+    with open(args.baseline) as f:
+        return report(find_regressions(results, json.load(f), args.threshold))
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Concurrent /extract load: requests/sec, latency and thread churn.
+
+Runs --clients client threads that each issue advanced /extract requests
+(cache off, never coalesced) against a synthetic site for --requests rounds,
+and reports requests/sec, p50/p99 latency, peak live threads and how many
+threads were started during the run. --app-dir imports app.py from another
+checkout, so the shared pools can be compared with the per-request pools of
+an earlier revision:
+
+    git worktree add /tmp/before <rev>
+    python bench/pool_bench.py --clients 8 --app-dir /tmp/before --output before.json
+    python bench/pool_bench.py --clients 8 --output after.json
+"""
+import argparse, contextlib, io, itertools, json, os, statistics, sys, threading, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from crawl_bench import PeakSampler, git_revision, percentile, start_site_process
+from synthetic_site import add_site_arguments, site_options
+
+def count_thread_starts():
+    """Patch Thread.start to count every thread started from now on"""
+    counter = {'started': 0}
+    original = threading.Thread.start
+    lock = threading.Lock()
+
+    def start(self):
+        with lock:
+            counter['started'] += 1
+        return original(self)
+
+    threading.Thread.start = start
+    return counter
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent /extract throughput and thread churn')
+    add_site_arguments(parser)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=5, help='requests per client')
+    parser.add_argument('--max-pages', type=int, default=30)
+    parser.add_argument('--app-dir', default=ROOT, help='checkout to import app.py from')
+    parser.add_argument('--output', help='write results as JSON')
+    args = parser.parse_args()
+
+    # Measure the pools, not admission control, caching or coalescing
+    os.environ.update(CACHE_BACKEND='none', MAX_CONCURRENT_SCANS=str(args.clients),
+                      SCAN_QUEUE_SIZE=str(args.clients * 2))
+    sys.path.insert(0, os.path.abspath(args.app_dir))
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+
+    proc, target = start_site_process(site_options(args))
+    sequence = itertools.count()
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def client():
+        test_client = app.app.test_client()
+        for _ in range(args.requests):
+            # A distinct crawl_time keeps concurrent requests from coalescing
+            crawl_time = 20 + next(sequence) * 1e-6
+            start = time.perf_counter()
+            response = test_client.post('/extract', json={
+                'website_url': target, 'max_pages': args.max_pages, 'crawl_time': crawl_time,
+                'template_samples': 0, 'cache': False
+            })
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+
+    clients = [threading.Thread(target=client) for _ in range(args.clients)]
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), PeakSampler() as sampler:
+            starts = count_thread_starts()
+            wall_start = time.perf_counter()
+            for t in clients:
+                t.start()
+            for t in clients:
+                t.join()
+            wall = time.perf_counter() - wall_start
+    finally:
+        proc.kill()
+        proc.wait()
+
+    result = {
+        'clients': args.clients,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'requests_per_sec': round(len(latencies) / wall, 2),
+        'latency_mean': round(statistics.mean(latencies), 4) if latencies else 0,
+        'latency_p50': round(percentile(latencies, 0.50), 4),
+        'latency_p99': round(percentile(latencies, 0.99), 4),
+        'peak_threads': sampler.peak_threads,
+        'threads_started': starts['started'] - args.clients
+    }
+    print(f"⏱️  {os.path.abspath(args.app_dir)}: {result['requests_per_sec']} req/s, "
+          f"p50 {result['latency_p50']}s, p99 {result['latency_p99']}s, "
+          f"peak threads {result['peak_threads']}, threads started {result['threads_started']}, "
+          f"errors {result['errors']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'revision': git_revision(), 'app_dir': os.path.abspath(args.app_dir),
+                       'site': site_options(args), 'result': result}, f, indent=2)
+        print(f"📝 Wrote {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Bytes per extracted page: plain-dict tree vs slotted records.
+
+Runs extract_all_data over the pinned corpus and measures the deep size
+(sys.getsizeof over every reachable object, each counted once) of the
+PageRecord and of its to_dict() form, which is exactly what the old
+dict-based extractor kept in memory. --copies holds that many extractions of
+each page at once, as a long crawl would, so interning across pages shows up.
+
+    python bench/record_size.py --copies 10
+"""
+import argparse, contextlib, io, os, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
+
+from micro_bench import BASE_URL, HEADERS, load_corpus
+
+def deep_sizeof(obj, seen=None):
+    seen = set() if seen is None else seen
+    stack = [obj]
+    total = 0
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, '__slots__'):
+            for name in type(current).__slots__:
+                value = getattr(current, name, None)
+                if value is not None:
+                    stack.append(value)
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description='Bytes per page: dict tree vs records')
+    parser.add_argument('--copies', type=int, default=10, help='extractions of each page held at once')
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+
+    print(f"{'page':<14}{'dict bytes/page':>18}{'record bytes/page':>20}{'saved':>8}")
+    dict_total = record_total = 0
+    for name, html in load_corpus().items():
+        records = [app.extract_all_data(BASE_URL, html, HEADERS) for _ in range(args.copies)]
+        dicts = [app.extract_all_data(BASE_URL, html, HEADERS).to_dict() for _ in range(args.copies)]
+        record_bytes = deep_sizeof(records) / args.copies
+        dict_bytes = deep_sizeof(dicts) / args.copies
+        dict_total += dict_bytes
+        record_total += record_bytes
+        print(f"{name:<14}{dict_bytes:>18,.0f}{record_bytes:>20,.0f}{1 - record_bytes / dict_bytes:>8.0%}")
+    print(f"{'all':<14}{dict_total:>18,.0f}{record_total:>20,.0f}{1 - record_total / dict_total:>8.0%}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Deterministic synthetic target site for crawl benchmarks.
+
+Every page is generated from (seed, path), so the same options always give
+the same site. Knobs: page count, link fan-out, form density, sitemap size,
+injected latency, error rate and catch-all 200 behaviour for unknown paths.
+
+    python bench/synthetic_site.py --port 8800 --pages 500 --fanout 8 --latency-ms 20
+"""
+import argparse, hashlib, random, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULTS = {
+    'pages': 200,
+    'fanout': 8,
+    'form_density': 0.3,   # probability a page carries a form
+    'sitemap_size': 100,   # URLs listed in sitemap.xml
+    'latency_ms': 0,
+    'error_rate': 0.0,     # fraction of page requests answered with 500
+    'catch_all': False,    # unknown paths return 200 instead of 404
+    'seed': 1
+}
+
+WORDS = ("account admin api login search product order cart profile upload report "
+         "invoice settings billing support contact blog news docs help team").split()
+
+def page_rng(options, key):
+    digest = hashlib.sha256(f"{options['seed']}:{key}".encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], 'big'))
+
+def render_page(options, n):
+    rng = page_rng(options, n)
+    pages = options['pages']
+    title = f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {n}"
+    links = ''.join(
+        f'<li><a href="/page/{rng.randrange(pages)}">{rng.choice(WORDS)}</a></li>'
+        for _ in range(options['fanout'])
+    )
+    paragraphs = ''.join(
+        '<p>' + ' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 60))) + '</p>'
+        for _ in range(rng.randint(2, 6))
+    )
+    form = ''
+    if rng.random() < options['form_density']:
+        inputs = ''.join(
+            f'<input type="{rng.choice(["text", "email", "password", "hidden"])}" name="{rng.choice(WORDS)}_{i}">'
+            for i in range(rng.randint(1, 6))
+        )
+        form = (f'<form action="/{rng.choice(WORDS)}" method="{rng.choice(["get", "post"])}">'
+                f'{inputs}<select name="opt"><option value="1">One</option><option value="2">Two</option></select>'
+                f'<button type="submit">Send</button></form>')
+    return (
+        '<!DOCTYPE html><html lang="en"><head>'
+        f'<title>{title}</title>'
+        f'<meta name="description" content="Synthetic page {n}">'
+        '<meta name="generator" content="SyntheticSite 1.0">'
+        '<link rel="stylesheet" href="/static/site.css">'
+        '<script src="/static/app.js"></script>'
+        '</head><body>'
+        f'<h1>{title}</h1><ul>{links}</ul>{paragraphs}{form}'
+        '<table><tr><th>Key</th><th>Value</th></tr><tr><td>id</td><td>' + str(n) + '</td></tr></table>'
+        '<!-- synthetic comment -->'
+        '</body></html>'
+    )
+
+def render_sitemap(options, host):
+    count = min(options['sitemap_size'], options['pages'])
+    locs = ''.join(f'<url><loc>http://{host}/page/{i}</loc></url>' for i in range(count))
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset>{locs}</urlset>'
+
+def make_handler(options):
+    stats = {'requests': 0}
+    lock = threading.Lock()
+
+    class SyntheticSiteHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        counters = stats
+
+        def log_message(self, *args):
+            pass
+
+        def respond(self, status, body, content_type='text/html; charset=utf-8', head=False):
+            payload = body.encode()
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(payload)))
+            self.send_header('Server', 'SyntheticSite/1.0')
+            self.end_headers()
+            if not head:
+                self.wfile.write(payload)
+
+        def handle_path(self, head=False):
+            with lock:
+                stats['requests'] += 1
+            if options['latency_ms']:
+                time.sleep(options['latency_ms'] / 1000.0)
+
+            path = self.path.split('?', 1)[0]
+            host = self.headers.get('Host', 'localhost')
+
+            if path in ('/', '/index.html'):
+                return self.respond(200, render_page(options, 0), head=head)
+            if path == '/sitemap.xml':
+                return self.respond(200, render_sitemap(options, host), 'application/xml', head)
+            if path == '/robots.txt':
+                return self.respond(200, f'User-agent: *\nSitemap: http://{host}/sitemap.xml\n', 'text/plain', head)
+            if path.startswith('/page/'):
+                try:
+                    n = int(path[len('/page/'):])
+                except ValueError:
+                    n = -1
+                if 0 <= n < options['pages']:
+                    if page_rng(options, f"error:{n}").random() < options['error_rate']:
+                        return self.respond(500, 'synthetic error', 'text/plain', head)
+                    return self.respond(200, render_page(options, n), head=head)
+            if options['catch_all']:
+                return self.respond(200, render_page(options, 0), head=head)
+            return self.respond(404, 'not found', 'text/plain', head)
+
+        def do_GET(self):
+            self.handle_path()
+
+        def do_HEAD(self):
+            self.handle_path(head=True)
+
+    return SyntheticSiteHandler
+
+def start_site(port=0, **overrides):
+    """Serve a synthetic site from a background thread; returns (server, base_url)"""
+    options = dict(DEFAULTS, **overrides)
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(options))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+def add_site_arguments(parser):
+    parser.add_argument('--pages', type=int, default=DEFAULTS['pages'])
+    parser.add_argument('--fanout', type=int, default=DEFAULTS['fanout'])
+    parser.add_argument('--form-density', type=float, default=DEFAULTS['form_density'])
+    parser.add_argument('--sitemap-size', type=int, default=DEFAULTS['sitemap_size'])
+    parser.add_argument('--latency-ms', type=float, default=DEFAULTS['latency_ms'])
+    parser.add_argument('--error-rate', type=float, default=DEFAULTS['error_rate'])
+    parser.add_argument('--catch-all', action='store_true')
+    parser.add_argument('--seed', type=int, default=DEFAULTS['seed'])
+
+def site_options(args):
+    return {key: getattr(args, key) for key in DEFAULTS}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Deterministic synthetic target site')
+    parser.add_argument('--port', type=int, default=8800)
+    add_site_arguments(parser)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(site_options(args)))
+    print(f"🧪 Synthetic site on http://127.0.0.1:{args.port}/ ({args.pages} pages)")
+    server.serve_forever()
@@ -0,0 +1,299 @@
+"""
+Cache shared by every gunicorn worker on a host.
+
+One interface (get / set / get_or_set / delete / clear / stats) with two
+backends:
+
+  SQLiteCache  - a WAL-mode SQLite file that all worker processes open, so a
+                 value computed by one worker is a hit in the others. Each
+                 write is a single transaction (atomic replace), entries carry
+                 a TTL, and the file is kept under max_bytes by evicting the
+                 least recently read entries.
+  MemoryCache  - per-process LRU with the same semantics, for single-process
+                 runs and tests.
+
+Keys are (namespace, key parts); values are pickled, so records and plain
+dicts round-trip unchanged. Unpickling trusts whatever is in the file, so
+SQLiteCache refuses a directory or database that is not owned by the
+current user or that group/other can access (a 0700 makedirs alone does
+nothing when someone else created the directory first). A value that fails
+to unpickle is a miss.
+"""
+import hashlib, json, os, pickle, sqlite3, stat, threading, time
+from collections import OrderedDict
+
+import metrics
+
+CACHE_REQUESTS = metrics.Counter('extractor_cache_requests_total',
+                                 'Cache lookups by namespace and result', ['namespace', 'result'])
+CACHE_SECONDS = metrics.Histogram('extractor_cache_operation_seconds',
+                                  'Cache operation latency by backend and operation', ['backend', 'op'],
+                                  buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1, 1))
+CACHE_EVICTIONS = metrics.Counter('extractor_cache_evictions_total',
+                                  'Entries removed to stay under the size limit, by backend', ['backend'])
+
+ACCESS_RESOLUTION = 30   # seconds; a hit refreshes an entry's LRU time at most this often
+EVICT_EVERY = 64         # writes between size checks (per process)...
+EVICT_EVERY_BYTES = 0.05 # ...or this fraction of max_bytes written, whichever comes first
+EVICT_TARGET = 0.9       # evict down to this fraction of max_bytes
+
+def check_private(path):
+    """Raise PermissionError unless path is owned by this user, not a symlink, and closed to group/other"""
+    info = os.lstat(path)
+    if stat.S_ISLNK(info.st_mode):
+        raise PermissionError(f"{path} is a symlink; refusing to use it")
+    if info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{path} must be owned by uid {os.getuid()} with no group/other access "
+                              f"(owner {info.st_uid}, mode {oct(stat.S_IMODE(info.st_mode))})")
+
+def private_directory(path):
+    """makedirs(path, 0700) and check_private() it, since makedirs keeps an existing directory as it is"""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    check_private(path)
+    return path
+
+def make_key(namespace, *parts):
+    """Stable cache key: namespace plus a digest of the JSON-encoded parts"""
+    encoded = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+    return f"{namespace}:{hashlib.sha256(encoded.encode('utf-8')).hexdigest()}"
+
+class Cache:
+    """Backend-independent API; subclasses implement _get/_set/_delete/_clear"""
+    backend = 'none'
+
+    def __init__(self, default_ttl=None):
+        self.default_ttl = default_ttl
+
+    def get(self, namespace, *parts, default=None):
+        key = make_key(namespace, *parts)
+        try:
+            with CACHE_SECONDS.time(backend=self.backend, op='get'):
+                blob = self._get(key, time.time())
+        except Exception as e:
+            # A broken or locked cache is a miss, never a failed request
+            metrics.record_error('cache', e)
+            blob = None
+        if blob is not None:
+            try:
+                value = pickle.loads(blob)
+            except Exception as e:
+                # A corrupt or incompatible entry is a miss too
+                metrics.record_error('cache', e)
+                blob = None
+        if blob is None:
+            CACHE_REQUESTS.inc(namespace=namespace, result='miss')
+            return default
+        CACHE_REQUESTS.inc(namespace=namespace, result='hit')
+        return value
+
+    def set(self, namespace, *parts, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        expires = time.time() + ttl if ttl else None
+        try:
+            with CACHE_SECONDS.time(backend=self.backend, op='set'):
+                self._set(make_key(namespace, *parts), blob, expires)
+        except Exception as e:
+            metrics.record_error('cache', e)
+
+    def get_or_set(self, namespace, *parts, producer, ttl=None):
+        """Cached value, or producer() stored under the key on a miss"""
+        missing = object()
+        value = self.get(namespace, *parts, default=missing)
+        if value is missing:
+            value = producer()
+            self.set(namespace, *parts, value=value, ttl=ttl)
+        return value
+
+    def delete(self, namespace, *parts):
+        self._delete(make_key(namespace, *parts))
+
+    def clear(self):
+        self._clear()
+
+    def stats(self):
+        return {'backend': self.backend}
+
+    def _get(self, key, now):
+        return None
+
+    def _set(self, key, blob, expires):
+        pass
+
+    def _delete(self, key):
+        pass
+
+    def _clear(self):
+        pass
+
+class MemoryCache(Cache):
+    """Per-process LRU bounded by pickled size"""
+    backend = 'memory'
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, default_ttl=None):
+        super().__init__(default_ttl)
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()   # key -> (blob, expires)
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def _get(self, key, now):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            blob, expires = entry
+            if expires is not None and expires <= now:
+                self._remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return blob
+
+    def _set(self, key, blob, expires):
+        if len(blob) > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (blob, expires)
+            self.size += len(blob)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+                CACHE_EVICTIONS.inc(backend=self.backend)
+
+    def _remove(self, key):
+        blob, _ = self.entries.pop(key)
+        self.size -= len(blob)
+
+    def _delete(self, key):
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+
+    def _clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            return {'backend': self.backend, 'entries': len(self.entries), 'bytes': self.size,
+                    'max_bytes': self.max_bytes}
+
+class SQLiteCache(Cache):
+    """Cross-process cache in one SQLite file (WAL, one connection per thread)"""
+    backend = 'sqlite'
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS cache (
+            key TEXT PRIMARY KEY,
+            value BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            expires REAL,
+            accessed REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+    '''
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, default_ttl=None, timeout=5.0):
+        super().__init__(default_ttl)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.local = threading.local()
+        self.writes = 0
+        self.written = 0
+        self.writes_lock = threading.Lock()
+        private_directory(os.path.dirname(os.path.abspath(path)))
+        # Create the database 0600 ourselves; sqlite3 would use the umask
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_NOFOLLOW', 0), 0o600))
+        check_private(path)
+        conn = self._connect()
+        try:
+            conn.executescript(self.SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @property
+    def conn(self):
+        # Per thread, and re-opened after fork (gunicorn --preload)
+        conn = getattr(self.local, 'conn', None)
+        if conn is None or self.local.pid != os.getpid():
+            conn = self.local.conn = self._connect()
+            self.local.pid = os.getpid()
+        return conn
+
+    def _get(self, key, now):
+        row = self.conn.execute('SELECT value, expires, accessed FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        blob, expires, accessed = row
+        if expires is not None and expires <= now:
+            self.conn.execute('DELETE FROM cache WHERE key = ? AND expires <= ?', (key, now))
+            return None
+        if now - accessed > ACCESS_RESOLUTION:
+            self.conn.execute('UPDATE cache SET accessed = ? WHERE key = ?', (now, key))
+        return blob
+
+    def _set(self, key, blob, expires):
+        if len(blob) > self.max_bytes:
+            return
+        self.conn.execute('INSERT OR REPLACE INTO cache (key, value, size, expires, accessed) '
+                          'VALUES (?, ?, ?, ?, ?)', (key, blob, len(blob), expires, time.time()))
+        with self.writes_lock:
+            self.writes += 1
+            self.written += len(blob)
+            check = self.writes % EVICT_EVERY == 0 or self.written >= self.max_bytes * EVICT_EVERY_BYTES
+            if check:
+                self.written = 0
+        if check:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently read ones down to EVICT_TARGET"""
+        conn = self.conn
+        now = time.time()
+        removed = conn.execute('DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?', (now,)).rowcount
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return removed
+        target = self.max_bytes * EVICT_TARGET
+        while total > target:
+            rows = conn.execute('SELECT key, size FROM cache ORDER BY accessed LIMIT 100').fetchall()
+            if not rows:
+                break
+            drop = []
+            for key, size in rows:
+                drop.append((key,))
+                total -= size
+                if total <= target:
+                    break
+            conn.executemany('DELETE FROM cache WHERE key = ?', drop)
+            removed += len(drop)
+            CACHE_EVICTIONS.inc(len(drop), backend=self.backend)
+        return removed
+
+    def _delete(self, key):
+        self.conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def _clear(self):
+        self.conn.execute('DELETE FROM cache')
+
+    def stats(self):
+        entries, size = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache').fetchone()
+        return {'backend': self.backend, 'path': self.path, 'entries': entries, 'bytes': size,
+                'max_bytes': self.max_bytes}
+
+def make_cache(backend, path=None, max_bytes=256 * 1024 * 1024, default_ttl=None):
+    """Build the configured backend: 'sqlite', 'memory' or 'none'"""
+    if backend == 'sqlite':
+        return SQLiteCache(path, max_bytes=max_bytes, default_ttl=default_ttl)
+    if backend == 'memory':
+        return MemoryCache(max_bytes=max_bytes, default_ttl=default_ttl)
+    return Cache(default_ttl)
@@ -0,0 +1,149 @@
+"""
+URL canonicalization and near-duplicate page detection for deep_crawl.
+
+canonicalize_url() maps the spellings of one page to a single dedup key
+before it is enqueued: lower-case scheme and host, default port dropped,
+fragment removed, tracking parameters removed and the remaining query
+parameters sorted. Path and parameters keep their exact spelling (trailing
+slash, percent-encoding, a bare ?flag), since servers may treat those
+differently. The key is never fetched; the crawl requests the URL as found.
+
+After a page is fetched, simhash() fingerprints its visible text (word
+shingles, 64 bits) and NearDuplicateIndex finds an earlier page within
+NEAR_DUPLICATE_DISTANCE bits, so the page can be skipped before the full
+BeautifulSoup extraction runs.
+"""
+import hashlib, re, zlib
+from collections import Counter, OrderedDict
+from urllib.parse import urlsplit, urlunsplit, unquote_plus
+
+TRACKING_PARAMS = frozenset((
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'utm_id',
+    'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid', '_ga', '_gl',
+    'igshid', 'ref_src', 'spm'
+))
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3
+MIN_SHINGLES = 16            # pages with less text than this are never called duplicates
+MAX_SHINGLES = 1024          # roughly how many distinct shingles are hashed per page
+NEAR_DUPLICATE_DISTANCE = 3  # max differing bits; 4 bands of 16 bits cover it by pigeonhole
+
+_SKIP_BLOCKS = re.compile(r'<(script|style|noscript|template)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_TAGS = re.compile(r'<[^>]*>')
+_WORDS = re.compile(r'\w+')
+
+def canonicalize_url(url):
+    """Canonical form of an http(s) URL, or the input unchanged if it does not parse"""
+    try:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or '').rstrip('.')
+        port = parts.port
+    except ValueError:
+        return url
+    if scheme not in DEFAULT_PORTS or not host:
+        return url
+
+    netloc = host
+    if ':' in host:
+        netloc = f'[{host}]'
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f'{netloc}:{port}'
+    if parts.username or parts.password:
+        userinfo = parts.username or ''
+        if parts.password:
+            userinfo = f'{userinfo}:{parts.password}'
+        netloc = f'{userinfo}@{netloc}'
+
+    path = parts.path or '/'
+
+    # Sorted as written: blank values and encodings are left alone
+    query = ''
+    if parts.query:
+        params = [param for param in parts.query.split('&')
+                  if param and unquote_plus(param.split('=', 1)[0]).lower() not in TRACKING_PARAMS]
+        query = '&'.join(sorted(params))
+
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+def visible_text(html):
+    """Cheap tag-stripped text for fingerprinting (no DOM parse)"""
+    return _TAGS.sub(' ', _SKIP_BLOCKS.sub(' ', html))
+
+def simhash(text):
+    """64-bit SimHash over word shingles; None when there is too little text"""
+    words = _WORDS.findall(text.lower())
+    shingles = Counter(map(' '.join, zip(*(words[i:] for i in range(SHINGLE_SIZE)))))
+    if len(shingles) < MIN_SHINGLES:
+        return None
+
+    # Content-defined sample: the same shingle is kept or dropped on every
+    # page, so near-duplicates still share their sample
+    stride = max(1, len(shingles) // MAX_SHINGLES)
+    rows = []
+    for shingle, count in shingles.items():
+        data = shingle.encode('utf-8', 'surrogatepass')
+        if stride > 1 and zlib.crc32(data) % stride:
+            continue
+        digest = hashlib.blake2b(data, digest_size=8).digest()
+        rows.extend([format(int.from_bytes(digest, 'big'), '064b')] * count)
+    if not rows:
+        return None
+
+    # Per-bit vote: transpose the hashes as bit strings and count ones per column
+    half = len(rows) / 2
+    bits = ''.join('1' if column.count('1') > half else '0' for column in zip(*rows))
+    return int(bits, 2)
+
+class NearDuplicateIndex:
+    """SimHash fingerprints of crawled pages, looked up by 16-bit bands
+
+    max_entries bounds the index (least recently matched pages are dropped
+    first); None keeps every page.
+    """
+
+    BANDS = 4
+
+    def __init__(self, distance=NEAR_DUPLICATE_DISTANCE, max_entries=None):
+        self.distance = distance
+        self.max_entries = max_entries
+        self.width = SIMHASH_BITS // self.BANDS
+        self.mask = (1 << self.width) - 1
+        self.bands = [{} for _ in range(self.BANDS)]
+        self.urls = OrderedDict()
+        self.evicted = 0
+
+    def _keys(self, fingerprint):
+        return [(fingerprint >> (i * self.width)) & self.mask for i in range(self.BANDS)]
+
+    def find(self, fingerprint):
+        """URL of an indexed page within `distance` bits, or None"""
+        for band, key in zip(self.bands, self._keys(fingerprint)):
+            for other in band.get(key, ()):
+                if bin(fingerprint ^ other).count('1') <= self.distance:
+                    self.urls.move_to_end(other)
+                    return self.urls[other]
+        return None
+
+    def add(self, fingerprint, url):
+        if fingerprint in self.urls:
+            return
+        self.urls[fingerprint] = url
+        for band, key in zip(self.bands, self._keys(fingerprint)):
+            band.setdefault(key, []).append(fingerprint)
+        if self.max_entries is not None and len(self.urls) > self.max_entries:
+            self._evict(next(iter(self.urls)))
+
+    def _evict(self, fingerprint):
+        del self.urls[fingerprint]
+        for band, key in zip(self.bands, self._keys(fingerprint)):
+            bucket = band[key]
+            bucket.remove(fingerprint)
+            if not bucket:
+                del band[key]
+        self.evicted += 1
+
+    def __len__(self):
+        return len(self.urls)
@@ -0,0 +1,121 @@
+"""
+In-process DNS cache for every outbound connection made through requests.
+
+install() routes urllib3's create_connection through DNSCache.resolve(), so
+the crawler, file prober, script miner and LLM client share one cache of
+getaddrinfo() results across threads. The connection is still made by
+urllib3, and TLS still uses the hostname for SNI and certificate checks.
+
+getaddrinfo() does not expose record TTLs, so answers are kept for a fixed
+ttl. Failed lookups (NXDOMAIN, resolver errors) are cached for
+negative_ttl so that a dead host in a crawl or batch does not reach the
+resolver again on every URL. Concurrent misses for one name share one lookup.
+"""
+import ipaddress, socket, threading, time
+from collections import OrderedDict
+
+import urllib3.util.connection as urllib3_connection
+
+import metrics
+from singleflight import SingleFlight
+
+DNS_LOOKUP_SECONDS = metrics.Histogram('extractor_dns_lookup_seconds', 'System resolver latency on cache misses',
+                                       buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5))
+DNS_CACHE_REQUESTS = metrics.Counter('extractor_dns_cache_requests_total', 'DNS cache lookups by result',
+                                     ['result'])
+
+class DNSCache:
+    def __init__(self, ttl=300, negative_ttl=30, max_entries=10000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()   # (host, port, family) -> (expires, addrinfo list or gaierror)
+        self.lock = threading.Lock()
+        self.flight = SingleFlight('dns')
+        self.counts = {'hit': 0, 'negative_hit': 0, 'miss': 0}
+
+    def _count(self, result):
+        DNS_CACHE_REQUESTS.inc(result=result)
+        with self.lock:
+            self.counts[result] += 1
+
+    def resolve(self, host, port, family=socket.AF_UNSPEC):
+        """getaddrinfo(host, port, family, SOCK_STREAM), cached"""
+        key = (host.lower(), port, family)
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self.entries[key]
+                entry = None
+        if entry is not None:
+            answer = entry[1]
+            if isinstance(answer, socket.gaierror):
+                self._count('negative_hit')
+                raise socket.gaierror(*answer.args)
+            self._count('hit')
+            return answer
+
+        self._count('miss')
+        answer, _ = self.flight.do(key, lambda: self._lookup(key))
+        if isinstance(answer, socket.gaierror):
+            raise socket.gaierror(*answer.args)
+        return answer
+
+    def _lookup(self, key):
+        host, port, family = key
+        start = time.perf_counter()
+        try:
+            answer = socket.getaddrinfo(host, port, family, socket.SOCK_STREAM)
+            ttl = self.ttl
+        except socket.gaierror as e:
+            answer = e
+            ttl = self.negative_ttl
+        finally:
+            DNS_LOOKUP_SECONDS.observe(time.perf_counter() - start)
+        with self.lock:
+            self.entries[key] = (time.time() + ttl, answer)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return answer
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = sum(self.counts.values())
+            hits = self.counts['hit'] + self.counts['negative_hit']
+            return dict(self.counts, entries=len(self.entries), ttl=self.ttl, negative_ttl=self.negative_ttl,
+                        hit_rate=round(hits / lookups, 3) if lookups else 0.0)
+
+def _is_ip(host):
+    try:
+        ipaddress.ip_address(host.strip('[]'))
+        return True
+    except ValueError:
+        return False
+
+_original_create_connection = urllib3_connection.create_connection
+
+def install(cache):
+    """Send every urllib3 connection's name lookup through cache"""
+
+    def create_connection(address, *args, **kwargs):
+        host, port = address
+        if _is_ip(host):
+            return _original_create_connection(address, *args, **kwargs)
+        error = None
+        for _, _, _, _, sockaddr in cache.resolve(host, port, urllib3_connection.allowed_gai_family()):
+            try:
+                # An address literal makes urllib3's own getaddrinfo() a no-op
+                return _original_create_connection((sockaddr[0], port), *args, **kwargs)
+            except OSError as e:
+                error = e
+        if error is None:
+            raise OSError("getaddrinfo returns an empty list")
+        raise error
+
+    urllib3_connection.create_connection = create_connection
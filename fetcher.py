@@ -0,0 +1,150 @@
+"""
+Single entry point for outbound HTTP fetches made during a scan.
+
+Every crawl, sitemap, file-probe and header request goes through fetch(),
+and script bodies go through the streaming, byte-capped fetch_capped(); both
+record latency, bytes and status class per phase. A process-wide
+semaphore caps how many fetches (each one socket) are open at once, across
+all concurrent scans.
+
+configure(dns_ttl=...) puts an in-process DNS cache under every connection
+(see dns_cache.py). configure(record_dir=...) also writes every fetch to WARC files, and
+configure(replay=[...]) answers fetches from recorded WARC files instead of
+the network (see warc.py), so extraction can be re-run offline.
+"""
+import codecs, threading, time
+
+import requests
+
+from metrics import FETCH_SECONDS, FETCH_BYTES, FETCH_STATUS, OUTBOUND_ACTIVE, OUTBOUND_WAIT
+
+MAX_CONNECTIONS = 64
+CONNECTION_WAIT_TIMEOUT = 30   # seconds to wait for a free connection slot
+
+_connections = threading.BoundedSemaphore(MAX_CONNECTIONS)
+_recorder = None   # warc.WarcRecorder
+_archive = None    # warc.WarcArchive
+_dns = None        # dns_cache.DNSCache
+
+class ConnectionSlotTimeout(requests.exceptions.ConnectionError):
+    """No outbound connection slot became free in time"""
+
+def configure(max_connections=None, wait_timeout=None, record_dir=None, replay=None,
+              dns_ttl=None, dns_negative_ttl=30):
+    """Set the outbound connection cap, DNS cache and WARC record/replay (call before serving)"""
+    global _connections, MAX_CONNECTIONS, CONNECTION_WAIT_TIMEOUT, _recorder, _archive, _dns
+    if max_connections is not None:
+        MAX_CONNECTIONS = max_connections
+        _connections = threading.BoundedSemaphore(max_connections)
+    if wait_timeout is not None:
+        CONNECTION_WAIT_TIMEOUT = wait_timeout
+    if dns_ttl:
+        from dns_cache import DNSCache, install
+        _dns = DNSCache(ttl=dns_ttl, negative_ttl=dns_negative_ttl)
+        install(_dns)
+    if record_dir:
+        from warc import WarcRecorder
+        _recorder = WarcRecorder(record_dir)
+    if replay:
+        from warc import WarcArchive
+        _archive = WarcArchive(replay)
+
+def dns_stats():
+    return _dns.stats() if _dns is not None else None
+
+def _acquire_slot(phase):
+    slots = _connections
+    wait_start = time.perf_counter()
+    if not slots.acquire(timeout=CONNECTION_WAIT_TIMEOUT):
+        raise ConnectionSlotTimeout(f"no outbound connection slot within {CONNECTION_WAIT_TIMEOUT}s")
+    OUTBOUND_WAIT.observe(time.perf_counter() - wait_start, phase=phase)
+    return slots
+
+def _replay(method, url, kwargs):
+    kwargs.pop('stream', None)
+    return _archive.fetch(method, url, **kwargs)
+
+def fetch(url, phase, method='GET', origins=None, **kwargs):
+    """requests.request() with per-phase metrics, under the connection cap
+
+    With origins (an origins.OriginMap) the URL is first moved to its learned
+    canonical origin, and permanent origin redirects in the response are
+    learned; one the request did not follow is followed here, once.
+    """
+    if origins is None:
+        return _fetch(url, phase, method, kwargs)
+    resp = _fetch(origins.rewrite(url), phase, method, kwargs)
+    if origins.learn(resp):
+        resp = _fetch(origins.canonical(resp.url), phase, method, kwargs)
+    return resp
+
+def _fetch(url, phase, method, kwargs):
+    if _archive is not None:
+        start = time.perf_counter()
+        try:
+            resp = _replay(method, url, kwargs)
+        finally:
+            FETCH_SECONDS.observe(time.perf_counter() - start, phase=phase)
+        size = len(resp.content) if method != 'HEAD' else 0
+    else:
+        slots = _acquire_slot(phase)
+        start = time.perf_counter()
+        try:
+            with OUTBOUND_ACTIVE.track():
+                resp = requests.request(method, url, **kwargs)
+                size = len(resp.content) if method != 'HEAD' else 0
+        finally:
+            slots.release()
+            FETCH_SECONDS.observe(time.perf_counter() - start, phase=phase)
+        if _recorder is not None:
+            _recorder.record(resp)
+
+    FETCH_BYTES.inc(size, phase=phase)
+    FETCH_STATUS.inc(phase=phase, status=f"{resp.status_code // 100}xx")
+    return resp
+
+def fetch_capped(url, phase, max_bytes, on_chunk, chunk_size=16 * 1024, **kwargs):
+    """Streamed GET that hands decoded text chunks to on_chunk, reading at most max_bytes
+
+    The body is never held whole. Non-200 bodies are not read. Returns
+    (response, bytes_read, truncated).
+    """
+    replay = _archive is not None
+    recorded = [] if _recorder is not None and not replay else None
+    slots = _acquire_slot(phase) if not replay else None
+    start = time.perf_counter()
+    read = 0
+    truncated = False
+    try:
+        opened = _replay('GET', url, kwargs) if replay else requests.get(url, stream=True, **kwargs)
+        with OUTBOUND_ACTIVE.track(), opened as resp:
+            if resp.status_code == 200:
+                try:
+                    decoder = codecs.getincrementaldecoder(resp.encoding or 'utf-8')(errors='replace')
+                except LookupError:
+                    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+                for chunk in resp.iter_content(chunk_size):
+                    if read + len(chunk) > max_bytes:
+                        chunk = chunk[:max_bytes - read]
+                        truncated = True
+                    read += len(chunk)
+                    if recorded is not None:
+                        recorded.append(chunk)
+                    text = decoder.decode(chunk)
+                    if text:
+                        on_chunk(text)
+                    if truncated:
+                        break
+                tail = decoder.decode(b'', final=True)
+                if tail:
+                    on_chunk(tail)
+    finally:
+        if slots is not None:
+            slots.release()
+        FETCH_SECONDS.observe(time.perf_counter() - start, phase=phase)
+
+    if recorded is not None:
+        _recorder.record(resp, body=b''.join(recorded), truncated=truncated)
+    FETCH_BYTES.inc(read, phase=phase)
+    FETCH_STATUS.inc(phase=phase, status=f"{resp.status_code // 100}xx")
+    return resp, read, truncated
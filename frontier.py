@@ -0,0 +1,190 @@
+"""
+Crawl frontier and seen-URL sets for deep_crawl.
+
+Frontier is a FIFO queue with a bounded in-memory hot segment; anything
+beyond it is appended to a local spill file and read back in batches as the
+hot segment drains, so memory stays flat no matter how many URLs a large
+crawl discovers. PriorityFrontier pops the highest-scoring URL first
+instead, and re-ranks what it holds when the scores change. SeenFilter is a
+fixed-size Bloom filter for the large-crawl visited set (a false positive
+skips a URL, it never fetches one twice); ExactSeen is the plain set used
+for normal crawls.
+"""
+import hashlib, heapq, math, os, shutil, tempfile
+from collections import deque
+
+class ExactSeen:
+    """set() with add() reporting whether the item was new"""
+
+    def __init__(self):
+        self.items = set()
+
+    def add(self, item):
+        if item in self.items:
+            return False
+        self.items.add(item)
+        return True
+
+    def __contains__(self, item):
+        return item in self.items
+
+    def __len__(self):
+        return len(self.items)
+
+class SeenFilter:
+    """Bloom filter sized for `capacity` items at `error_rate` false positives"""
+
+    def __init__(self, capacity=2_000_000, error_rate=1e-4):
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def add(self, item):
+        new = False
+        bits = self.bits
+        for pos in self._positions(item):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def __len__(self):
+        return self.count
+
+class Frontier:
+    """FIFO URL queue: hot deque in memory, overflow spilled to disk"""
+
+    def __init__(self, hot_limit=None, spill_dir=None, refill_batch=1000):
+        # hot_limit=None keeps everything in memory (never spills)
+        self.hot_limit = hot_limit
+        self.spill_dir = spill_dir
+        self.refill_batch = refill_batch
+        self.hot = deque()
+        self.spilled = 0
+        self.spilled_total = 0
+        self.tmpdir = None
+        self.writer = None
+        self.reader = None
+
+    def push(self, url):
+        if not self.spilled and (self.hot_limit is None or len(self.hot) < self.hot_limit):
+            self.hot.append(url)
+            return
+        self._spill(url)
+
+    def pop(self):
+        """Next URL in FIFO order, or None when empty"""
+        if not self.hot and self.spilled:
+            self._refill()
+        return self.hot.popleft() if self.hot else None
+
+    def __len__(self):
+        return len(self.hot) + self.spilled
+
+    def __bool__(self):
+        return bool(self.hot) or self.spilled > 0
+
+    def _spill(self, url):
+        if self.writer is None:
+            self._open_spill()
+        self.writer.write(url.replace('\n', '').encode('utf-8', 'surrogatepass') + b'\n')
+        self.spilled += 1
+        self.spilled_total += 1
+
+    def _open_spill(self):
+        self.tmpdir = tempfile.mkdtemp(prefix='frontier-', dir=self.spill_dir)
+        path = os.path.join(self.tmpdir, 'queue')
+        self.writer = open(path, 'ab', buffering=64 * 1024)
+        self.reader = open(path, 'rb')
+
+    def _refill(self):
+        self.writer.flush()
+        limit = min(self.refill_batch, self.hot_limit or self.refill_batch)
+        while self.spilled and len(self.hot) < limit:
+            line = self.reader.readline()
+            if not line:
+                break
+            self._hold(line.rstrip(b'\n').decode('utf-8', 'surrogatepass'))
+            self.spilled -= 1
+
+    def _hold(self, url):
+        self.hot.append(url)
+
+    def close(self):
+        for handle in (self.writer, self.reader):
+            if handle is not None:
+                handle.close()
+        self.writer = self.reader = None
+        if self.tmpdir:
+            shutil.rmtree(self.tmpdir, ignore_errors=True)
+            self.tmpdir = None
+
+    def stats(self):
+        return {
+            'queued': len(self),
+            'in_memory': len(self.hot),
+            'on_disk': self.spilled,
+            'spilled_total': self.spilled_total
+        }
+
+class PriorityFrontier(Frontier):
+    """Highest score(url) first, FIFO among equal scores; overflow spilled to disk
+
+    URLs scoring above zero may take the hot segment up to twice hot_limit
+    before they spill, so a crawl's promising URLs stay rankable. Spilled URLs
+    come back (and are scored) only once the hot segment drains.
+    """
+
+    def __init__(self, score, hot_limit=None, spill_dir=None, refill_batch=1000):
+        super().__init__(hot_limit, spill_dir, refill_batch)
+        self.score = score
+        self.hot = []   # heap of (-score, push order, url)
+        self.order = 0
+        self.rescores = 0
+
+    def push(self, url):
+        limit = self.hot_limit
+        if limit is None or len(self.hot) < limit:
+            self._hold(url)
+            return
+        score = self.score(url)
+        if score > 0 and len(self.hot) < 2 * limit:
+            self._hold(url, score)
+        else:
+            self._spill(url)
+
+    def _hold(self, url, score=None):
+        if score is None:
+            score = self.score(url)
+        self.order += 1
+        heapq.heappush(self.hot, (-score, self.order, url))
+
+    def pop(self):
+        """Highest-scoring URL, or None when empty"""
+        if not self.hot and self.spilled:
+            self._refill()
+        return heapq.heappop(self.hot)[2] if self.hot else None
+
+    def rescore(self):
+        """Re-rank the in-memory URLs after score() changed"""
+        self.hot = [(-self.score(url), order, url) for _, order, url in self.hot]
+        heapq.heapify(self.hot)
+        self.rescores += 1
+
+    def stats(self):
+        return dict(super().stats(), rescores=self.rescores)
@@ -0,0 +1,126 @@
+"""
+Endpoint mining for same-site JavaScript bundles.
+
+BundleScanner is fed a script body in decoded text chunks (as they stream
+in, up to the fetch byte cap) and collects:
+
+  endpoints           quoted absolute paths and URLs ("/api/v2/users",
+                      `/orders/${id}` -> /orders/{param})
+  api_calls           fetch(), axios[.method]() and XMLHttpRequest.open() targets
+  graphql_operations  named query / mutation / subscription operations
+  source_maps         sourceMappingURL references
+  libraries           "name vX.Y.Z" banners in the leading comments
+                      ("/*! jQuery v3.7.1 ...")
+
+Matches are only accepted once they end at least OVERLAP characters before
+the end of the buffered text, so a literal split across two chunks is seen
+whole exactly once.
+"""
+import re
+from urllib.parse import urlsplit
+
+OVERLAP = 1024          # characters kept between chunks; longer literals are ignored
+MAX_LITERAL = 300
+MAX_FINDINGS = 500      # per kind, per script
+BANNER_CHARS = 4096     # leading characters searched for library banners
+
+SCRIPT_EXTENSIONS = ('.js', '.mjs', '.cjs')
+STATIC_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.ico', '.bmp', '.avif',
+                     '.css', '.woff', '.woff2', '.ttf', '.otf', '.eot', '.mp4', '.webm', '.mp3',
+                     '.wav', '.map', '.txt')
+
+_LITERAL = re.compile(r'''(["'`])((?:/|https?://)[^\s"'`<>\\]{1,%d})\1''' % MAX_LITERAL)
+_FETCH = re.compile(r'''\bfetch\(\s*(["'`])([^"'`\s]{1,%d})\1''' % MAX_LITERAL)
+_AXIOS = re.compile(r'''\baxios(?:\.(get|post|put|patch|delete|head|options|request))?\(\s*(["'`])([^"'`\s]{1,%d})\2'''
+                    % MAX_LITERAL, re.IGNORECASE)
+_XHR = re.compile(r'''\.open\(\s*["'](GET|POST|PUT|PATCH|DELETE|HEAD|OPTIONS)["']\s*,\s*(["'`])([^"'`\s]{1,%d})\2'''
+                  % MAX_LITERAL, re.IGNORECASE)
+_GRAPHQL = re.compile(r'\b(query|mutation|subscription)\s+([A-Za-z_][A-Za-z0-9_]{0,100})\s*[({]')
+_SOURCE_MAP = re.compile(r'[#@]\s*sourceMappingURL=([^\s"\'`*]{1,%d})' % MAX_LITERAL)
+_TEMPLATE_EXPR = re.compile(r'\$\{[^}]*\}')
+_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+_BANNER = re.compile(r'(?:^|[\s*!@])([A-Za-z][\w.\-]{1,40})\s+v(\d+\.\d+(?:\.\d+)?(?:-[\w.]+)?)\b')
+
+def is_script_url(url):
+    path = urlsplit(url).path.lower()
+    return path.endswith(SCRIPT_EXTENSIONS)
+
+def clean_literal(value):
+    """Normalize a path/URL literal, or None if it is not worth keeping"""
+    value = _TEMPLATE_EXPR.sub('{param}', value)
+    if value.startswith('//') or '$' in value or '*' in value:
+        return None
+    path = urlsplit(value).path if value.startswith('http') else value.split('?', 1)[0]
+    if value.startswith('/') and (len(path) < 2 or not re.search(r'[A-Za-z]', path)):
+        return None
+    if path.lower().endswith(STATIC_EXTENSIONS):
+        return None
+    return value
+
+class BundleScanner:
+    def __init__(self):
+        self.buffer = ''
+        self.head = ''
+        self.endpoints = {}
+        self.api_calls = {}
+        self.graphql_operations = {}
+        self.source_maps = {}
+
+    def feed(self, text):
+        if len(self.head) < BANNER_CHARS:
+            self.head += text[:BANNER_CHARS - len(self.head)]
+        self.buffer += text
+        if len(self.buffer) > OVERLAP * 2:
+            self._scan(len(self.buffer) - OVERLAP)
+
+    def close(self):
+        self._scan(len(self.buffer))
+        return self.findings()
+
+    @staticmethod
+    def _add(bucket, key, value=True):
+        if key not in bucket and len(bucket) < MAX_FINDINGS:
+            bucket[key] = value
+
+    def _scan(self, limit):
+        text = self.buffer
+        for m in _LITERAL.finditer(text):
+            if m.start() >= limit:
+                break
+            literal = clean_literal(m.group(2))
+            if literal:
+                self._add(self.endpoints, literal)
+        for pattern, method_group, url_group in ((_FETCH, None, 2), (_AXIOS, 1, 3), (_XHR, 1, 3)):
+            for m in pattern.finditer(text):
+                if m.start() >= limit:
+                    break
+                target = _TEMPLATE_EXPR.sub('{param}', m.group(url_group))
+                method = (m.group(method_group) or 'GET').upper() if method_group else 'GET'
+                if method == 'REQUEST':
+                    method = 'GET'
+                self._add(self.api_calls, (method, target))
+        for m in _GRAPHQL.finditer(text):
+            if m.start() >= limit:
+                break
+            self._add(self.graphql_operations, f"{m.group(1)} {m.group(2)}")
+        for m in _SOURCE_MAP.finditer(text):
+            if m.start() >= limit:
+                break
+            self._add(self.source_maps, m.group(1))
+        self.buffer = text[limit:]
+
+    def libraries(self):
+        found = {}
+        for comment in _COMMENT.findall(self.head):
+            for name, version in _BANNER.findall(comment):
+                found.setdefault(name, version)
+        return [{'name': name, 'version': version} for name, version in found.items()]
+
+    def findings(self):
+        return {
+            'endpoints': list(self.endpoints),
+            'api_calls': [{'method': method, 'url': url} for method, url in self.api_calls],
+            'graphql_operations': list(self.graphql_operations),
+            'source_maps': list(self.source_maps),
+            'libraries': self.libraries()
+        }
@@ -0,0 +1,282 @@
+"""
+Pooled, resilient client for the Pollinations text endpoint.
+
+One shared requests.Session (keep-alive connection pool), a semaphore that
+bounds concurrent upstream calls, jittered exponential backoff on 429/5xx and
+connection errors, and a circuit breaker that fails fast while the upstream
+is unhealthy. Per-call latency is kept for /health and /metrics.
+"""
+import json, random, threading, time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class LLMUnavailableError(Exception):
+    """The upstream cannot be called right now (busy or circuit open)"""
+
+class CircuitOpenError(LLMUnavailableError):
+    pass
+
+class LLMBusyError(LLMUnavailableError):
+    pass
+
+class LLMUpstreamError(Exception):
+    def __init__(self, status_code, text):
+        super().__init__(f"Pollinations API returned {status_code} | {text[:500]}")
+        self.status_code = status_code
+        self.text = text
+
+# ---------- Circuit Breaker ----------
+class CircuitBreaker:
+    """closed -> open after N consecutive failures -> half-open after a cooldown"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self.lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        with self.lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def cancel(self):
+        """Give back a half-open trial that never reached the upstream"""
+        with self.lock:
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+# ---------- Client ----------
+class LLMClient:
+    def __init__(self, url, api_key, timeout=60, max_concurrency=4, queue_timeout=30,
+                 max_retries=3, backoff_base=0.5, backoff_max=8.0,
+                 failure_threshold=5, reset_timeout=30):
+        self.url = url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_concurrency = max_concurrency
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "User-Agent": "Mozilla/5.0"
+        })
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+
+        self.stats_lock = threading.Lock()
+        self.latencies = deque(maxlen=1000)
+        self.counters = {
+            'calls': 0,
+            'successes': 0,
+            'failures': 0,
+            'retries': 0,
+            'short_circuited': 0,
+            'busy_rejected': 0,
+            'in_flight': 0
+        }
+        self.listeners = []
+
+    # ----- accounting -----
+    def _count(self, name, delta=1):
+        with self.stats_lock:
+            self.counters[name] += delta
+
+    def _observe(self, seconds, outcome):
+        with self.stats_lock:
+            self.latencies.append(seconds)
+        for listener in self.listeners:
+            listener(seconds, outcome)
+
+    def stats(self):
+        with self.stats_lock:
+            counters = dict(self.counters)
+            samples = sorted(self.latencies)
+
+        def pct(p):
+            if not samples:
+                return 0
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))], 3)
+
+        counters.update({
+            'circuit_state': self.breaker.state,
+            'max_concurrency': self.max_concurrency,
+            'latency_p50': pct(0.50),
+            'latency_p95': pct(0.95),
+            'latency_p99': pct(0.99)
+        })
+        return counters
+
+    # ----- core -----
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        # Full jitter: uniform(0, min(cap, base * 2^attempt))
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _acquire(self):
+        if not self.breaker.allow():
+            self._count('short_circuited')
+            raise CircuitOpenError("LLM upstream circuit is open, failing fast")
+        if not self.slots.acquire(timeout=self.queue_timeout):
+            self._count('busy_rejected')
+            self.breaker.cancel()
+            raise LLMBusyError("Too many concurrent LLM calls")
+        self._count('in_flight')
+
+    def _release(self):
+        self._count('in_flight', -1)
+        self.slots.release()
+
+    def _send(self, payload, stream):
+        """POST with retries; returns a 200 response (caller must close it)"""
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count('retries')
+            start = time.time()
+            try:
+                response = self.session.post(self.url, data=json.dumps(payload),
+                                             timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._observe(time.time() - start, 'error')
+                last_error = e
+                if attempt < self.max_retries:
+                    time.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code == 200:
+                return response, start
+
+            self._observe(time.time() - start, str(response.status_code))
+            last_error = LLMUpstreamError(response.status_code, response.text)
+            response.close()
+            if response.status_code not in RETRY_STATUSES:
+                break
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt, response))
+
+        raise last_error
+
+    def complete(self, prompt):
+        """Return the full completion text for a prompt"""
+        self._count('calls')
+        self._acquire()
+        try:
+            try:
+                response, start = self._send({"messages": [{"role": "user", "content": prompt}]}, False)
+            except Exception:
+                self._count('failures')
+                self.breaker.record_failure()
+                raise
+            text = response.text
+            self._observe(time.time() - start, 'ok')
+            self._count('successes')
+            self.breaker.record_success()
+            return text
+        finally:
+            self._release()
+
+    def stream(self, prompt):
+        """Yield completion text chunks as they arrive (OpenAI-style SSE or plain chunks)"""
+        self._count('calls')
+        self._acquire()
+        try:
+            try:
+                response, start = self._send({"messages": [{"role": "user", "content": prompt}],
+                                              "stream": True}, True)
+            except Exception:
+                self._count('failures')
+                self.breaker.record_failure()
+                raise
+
+            finished = False
+            with response:
+                try:
+                    for chunk in iter_stream_chunks(response):
+                        yield chunk
+                    finished = True
+                except Exception:
+                    finished = True
+                    self._count('failures')
+                    self.breaker.record_failure()
+                    raise
+                finally:
+                    if not finished:
+                        # Consumer went away mid-stream; not the upstream's fault
+                        self.breaker.cancel()
+            self._observe(time.time() - start, 'ok')
+            self._count('successes')
+            self.breaker.record_success()
+        finally:
+            self._release()
+
+def iter_stream_chunks(response):
+    """Decode a streamed completion body into text chunks"""
+    if 'text/event-stream' in response.headers.get('Content-Type', ''):
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith('data:'):
+                continue
+            payload = line[5:].strip()
+            if payload == '[DONE]':
+                break
+            try:
+                choice = json.loads(payload)['choices'][0]
+                chunk = (choice.get('delta') or choice.get('message') or {}).get('content')
+            except (ValueError, KeyError, IndexError, TypeError):
+                chunk = payload
+            if chunk:
+                yield chunk
+    else:
+        response.encoding = response.encoding or 'utf-8'
+        for chunk in response.iter_content(chunk_size=None, decode_unicode=True):
+            if chunk:
+                yield chunk
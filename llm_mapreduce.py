@@ -0,0 +1,175 @@
+"""
+Map-reduce LLM analysis for crawls too large for one prompt.
+
+map:    split extracted data into per-page and per-endpoint-group chunks that
+        each fit a prompt budget, analyse them in parallel (bounded by the
+        LLM client's concurrency slots and the caller's pool quota); past
+        max_chunks, an evenly spaced sample of the chunks is analysed
+reduce: parse every "Test Name - Endpoint" line, deduplicate, and keep the
+        most frequently suggested ones up to the final count
+"""
+import concurrent.futures, json, re
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+FINAL_TEST_CASES = 40
+CHUNK_TEST_CASES = 15
+
+TEST_CASE_LINE = re.compile(r'^\s*(?:\d+[.)]\s*|[-*•]\s+)?(.+?)\s+[-–—]\s+(\S.*?)\s*$')
+
+def build_chunk_prompt(context, chunk, n=CHUNK_TEST_CASES):
+    return (
+        f"Generate up to {n} realistic gray-box pentest test cases for this part of a website.\n"
+        "Format: Security Test Name - Endpoint\n"
+        "Only security test names, short and meaningful.\n"
+        "No generic labels, no explanations, no payloads.\n"
+        "Example:\n"
+        "CORS Misconfiguration - /login\n"
+        "Clickjacking Check - /dashboard\n\n"
+        f"Site context: {json.dumps(context)}\n"
+        f"Data: {json.dumps(chunk)}"
+    )
+
+# ---------- Map: chunking ----------
+def compact_page(page):
+    """Keep only the security-relevant parts of one extracted page"""
+    return {
+        'url': page.get('url'),
+        'title': page.get('title', ''),
+        'forms': [
+            {
+                'action': f.get('action', ''),
+                'method': f.get('method', 'GET'),
+                'inputs': [{'name': i.get('name', ''), 'type': i.get('type', '')} for i in f.get('inputs', [])]
+            }
+            for f in page.get('forms', [])
+        ],
+        'internal_links': [l.get('full_url') for l in page.get('links', {}).get('internal', []) if l.get('full_url')],
+        'scripts': [s.get('full_url') or s.get('src') for s in page.get('scripts', []) if s.get('src')],
+        'html_comments': page.get('html_comments', [])[:5]
+    }
+
+def endpoint_groups(urls):
+    """Group URLs by their first path segment (/api, /admin, ...)"""
+    groups = OrderedDict()
+    for url in urls:
+        if not isinstance(url, str):
+            continue
+        path = urlparse(url).path or '/'
+        head = '/' + path.strip('/').split('/')[0] if path.strip('/') else '/'
+        groups.setdefault(head, []).append(url)
+    return groups
+
+def split_extract_data(data, max_chars):
+    """Split /extract output into (context, [chunk, ...]) within max_chars each"""
+    summary = data.get('extraction_summary', {})
+    technical = data.get('technical_data', {})
+    structure = data.get('website_structure', {})
+
+    context = {
+        'mode': data.get('mode'),
+        'target_url': summary.get('target_url') or data.get('target_url'),
+        'technologies': technical.get('technology_hints') or data.get('tech_stack', []),
+        'headers': technical.get('headers') or data.get('security_headers', {})
+    }
+
+    units = [{'page': compact_page(page)} for page in structure.get('pages', [])]
+
+    urls = list(structure.get('all_urls', [])) + list(structure.get('sitemap_urls', [])) + list(data.get('endpoints', []))
+    for group, members in endpoint_groups(list(dict.fromkeys(urls))).items():
+        units.append({'endpoint_group': group, 'urls': members})
+
+    files = technical.get('detected_files') or {}
+    if files:
+        units.append({'exposed_files': {name: {'status': f.get('status'), 'size': f.get('size')} for name, f in files.items()}})
+
+    chunks = []
+    current = []
+    current_size = 0
+    for unit in units:
+        for piece in split_unit(unit, max_chars):
+            size = len(json.dumps(piece))
+            if current and current_size + size > max_chars:
+                chunks.append(current)
+                current, current_size = [], 0
+            current.append(piece)
+            current_size += size
+    if current:
+        chunks.append(current)
+
+    return context, chunks
+
+def split_unit(unit, max_chars):
+    """Break an oversized endpoint group into smaller URL batches"""
+    if len(json.dumps(unit)) <= max_chars or 'urls' not in unit:
+        return [unit]
+    pieces, batch = [], []
+    for url in unit['urls']:
+        batch.append(url)
+        if len(json.dumps(batch)) > max_chars // 2:
+            pieces.append({'endpoint_group': unit['endpoint_group'], 'urls': batch})
+            batch = []
+    if batch:
+        pieces.append({'endpoint_group': unit['endpoint_group'], 'urls': batch})
+    return pieces
+
+# ---------- Reduce: merge ----------
+def merge_test_cases(outputs, limit=FINAL_TEST_CASES):
+    """Deduplicate 'Name - Endpoint' lines across chunk outputs, most suggested first"""
+    seen = OrderedDict()
+    for text in outputs:
+        for line in (text or '').splitlines():
+            match = TEST_CASE_LINE.match(line)
+            if not match:
+                continue
+            name, endpoint = match.group(1).strip(' *'), match.group(2).strip(' *`')
+            key = (name.lower(), endpoint.lower().rstrip('/') or '/')
+            if key in seen:
+                seen[key]['count'] += 1
+            else:
+                seen[key] = {'line': f"{name} - {endpoint}", 'count': 1}
+
+    ranked = sorted(enumerate(seen.values()), key=lambda item: (-item[1]['count'], item[0]))
+    return [entry['line'] for _, entry in ranked[:limit]]
+
+def sample_chunks(chunks, max_chunks):
+    """At most max_chunks of chunks, evenly spaced so every part of the crawl is represented"""
+    if not max_chunks or len(chunks) <= max_chunks:
+        return chunks
+    return [chunks[i * len(chunks) // max_chunks] for i in range(max_chunks)]
+
+def map_reduce_llm(client, data, max_chars, limit=FINAL_TEST_CASES, pool=None, max_chunks=None):
+    """Analyse chunks in parallel through the client and merge the results
+
+    pool is a long-lived executor-like object with submit(); without one a
+    short-lived thread pool is created for this call. Page lists in data may
+    be iterators, so a stored crawl can be streamed in.
+    """
+    context, all_chunks = split_extract_data(data, max_chars)
+    chunks = sample_chunks(all_chunks, max_chunks) or [[]]
+
+    outputs = []
+    errors = []
+    executor = None
+    if pool is None:
+        pool = executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, min(client.max_concurrency, len(chunks))))
+    try:
+        futures = [pool.submit(client.complete, build_chunk_prompt(context, chunk)) for chunk in chunks]
+        for future in futures:
+            try:
+                outputs.append(future.result())
+            except Exception as e:
+                errors.append(str(e))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if not outputs:
+        raise RuntimeError(errors[0] if errors else 'no chunks analysed')
+
+    return "\n".join(merge_test_cases(outputs, limit)), {
+        'chunks': len(chunks),
+        'failed_chunks': len(errors),
+        'skipped_chunks': max(0, len(all_chunks) - len(chunks))
+    }
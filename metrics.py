@@ -0,0 +1,182 @@
+"""
+Minimal Prometheus-style metrics (text exposition format 0.0.4).
+
+Counters, gauges and histograms with optional labels, kept in one process
+wide registry and rendered by the /metrics endpoint.
+"""
+import threading, time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+REGISTRY = []
+
+def format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = [(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k, v in pairs]
+    return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{format_labels(self.label_names, key)} {format_value(value)}")
+        return lines
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels=(), callback=None):
+        super().__init__(name, documentation, labels)
+        self.callback = callback
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[self.key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        """Count something as in progress for the duration of the block"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def render(self):
+        if self.callback:
+            for labels, value in self.callback():
+                self.set(value, **labels)
+        return super().render()
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['buckets'][i] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            items = sorted((k, {'buckets': list(v['buckets']), 'sum': v['sum'], 'count': v['count']})
+                           for k, v in self.values.items())
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state['buckets']):
+                cumulative += count
+                labels = format_labels(self.label_names, key, ('le', format_value(float(bound))))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {format_value(round(state['sum'], 6))}")
+            lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+# ---------- Application Metrics ----------
+FETCH_SECONDS = Histogram('extractor_fetch_duration_seconds',
+                          'Outbound fetch latency by phase', ['phase'])
+FETCH_BYTES = Counter('extractor_fetch_bytes_total',
+                      'Response body bytes downloaded by phase', ['phase'])
+FETCH_STATUS = Counter('extractor_fetch_responses_total',
+                       'Outbound responses by phase and status class', ['phase', 'status'])
+OUTBOUND_ACTIVE = Gauge('extractor_outbound_connections',
+                        'Outbound fetches currently holding a connection slot')
+OUTBOUND_WAIT = Histogram('extractor_outbound_wait_seconds',
+                          'Time a fetch waited for an outbound connection slot, by phase', ['phase'],
+                          buckets=(0.0001, 0.001, 0.01, 0.05, 0.1, 0.5, 1, 5, 30))
+PARSE_SECONDS = Histogram('extractor_parse_duration_seconds',
+                          'Time spent in extract_all_data per page')
+PAGES_PER_SCAN = Histogram('extractor_pages_per_scan',
+                           'Pages extracted per deep_crawl',
+                           buckets=(1, 5, 10, 20, 30, 50, 100, 250, 1000))
+QUEUE_DEPTH = Gauge('extractor_crawl_queue_depth',
+                    'URLs waiting in deep_crawl queues across active crawls')
+QUEUE_DEPTH_MAX = Histogram('extractor_crawl_queue_depth_max',
+                            'Largest deep_crawl queue seen per crawl',
+                            buckets=(1, 10, 50, 100, 500, 1000, 5000, 10000, 100000))
+WORKERS_ACTIVE = Gauge('extractor_workers_busy',
+                       'Worker threads currently busy, by pool', ['pool'])
+WORKERS_CAPACITY = Gauge('extractor_workers_capacity',
+                         'Worker threads started, by pool', ['pool'])
+SCANS_ACTIVE = Gauge('extractor_scans_in_progress',
+                     'Extractions currently running, by mode', ['mode'])
+SCAN_SECONDS = Histogram('extractor_scan_duration_seconds',
+                         'End-to-end /extract duration by mode', ['mode'])
+CRAWL_SKIPPED = Counter('extractor_crawl_skipped_total',
+                        'URLs and pages deep_crawl skipped as duplicates, by reason', ['reason'])
+ERRORS = Counter('extractor_errors_total',
+                 'Swallowed exceptions by phase and exception type', ['phase', 'type'])
+PROCESS_THREADS = Gauge('extractor_process_threads', 'Live threads in this process',
+                        callback=lambda: [({}, threading.active_count())])
+
+def record_error(phase, exc):
+    ERRORS.inc(phase=phase, type=type(exc).__name__)
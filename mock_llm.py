@@ -0,0 +1,127 @@
+"""
+Local stand-in for the Pollinations text endpoint.
+
+Answers POST requests with deterministic pentest test cases. When the request
+body has "stream": true the answer is sent token by token as OpenAI-style
+server-sent events, otherwise as one plain-text body. --status and
+--fail-first simulate an unhealthy upstream for retry/circuit-breaker checks.
+
+    python mock_llm.py --port 6100 --delay 0.02
+    python mock_llm.py --port 6100 --fail-first 2     # two 503s, then healthy
+    POLLINATIONS_URL=http://127.0.0.1:6100/text python app.py
+"""
+import argparse, json, time, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TEST_CASES = [
+    "SQL Injection - /login",
+    "CORS Misconfiguration - /api",
+    "Clickjacking Check - /dashboard",
+    "Rate Limit Check - /forgot-password",
+    "Stored XSS - /comments",
+    "IDOR Check - /account",
+    "Open Redirect - /redirect",
+    "CSRF Token Validation - /profile",
+    "Directory Listing - /uploads",
+    "Sensitive File Exposure - /.env",
+]
+
+def build_answer(lines=40):
+    return "\n".join(TEST_CASES[i % len(TEST_CASES)] for i in range(lines))
+
+def tokenize(text):
+    """Split text into small word-ish tokens, keeping whitespace and newlines"""
+    tokens = []
+    current = ''
+    for ch in text:
+        current += ch
+        if ch in ' \n':
+            tokens.append(current)
+            current = ''
+    if current:
+        tokens.append(current)
+    return tokens
+
+def make_handler(delay, lines, status, fail_first=0):
+    state = {'requests': 0}
+    lock = threading.Lock()
+
+    class MockLLMHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        counters = state
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                body = {}
+
+            with lock:
+                state['requests'] += 1
+                seen = state['requests']
+
+            code = 503 if seen <= fail_first else status
+            if code != 200:
+                payload = f"mock upstream error {code}".encode()
+                self.send_response(code)
+                self.send_header('Content-Type', 'text/plain')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+
+            answer = build_answer(lines)
+
+            if not body.get('stream'):
+                payload = answer.encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+            for token in tokenize(answer):
+                event = {'choices': [{'delta': {'content': token}}]}
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                self.wfile.flush()
+                if delay:
+                    time.sleep(delay)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+    return MockLLMHandler
+
+def start_mock_llm(port=0, delay=0.0, lines=40, status=200, fail_first=0):
+    """Start the mock in a background thread; returns (server, base_url)
+
+    server.RequestHandlerClass.counters['requests'] counts calls received.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(delay, lines, status, fail_first))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/text"
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local stand-in LLM server')
+    parser.add_argument('--port', type=int, default=6100)
+    parser.add_argument('--delay', type=float, default=0.02, help='seconds between streamed tokens')
+    parser.add_argument('--lines', type=int, default=40, help='test cases per answer')
+    parser.add_argument('--status', type=int, default=200, help='force an HTTP status code')
+    parser.add_argument('--fail-first', type=int, default=0, help='answer 503 to the first N requests')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port),
+                                 make_handler(args.delay, args.lines, args.status, args.fail_first))
+    print(f"🧪 Mock LLM listening on http://127.0.0.1:{args.port}/text")
+    server.serve_forever()
@@ -0,0 +1,97 @@
+"""
+Per-scan learning of permanent origin redirects.
+
+When a site answers http://example.com/a with a 301/308 to
+https://www.example.com/a (same path and query, different scheme or host),
+every other URL on http://example.com would pay the same extra round-trip.
+OriginMap records such origin-to-origin redirects as fetches reveal them;
+fetch(..., origins=...) and the crawl frontier then rewrite URLs to the
+canonical origin before fetching, and count the round-trips saved.
+
+Redirects that change the path (to a login page, to "/") are not origin
+redirects and are never learned. Neither is a redirect to an unrelated host
+(an asset moved to a CDN), unless the start URL or "/" itself redirects
+there: only then has the whole site moved.
+"""
+import threading
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import metrics
+
+PERMANENT_REDIRECTS = (301, 308)
+MAX_CHAIN = 5
+
+ROUND_TRIPS_SAVED = metrics.Counter('extractor_redirect_round_trips_saved_total',
+                                    'Redirect round-trips avoided by rewriting to a learned canonical origin')
+
+def origin_of(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+def site_host(parts):
+    """Host without port or a leading www."""
+    host = (parts.hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+class OriginMap:
+    def __init__(self, start_url=None):
+        self.start = origin_of(start_url) + (urlsplit(start_url).path or '/') if start_url else None
+        self.redirects = {}   # origin -> origin it permanently redirects to
+        self.rewrites = 0
+        self.saved = 0
+        self.lock = threading.Lock()
+
+    def resolve(self, url):
+        """(url on its canonical origin, redirect hops that skips)"""
+        origin = origin_of(url)
+        hops = 0
+        with self.lock:
+            while origin in self.redirects and hops < MAX_CHAIN:
+                origin = self.redirects[origin]
+                hops += 1
+        if not hops:
+            return url, 0
+        target, parts = urlsplit(origin), urlsplit(url)
+        return urlunsplit((target.scheme, target.netloc, parts.path, parts.query, parts.fragment)), hops
+
+    def canonical(self, url):
+        return self.resolve(url)[0]
+
+    def rewrite(self, url):
+        """canonical(url), counted as saved round-trips; call only for URLs about to be fetched"""
+        url, hops = self.resolve(url)
+        if hops:
+            ROUND_TRIPS_SAVED.inc(hops)
+            with self.lock:
+                self.rewrites += 1
+                self.saved += hops
+        return url
+
+    def learn(self, resp):
+        """Record origin redirects among resp's hops; True when resp itself is one"""
+        is_origin_redirect = False
+        for hop in list(resp.history) + [resp]:
+            location = hop.headers.get('location')
+            if hop.status_code not in PERMANENT_REDIRECTS or not location:
+                continue
+            source, target = urlsplit(hop.url), urlsplit(urljoin(hop.url, location))
+            if (source.path or '/') != (target.path or '/') or source.query != target.query:
+                continue
+            if site_host(source) != site_host(target) and not self._moves_site(hop.url, source):
+                continue  # one asset moved to another host, not the site
+            old, new = origin_of(hop.url), origin_of(target.geturl())
+            if old == new or self.canonical(new + '/').startswith(old + '/'):
+                continue  # not an origin change, or it would loop
+            with self.lock:
+                self.redirects[old] = new
+            if hop is resp:
+                is_origin_redirect = True
+        return is_origin_redirect
+
+    def _moves_site(self, url, parts):
+        """A redirect of the start URL or "/" moves the whole site"""
+        return (parts.path or '/') == '/' or origin_of(url) + (parts.path or '/') == self.start
+
+    def report(self):
+        with self.lock:
+            return {'learned': dict(self.redirects), 'rewrites': self.rewrites, 'round_trips_saved': self.saved}
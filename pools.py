@@ -0,0 +1,98 @@
+"""
+Long-lived worker pools shared by every scan.
+
+Pools are created once at startup instead of per request, so thread start
+and teardown leave the request path and the total thread count is fixed.
+A scan submits through a Quota, which caps how many of its tasks are queued
+or running in a pool at once; one large crawl therefore cannot take every
+worker while other scans wait. Queue waits, queued tasks, saturation and
+quota throttling are exported per pool.
+"""
+import concurrent.futures, threading, time
+
+import metrics
+
+POOL_QUEUED = metrics.Gauge('extractor_pool_queued_tasks',
+                            'Tasks submitted to a shared pool but not started yet', ['pool'])
+POOL_QUEUE_WAIT = metrics.Histogram('extractor_pool_queue_wait_seconds',
+                                    'Time a task waited for a shared pool worker', ['pool'],
+                                    buckets=(0.0001, 0.001, 0.01, 0.05, 0.1, 0.5, 1, 5, 30))
+QUOTA_WAITS = metrics.Counter('extractor_pool_quota_waits_total',
+                              'Submissions that blocked on the per-scan quota', ['pool'])
+
+POOLS = []
+
+class SharedPool:
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=size,
+                                                              thread_name_prefix=f'{name}-pool')
+        self.busy = 0
+        self.queued = 0
+        self.lock = threading.Lock()
+        metrics.WORKERS_CAPACITY.set(size, pool=name)
+        POOLS.append(self)
+
+    def submit(self, fn, *args, **kwargs):
+        submitted = time.perf_counter()
+        with self.lock:
+            self.queued += 1
+        POOL_QUEUED.inc(pool=self.name)
+
+        def run():
+            POOL_QUEUE_WAIT.observe(time.perf_counter() - submitted, pool=self.name)
+            with self.lock:
+                self.queued -= 1
+                self.busy += 1
+            POOL_QUEUED.dec(pool=self.name)
+            metrics.WORKERS_ACTIVE.inc(pool=self.name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.WORKERS_ACTIVE.dec(pool=self.name)
+                with self.lock:
+                    self.busy -= 1
+
+        future = self.executor.submit(run)
+        future.add_done_callback(self._cancelled)
+        return future
+
+    def _cancelled(self, future):
+        # Cancelled tasks never reach run(), so take them out of the queue here
+        if future.cancelled():
+            with self.lock:
+                self.queued -= 1
+            POOL_QUEUED.dec(pool=self.name)
+
+    def quota(self, limit):
+        return Quota(self, limit)
+
+    def stats(self):
+        with self.lock:
+            return {'size': self.size, 'busy': self.busy, 'queued': self.queued,
+                    'saturation': round(self.busy / self.size, 2)}
+
+class Quota:
+    """One scan's share of a pool: at most `limit` tasks queued or running"""
+
+    def __init__(self, pool, limit):
+        self.pool = pool
+        self.limit = max(1, min(limit, pool.size))
+        self.slots = threading.BoundedSemaphore(self.limit)
+
+    def submit(self, fn, *args, **kwargs):
+        """Submit to the pool, blocking while this scan is at its limit"""
+        if not self.slots.acquire(blocking=False):
+            QUOTA_WAITS.inc(pool=self.pool.name)
+            self.slots.acquire()
+        try:
+            future = self.pool.submit(fn, *args, **kwargs)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+metrics.Gauge('extractor_pool_saturation', 'Busy workers as a fraction of pool size', ['pool'],
+              callback=lambda: [({'pool': pool.name}, pool.busy / pool.size) for pool in POOLS])
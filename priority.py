@@ -0,0 +1,140 @@
+"""
+Security-relevance scores for crawl frontier URLs.
+
+With a page budget of a few dozen, the order URLs are fetched in decides
+what a scan sees. score_url() ranks a URL from its path and query alone:
+login, admin, API, upload and account routes and parameterised URLs go up;
+static assets, blog/news listings and deep paths go down.
+
+PriorityScorer adds what the crawl learns on the way. Once a page turns out
+to hold forms, the URLs those forms submit to, the links on that page and
+other URLs of the page's route template are boosted; note_forms() reports
+when a new form target or template was learned, so the frontier knows when
+to re-rank what is already queued.
+
+Scores are compared on path and query only, so a URL keeps its score when
+it is moved to a learned canonical origin.
+"""
+import re
+from urllib.parse import urljoin, urlsplit, parse_qsl
+
+from dedup import canonicalize_url
+from url_templates import url_template
+
+# (pattern on path segments, boost); a URL takes the best matching boost
+PATH_BOOSTS = [
+    (re.compile(r'log-?in|log-?on|sign-?in|sign-?up|register|auth|oauth|sso|password|passwd|reset|forgot'), 50),
+    (re.compile(r'admin|administrator|dashboard|manage|manager|console|panel|wp-admin|backend|staff'), 45),
+    (re.compile(r'^api$|^rest$|graphql|^v\d+$|swagger|openapi|\.json$|^rpc$|jsonrpc'), 40),
+    (re.compile(r'upload|import|attachment|^files?$|media-upload'), 35),
+    (re.compile(r'account|profile|settings|user|member|cart|checkout|billing|payment|order'), 30),
+    (re.compile(r'debug|config|backup|phpinfo|^status$|\.env|internal|^test'), 25),
+    (re.compile(r'search|redirect|callback|return|download|export|proxy|webhook'), 20),
+]
+LOW_VALUE_SEGMENTS = re.compile(r'^(blog|news|tag|tags|category|categories|archive|archives|press|page|author|feed)$')
+STATIC_EXTENSIONS = ('.css', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.webp', '.avif', '.bmp',
+                     '.woff', '.woff2', '.ttf', '.eot', '.otf', '.mp4', '.webm', '.mp3', '.wav', '.pdf',
+                     '.zip', '.gz', '.map')
+SENSITIVE_PARAMS = {'id', 'uid', 'user', 'file', 'filename', 'path', 'dir', 'url', 'uri', 'redirect',
+                    'redirect_uri', 'next', 'return', 'returnurl', 'callback', 'q', 'query', 'search', 'cmd',
+                    'exec', 'page', 'template', 'include', 'token', 'key', 'debug', 'admin'}
+
+PARAM_BOOST = 10          # per query parameter
+SENSITIVE_PARAM_BOOST = 5  # extra for names that are usually worth probing
+MAX_PARAM_BOOST = 40
+STATIC_PENALTY = -40
+LOW_VALUE_PENALTY = -15
+DEPTH_PENALTY = -2        # per path segment beyond MAX_FREE_DEPTH
+MAX_FREE_DEPTH = 3
+
+FORM_TARGET_BOOST = 40    # a form on a crawled page submits here
+FORM_TEMPLATE_BOOST = 25  # same route template as a page that had forms
+FORM_PAGE_LINK_BOOST = 10  # linked from a page that had forms
+MAX_LEARNED = 20000       # learned routes kept per crawl
+HIGH_VALUE_SCORE = 30     # counted as high-value in crawl stats
+START_SCORE = 1000        # the start page is fetched first: its links and forms seed the ranking
+
+def route(url):
+    """path?query of the canonical URL, so origin rewrites keep scores stable"""
+    parts = urlsplit(canonicalize_url(url))
+    return f'{parts.path or "/"}?{parts.query}' if parts.query else (parts.path or '/')
+
+def score_url(url):
+    """Static relevance of a URL from its path and query"""
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return 0
+    path = parts.path.lower()
+    segments = [s for s in path.split('/') if s]
+    if path.endswith(STATIC_EXTENSIONS):
+        return STATIC_PENALTY
+
+    score = 0
+    for pattern, boost in PATH_BOOSTS:
+        if boost > score and any(pattern.search(segment) for segment in segments):
+            score = boost
+    if any(LOW_VALUE_SEGMENTS.match(segment) for segment in segments):
+        score += LOW_VALUE_PENALTY
+    if len(segments) > MAX_FREE_DEPTH:
+        score += DEPTH_PENALTY * (len(segments) - MAX_FREE_DEPTH)
+
+    if parts.query:
+        names = {name.lower() for name, _ in parse_qsl(parts.query, keep_blank_values=True)}
+        param_score = sum(PARAM_BOOST + (SENSITIVE_PARAM_BOOST if name in SENSITIVE_PARAMS else 0)
+                          for name in names)
+        score += min(param_score, MAX_PARAM_BOOST)
+    return score
+
+class PriorityScorer:
+    """score_url() plus boosts learned from the forms found during a crawl"""
+
+    def __init__(self, start_url=None):
+        self.start = route(start_url) if start_url else None
+        self.form_targets = set()     # routes forms submit to
+        self.form_templates = set()   # route templates of pages with forms
+        self.form_page_links = set()  # routes linked from pages with forms
+        self.high_value_fetched = 0
+
+    def score(self, url):
+        key = route(url)
+        if key == self.start:
+            return START_SCORE
+        score = score_url(url)
+        if key in self.form_targets:
+            score += FORM_TARGET_BOOST
+        elif key in self.form_page_links:
+            score += FORM_PAGE_LINK_BOOST
+        if url_template(key) in self.form_templates:
+            score += FORM_TEMPLATE_BOOST
+        return score
+
+    def _learn(self, learned, item):
+        if item in learned or len(learned) >= MAX_LEARNED:
+            return False
+        learned.add(item)
+        return True
+
+    def note_forms(self, page_url, forms, links=()):
+        """Learn from a page's forms; True when a new form target or template may re-rank queued URLs"""
+        if not forms:
+            return False
+        changed = self._learn(self.form_templates, url_template(route(page_url)))
+        for form in forms:
+            target = urljoin(page_url, form.get('action') or '')
+            changed |= self._learn(self.form_targets, route(target))
+        # The page's own links are mostly enqueued right after this, already boosted
+        for link in links:
+            self._learn(self.form_page_links, route(link))
+        return changed
+
+    def note_fetched(self, url):
+        if HIGH_VALUE_SCORE <= self.score(url) < START_SCORE:
+            self.high_value_fetched += 1
+
+    def report(self):
+        return {
+            'form_targets': len(self.form_targets),
+            'form_templates': len(self.form_templates),
+            'high_value_fetched': self.high_value_fetched,
+        }
@@ -0,0 +1,144 @@
+"""
+Opt-in per-request profiling ("profile": true on /extract and /llm).
+
+A Profile collects a timing tree of named spans across the request thread
+and any worker threads started through wrap(), plus a sampled stack profile
+(sys._current_frames every SAMPLE_INTERVAL) summarised as top functions.
+When no profile is active, span() and wrap() return shared no-op objects so
+the normal path pays one thread-local lookup.
+"""
+import contextlib, os, sys, threading, time
+from collections import Counter
+
+SAMPLE_INTERVAL = 0.005
+TOP_FUNCTIONS = 15
+
+_local = threading.local()
+_NULL_SPAN = contextlib.nullcontext()
+
+def active():
+    return getattr(_local, 'profile', None)
+
+def span(name, **attrs):
+    """Time a block as a child of the current span (no-op when not profiling)"""
+    profile = getattr(_local, 'profile', None)
+    if profile is None:
+        return _NULL_SPAN
+    return _Span(profile, name, attrs)
+
+def wrap(fn, name=None):
+    """Carry the caller's profile (and current span) into another thread"""
+    profile = getattr(_local, 'profile', None)
+    if profile is None:
+        return fn
+    parent = _local.stack[-1]
+
+    def run(*args, **kwargs):
+        _local.profile = profile
+        _local.stack = [parent]
+        profile.threads.add(threading.get_ident())
+        try:
+            if name:
+                with span(name):
+                    return fn(*args, **kwargs)
+            return fn(*args, **kwargs)
+        finally:
+            profile.threads.discard(threading.get_ident())
+            _local.profile = None
+            _local.stack = []
+    return run
+
+class _Span:
+    __slots__ = ('profile', 'node', 'start')
+
+    def __init__(self, profile, name, attrs):
+        self.profile = profile
+        self.node = {'name': name, 'children': []}
+        if attrs:
+            self.node.update(attrs)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.node['start_ms'] = round((self.start - self.profile.started) * 1000, 2)
+        parent = _local.stack[-1]
+        with self.profile.lock:
+            parent['children'].append(self.node)
+        _local.stack.append(self.node)
+        return self.node
+
+    def __exit__(self, *exc):
+        self.node['duration_ms'] = round((time.perf_counter() - self.start) * 1000, 2)
+        _local.stack.pop()
+        if not self.node['children']:
+            del self.node['children']
+        return False
+
+class Profile:
+    def __init__(self, name='request', interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.root = {'name': name, 'start_ms': 0, 'children': []}
+        self.threads = set()
+        self.self_samples = Counter()
+        self.total_samples = Counter()
+        self.samples = 0
+        self.stop_event = threading.Event()
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        _local.profile = self
+        _local.stack = [self.root]
+        self.threads.add(threading.get_ident())
+        self.sampler = threading.Thread(target=self._sample, daemon=True)
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.root['duration_ms'] = round((time.perf_counter() - self.started) * 1000, 2)
+        self.stop_event.set()
+        self.sampler.join()
+        self.threads.discard(threading.get_ident())
+        _local.profile = None
+        _local.stack = []
+        return False
+
+    def _sample(self):
+        while not self.stop_event.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in list(self.threads):
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                self.samples += 1
+                self.self_samples[frame_label(frame)] += 1
+                seen = set()
+                while frame is not None:
+                    label = frame_label(frame)
+                    if label not in seen:
+                        seen.add(label)
+                        self.total_samples[label] += 1
+                    frame = frame.f_back
+
+    def report(self):
+        samples = self.samples or 1
+        return {
+            'total_ms': self.root.get('duration_ms'),
+            'timing_tree': self.root,
+            'cpu_profile': {
+                'interval_ms': self.interval * 1000,
+                'samples': self.samples,
+                'top_functions': [
+                    {
+                        'function': label,
+                        'self_samples': count,
+                        'self_pct': round(100.0 * count / samples, 1),
+                        'total_pct': round(100.0 * self.total_samples[label] / samples, 1)
+                    }
+                    for label, count in self.self_samples.most_common(TOP_FUNCTIONS)
+                ]
+            }
+        }
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
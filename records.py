@@ -0,0 +1,145 @@
+"""
+Compact record types for extracted pages.
+
+extract_all_data used to build one deep tree of plain dicts per page, with
+every link, image, input and option repeating the same string keys in its
+own hash table. These __slots__ classes store the same fields as fixed
+attributes; the JSON keys live once on the class. Short, highly repeated
+values (tag names, input types, methods, rel/class tokens) are interned.
+
+Records stay records while a scan runs and are turned into plain dicts
+only at the response boundary, via to_dict() or json_default().
+"""
+import sys
+
+_MISSING = object()
+
+def intern_str(value):
+    """Intern short strings that repeat across pages (types, methods, tags)"""
+    if isinstance(value, str) and len(value) <= 32:
+        return sys.intern(str(value))
+    return value
+
+def intern_tokens(values):
+    """Attribute token lists (class, rel) as a tuple of interned strings"""
+    if not values:
+        return ()
+    if isinstance(values, str):
+        values = values.split()
+    return tuple(intern_str(v) for v in values)
+
+def to_plain(value):
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, (list, tuple)):
+        return [to_plain(v) for v in value]
+    if isinstance(value, dict):
+        return {k: to_plain(v) for k, v in value.items()}
+    return value
+
+def json_default(value):
+    """json `default` hook: records serialize as their dict form"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class Record:
+    """Base for slotted records; unset slots are omitted from to_dict()"""
+    __slots__ = ()
+    # slot name -> JSON key, for keys that are Python keywords
+    _renames = {}
+
+    def __init__(self, *args, **kwargs):
+        for name, value in zip(self.__slots__, args):
+            setattr(self, name, value)
+        for name, value in kwargs.items():
+            setattr(self, name, value)
+
+    def to_dict(self):
+        out = {}
+        renames = self._renames
+        for name in self.__slots__:
+            value = getattr(self, name, _MISSING)
+            if value is not _MISSING:
+                out[renames.get(name, name)] = to_plain(value)
+        return out
+
+    def get(self, key, default=None):
+        """dict-style read access using the JSON key"""
+        for name, json_key in self._renames.items():
+            if json_key == key:
+                key = name
+                break
+        return getattr(self, key, default)
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+class LinkRecord(Record):
+    __slots__ = ('text', 'href', 'full_url', 'title', 'rel')
+
+class LinksRecord(Record):
+    __slots__ = ('total', 'internal', 'external')
+
+class ImageRecord(Record):
+    __slots__ = ('src', 'alt', 'title', 'width', 'height', 'full_url')
+
+class ScriptRecord(Record):
+    __slots__ = ('src', 'type', 'async_', 'defer', 'has_content', 'content_length', 'full_url')
+    _renames = {'async_': 'async'}
+
+class StylesheetRecord(Record):
+    __slots__ = ('href', 'media', 'full_url', 'inline', 'content_length')
+
+class OptionRecord(Record):
+    __slots__ = ('value', 'text', 'selected')
+
+class InputRecord(Record):
+    __slots__ = ('tag', 'type', 'name', 'id', 'class_', 'placeholder', 'value', 'required',
+                 'disabled', 'readonly', 'maxlength', 'minlength', 'pattern', 'autocomplete',
+                 'aria_label', 'options')
+    _renames = {'class_': 'class'}
+
+class ButtonRecord(Record):
+    __slots__ = ('type', 'name', 'value', 'text')
+
+class LabelRecord(Record):
+    __slots__ = ('for_', 'text')
+    _renames = {'for_': 'for'}
+
+class FormRecord(Record):
+    __slots__ = ('action', 'method', 'enctype', 'target', 'id', 'name', 'class_',
+                 'inputs', 'buttons', 'labels')
+    _renames = {'class_': 'class'}
+
+class HeadingRecord(Record):
+    __slots__ = ('text', 'id', 'class_')
+    _renames = {'class_': 'class'}
+
+class TableRecord(Record):
+    __slots__ = ('id', 'class_', 'caption', 'headers', 'rows')
+    _renames = {'class_': 'class'}
+
+class ListRecord(Record):
+    __slots__ = ('type', 'id', 'class_', 'items')
+    _renames = {'class_': 'class'}
+
+class TextContentRecord(Record):
+    __slots__ = ('lines', 'paragraphs', 'most_common_words', 'longest_words')
+
+class PerformanceRecord(Record):
+    __slots__ = ('html_size', 'image_count', 'script_count', 'stylesheet_count', 'dom_elements')
+
+class PageRecord(Record):
+    __slots__ = ('url', 'title', 'meta_description', 'meta_keywords', 'word_count',
+                 'character_count', 'language', 'doctype', 'response_headers', 'status_code',
+                 'meta_tags', 'links', 'images', 'scripts', 'stylesheets', 'forms', 'headings',
+                 'tables', 'lists', 'html_comments', 'text_content', 'structured_data',
+                 'open_graph', 'twitter_cards', 'technology_hints', 'performance',
+                 'content_digest')
@@ -0,0 +1,165 @@
+"""
+Compressed, incrementally serialized JSON responses.
+
+json_response() negotiates br (when the optional brotli package is
+installed) or gzip from Accept-Encoding and streams the body: the payload is
+walked a few levels deep and each leaf value is encoded with the C JSON
+encoder, so only one leaf (for example one page record) is held as a string
+at a time. Encoded text is compressed in COMPRESS_CHUNK blocks. Raw bytes,
+wire bytes and the largest buffered block are recorded per response.
+"""
+import json, time, zlib
+
+from flask import Response, request
+
+import metrics
+from records import Record, json_default
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_CHUNK = 64 * 1024   # encoded bytes buffered before each compress() call
+STREAM_DEPTH = 3             # dict/list levels walked before encoding a value whole
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+RESPONSE_RAW_BYTES = metrics.Histogram('extractor_response_raw_bytes',
+                                       'Serialized JSON bytes per response before compression',
+                                       ['encoding'], buckets=BYTE_BUCKETS)
+RESPONSE_WIRE_BYTES = metrics.Histogram('extractor_response_wire_bytes',
+                                        'JSON response bytes on the wire after compression',
+                                        ['encoding'], buckets=BYTE_BUCKETS)
+RESPONSE_BUFFER_PEAK = metrics.Histogram('extractor_response_buffer_peak_bytes',
+                                         'Largest serialized block held in memory per response',
+                                         buckets=BYTE_BUCKETS)
+RESPONSE_SERIALIZE_SECONDS = metrics.Histogram('extractor_response_serialize_seconds',
+                                               'Time spent encoding and compressing a response body',
+                                               ['encoding'])
+
+def choose_encoding(accept_encodings):
+    """Pick br, gzip or identity from a werkzeug Accept object"""
+    if brotli is not None and accept_encodings.quality('br') > 0:
+        return 'br'
+    if accept_encodings.quality('gzip') > 0:
+        return 'gzip'
+    return 'identity'
+
+def iter_json(value, encoder, depth=STREAM_DEPTH):
+    """Yield JSON text for value, streaming containers down to `depth` levels"""
+    if isinstance(value, Record):
+        value = value.to_dict()
+    if depth <= 0 or not isinstance(value, (dict, list, tuple)) or not value:
+        yield encoder.encode(value)
+        return
+
+    if isinstance(value, dict):
+        items = sorted(value.items()) if encoder.sort_keys else value.items()
+        yield '{'
+        first = True
+        for key, item in items:
+            yield ('' if first else encoder.item_separator) + encoder.encode(str(key)) + encoder.key_separator
+            first = False
+            yield from iter_json(item, encoder, depth - 1)
+        yield '}'
+    else:
+        yield '['
+        for i, item in enumerate(value):
+            if i:
+                yield encoder.item_separator
+            yield from iter_json(item, encoder, depth - 1)
+        yield ']'
+
+class _Compressor:
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'gzip':
+            self.impl = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        elif encoding == 'br':
+            self.impl = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self.impl = None
+
+    def compress(self, data):
+        if self.impl is None:
+            return data
+        if self.encoding == 'br':
+            return self.impl.process(data)
+        return self.impl.compress(data)
+
+    def flush(self):
+        if self.impl is None:
+            return b''
+        if self.encoding == 'br':
+            return self.impl.finish()
+        return self.impl.flush()
+
+def generate_body(payload, encoder, encoding):
+    compressor = _Compressor(encoding)
+    stats = {'raw': 0, 'wire': 0, 'peak': 0, 'seconds': 0.0}
+    buffer = []
+    buffered = 0
+
+    def drain():
+        data = ''.join(buffer).encode('utf-8')
+        buffer.clear()
+        stats['raw'] += len(data)
+        stats['peak'] = max(stats['peak'], len(data))
+        return compressor.compress(data)
+
+    try:
+        start = time.perf_counter()
+        for piece in iter_json(payload, encoder):
+            buffer.append(piece)
+            buffered += len(piece)
+            if buffered >= COMPRESS_CHUNK:
+                buffered = 0
+                out = drain()
+                stats['seconds'] += time.perf_counter() - start
+                if out:
+                    stats['wire'] += len(out)
+                    yield out
+                start = time.perf_counter()
+        out = drain() + compressor.flush() + (b'\n' if encoding == 'identity' else b'')
+        stats['seconds'] += time.perf_counter() - start
+        stats['wire'] += len(out)
+        yield out
+    finally:
+        RESPONSE_RAW_BYTES.observe(stats['raw'], encoding=encoding)
+        RESPONSE_WIRE_BYTES.observe(stats['wire'], encoding=encoding)
+        RESPONSE_BUFFER_PEAK.observe(stats['peak'])
+        RESPONSE_SERIALIZE_SECONDS.observe(stats['seconds'], encoding=encoding)
+
+def json_response(app, payload, status=200, stream=True):
+    """Streamed, content-negotiated JSON response (drop-in for jsonify)"""
+    provider = app.json
+    provider_default = getattr(provider, 'default', None)
+
+    def default(value):
+        if isinstance(value, Record):
+            return json_default(value)
+        if provider_default is None:
+            raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+        return provider_default(value)
+
+    encoder = json.JSONEncoder(
+        ensure_ascii=getattr(provider, 'ensure_ascii', True),
+        sort_keys=getattr(provider, 'sort_keys', True),
+        default=default,
+        separators=(',', ':')
+    )
+    encoding = choose_encoding(request.accept_encodings)
+
+    body = generate_body(payload, encoder, encoding)
+    if not stream:
+        body = [b''.join(body)]
+
+    response = Response(body, status=status, mimetype='application/json')
+    response.json_payload = payload
+    response.headers['Vary'] = 'Accept-Encoding'
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,173 @@
+"""
+Server-side storage of a scan's full output, read back in cursor-paginated
+chunks.
+
+/extract returns only a sample of what a crawl computes (five pages, a
+hundred URLs). A ResultWriter streams every item as the scan produces it
+into one SQLite file per scan:
+
+  pages   full page records
+  urls    every discovered URL
+  forms   every form, with the page it was found on
+  files   exposed files from scan_all_files
+
+Items are stored as JSON in insertion order and read with keyset
+pagination (seq > cursor), so each page costs the same however deep the
+client is. Files live in a shared directory, so any gunicorn worker can serve
+a scan another worker ran, and are deleted ttl seconds after the scan. The
+directory must belong to the current user and be closed to everyone else.
+"""
+import base64, binascii, json, os, re, sqlite3, threading, time
+
+import metrics
+from records import json_default
+from cache import private_directory
+
+KINDS = ('pages', 'urls', 'forms', 'files')
+FLUSH_EVERY = 200        # items buffered before a write transaction
+SWEEP_INTERVAL = 60      # seconds between expiry sweeps (per process)
+
+RESULT_ITEMS = metrics.Counter('extractor_result_items_total', 'Scan result items stored, by kind', ['kind'])
+RESULT_READS = metrics.Counter('extractor_result_reads_total', 'Paginated result reads, by kind', ['kind'])
+
+_SCAN_ID = re.compile(r'^[0-9a-f]{32}$')
+
+SCHEMA = '''
+    CREATE TABLE items (seq INTEGER PRIMARY KEY, kind TEXT NOT NULL, data TEXT NOT NULL);
+    CREATE INDEX items_kind ON items (kind, seq);
+    CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+'''
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(seq):
+    return base64.urlsafe_b64encode(str(seq).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    if not cursor:
+        return 0
+    try:
+        return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}")
+
+class ResultWriter:
+    """Appends one scan's items; safe to call from several threads, and a no-op once closed"""
+
+    def __init__(self, path, scan_id, target_url):
+        self.path = path
+        self.scan_id = scan_id
+        self.counts = dict.fromkeys(KINDS, 0)
+        self.buffer = []
+        self.lock = threading.Lock()
+        self.closed = False
+        self.conn = sqlite3.connect(path + '.tmp', check_same_thread=False)
+        self.conn.execute('PRAGMA synchronous=OFF')
+        self.conn.executescript(SCHEMA)
+        self.meta = {'scan_id': scan_id, 'target_url': target_url, 'created': time.time()}
+
+    def add(self, kind, item):
+        with self.lock:
+            if self.closed:
+                return   # a crawl that overran the scan timeout is still reporting pages
+            self.counts[kind] += 1
+            self.buffer.append((kind, item))
+            if len(self.buffer) >= FLUSH_EVERY:
+                self._flush()
+
+    def _flush(self):
+        rows = [(kind, json.dumps(item, default=json_default, separators=(',', ':')))
+                for kind, item in self.buffer]
+        self.buffer = []
+        with self.conn:
+            self.conn.executemany('INSERT INTO items (kind, data) VALUES (?, ?)', rows)
+
+    def close(self, complete=True):
+        """Finish the file and publish it; returns the per-kind counts"""
+        with self.lock:
+            self.closed = True
+            self._flush()
+            meta = dict(self.meta, complete=complete, counts=self.counts)
+            with self.conn:
+                self.conn.executemany('INSERT INTO meta (key, value) VALUES (?, ?)',
+                                      [(key, json.dumps(value)) for key, value in meta.items()])
+            self.conn.close()
+            os.replace(self.path + '.tmp', self.path)
+        for kind, count in self.counts.items():
+            RESULT_ITEMS.inc(count, kind=kind)
+        return dict(self.counts)
+
+    def abort(self):
+        with self.lock:
+            self.closed = True
+            self.conn.close()
+        try:
+            os.remove(self.path + '.tmp')
+        except OSError:
+            pass
+
+class ResultStore:
+    def __init__(self, directory, ttl):
+        self.directory = directory
+        self.ttl = ttl
+        self.last_sweep = 0
+        private_directory(directory)   # raises PermissionError if another user owns or can read it
+
+    def _path(self, scan_id):
+        if not _SCAN_ID.match(scan_id or ''):
+            return None
+        return os.path.join(self.directory, f'{scan_id}.sqlite3')
+
+    def writer(self, scan_id, target_url):
+        self.sweep()
+        return ResultWriter(self._path(scan_id), scan_id, target_url)
+
+    def sweep(self):
+        """Delete result files older than ttl (throttled to once per SWEEP_INTERVAL)"""
+        now = time.time()
+        if now - self.last_sweep < SWEEP_INTERVAL:
+            return
+        self.last_sweep = now
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.path.getmtime(path) > self.ttl:
+                    os.remove(path)
+            except OSError:
+                pass  # another worker removed it first
+
+    def _open(self, scan_id):
+        path = self._path(scan_id)
+        if path is None or not os.path.exists(path):
+            return None
+        if time.time() - os.path.getmtime(path) > self.ttl:
+            return None
+        return sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+
+    def meta(self, scan_id):
+        """Scan summary (target, counts, completeness, expiry), or None"""
+        conn = self._open(scan_id)
+        if conn is None:
+            return None
+        try:
+            meta = {key: json.loads(value) for key, value in conn.execute('SELECT key, value FROM meta')}
+        finally:
+            conn.close()
+        meta['expires'] = meta['created'] + self.ttl
+        return meta
+
+    def page(self, scan_id, kind, cursor=None, limit=50):
+        """(items, next_cursor) after cursor, or None when the scan is unknown or expired"""
+        after = decode_cursor(cursor)
+        conn = self._open(scan_id)
+        if conn is None:
+            return None
+        try:
+            rows = conn.execute('SELECT seq, data FROM items WHERE kind = ? AND seq > ? ORDER BY seq LIMIT ?',
+                                (kind, after, limit + 1)).fetchall()
+        finally:
+            conn.close()
+        RESULT_READS.inc(kind=kind)
+        next_cursor = encode_cursor(rows[limit - 1][0]) if len(rows) > limit else None
+        return [json.loads(data) for _, data in rows[:limit]], next_cursor
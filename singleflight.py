@@ -0,0 +1,69 @@
+"""
+Single-flight request coalescing.
+
+SingleFlight.do(key, fn) runs fn once per key at a time: callers that arrive
+while a call for the same key is running block until it finishes and get the
+same result (or the same exception) instead of starting their own. Results
+are shared objects, so callers must not mutate them.
+
+Coalescing is per process; across gunicorn workers, requests arriving after
+a scan completes are served by the shared cache instead.
+"""
+import threading
+
+import metrics
+
+COALESCED_REQUESTS = metrics.Counter('extractor_coalesced_requests_total',
+                                     'Requests served by attaching to an identical in-flight call',
+                                     ['flight'])
+COALESCED_WAITERS = metrics.Gauge('extractor_coalesced_waiters',
+                                  'Requests currently waiting on an identical in-flight call',
+                                  ['flight'])
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Return (result, shared); shared is True when another caller ran fn"""
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            COALESCED_REQUESTS.inc(flight=self.name)
+            with COALESCED_WAITERS.track(flight=self.name):
+                call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        with self.lock:
+            return {'calls': len(self.calls), 'waiters': sum(c.waiters for c in self.calls.values())}
@@ -0,0 +1,178 @@
+"""
+Structural snapshots of advanced scans, and diffs between two of them.
+
+A snapshot keeps what monitoring cares about, in a form that compares
+cheaply:
+
+  pages         url -> body digest, title, status and form signatures (capped)
+  urls          every discovered URL (capped)
+  files         exposed files from scan_all_files -> status, size, preview digest
+  headers       target response headers, minus per-response noise (Date, ...)
+  technologies  technology hints and script library fingerprints
+
+diff_snapshots() reports only added, removed and changed items. Pages whose
+body digest is unchanged are skipped without looking further.
+
+Pages and URLs beyond MAX_PAGES / MAX_URLS are left out: the snapshot keeps
+the lexicographically first ones so that two scans of the same site keep the
+same set. It records how many were dropped, and diffs report the limits.
+"""
+import hashlib, threading, time, uuid
+
+MAX_PAGES = 5000
+MAX_URLS = 20000
+
+# Headers that differ on every response and say nothing about the target
+VOLATILE_HEADERS = frozenset((
+    'date', 'expires', 'age', 'last-modified', 'etag', 'set-cookie', 'content-length',
+    'x-request-id', 'x-correlation-id', 'x-runtime', 'x-response-time', 'server-timing',
+    'cf-ray', 'x-amz-cf-id', 'x-amz-request-id', 'x-cache', 'x-cache-hits', 'x-served-by',
+    'x-timer', 'via', 'report-to', 'nel', 'x-vercel-id', 'x-github-request-id',
+))
+
+def form_signature(form):
+    """'METHOD action' for a form record"""
+    return f"{(form.get('method') or 'GET').upper()} {form.get('action') or ''}"
+
+def form_inputs(form):
+    return sorted({field.get('name') for field in form.get('inputs') or [] if field.get('name')})
+
+def page_summary(page):
+    forms = {}
+    for form in page.get('forms') or []:
+        forms.setdefault(form_signature(form), set()).update(form_inputs(form))
+    return {
+        'digest': page.get('content_digest'),
+        'title': page.get('title'),
+        'status_code': page.get('status_code'),
+        'forms': {signature: sorted(names) for signature, names in forms.items()}
+    }
+
+class SnapshotBuilder:
+    """Collects page summaries as a crawl runs (on_page may be called from pool threads)"""
+
+    def __init__(self, max_pages=MAX_PAGES):
+        self.max_pages = max_pages
+        self.pages = {}
+        self.seen_pages = 0
+        self.lock = threading.Lock()
+
+    def add_page(self, page):
+        summary = page_summary(page)
+        with self.lock:
+            self.pages[page.get('url')] = summary
+            self.seen_pages += 1
+            # Prune to the first max_pages URLs once twice as many are held
+            if len(self.pages) >= 2 * self.max_pages:
+                self._prune()
+
+    def _prune(self):
+        self.pages = {url: self.pages[url] for url in sorted(self.pages)[:self.max_pages]}
+
+    def build(self, target_url, urls, files, headers, technologies):
+        with self.lock:
+            self._prune()
+            pages = dict(self.pages)
+            dropped_pages = self.seen_pages - len(pages)
+        urls = sorted(urls)
+        return {
+            'version': 1,
+            'target_url': target_url,
+            'created': time.time(),
+            'pages': pages,
+            'urls': urls[:MAX_URLS],
+            'truncated': {'pages': dropped_pages, 'urls': max(0, len(urls) - MAX_URLS)},
+            'files': {name: {'status': info.get('status'), 'size': info.get('size'),
+                             'digest': hashlib.sha256((info.get('content_preview') or '').encode('utf-8'))
+                                              .hexdigest()[:16]}
+                      for name, info in files.items()},
+            'headers': {name.lower(): value for name, value in headers.items()
+                        if name.lower() not in VOLATILE_HEADERS},
+            'technologies': sorted(set(technologies))
+        }
+
+def _keyed_diff(before, after, changed=None):
+    """added / removed / changed between two dicts; changed(key, old, new) -> detail or None"""
+    result = {
+        'added': {key: after[key] for key in after.keys() - before.keys()},
+        'removed': {key: before[key] for key in before.keys() - after.keys()},
+        'changed': {}
+    }
+    for key in before.keys() & after.keys():
+        if before[key] != after[key]:
+            detail = changed(key, before[key], after[key]) if changed else {'before': before[key],
+                                                                             'after': after[key]}
+            if detail:
+                result['changed'][key] = detail
+    return result
+
+def _set_diff(before, after):
+    before, after = set(before), set(after)
+    return {'added': sorted(after - before), 'removed': sorted(before - after)}
+
+def _drop_empty(diff):
+    return {key: value for key, value in diff.items() if value}
+
+def _page_change(url, old, new):
+    if old['digest'] and old['digest'] == new['digest']:
+        return None
+    detail = {}
+    if old['title'] != new['title']:
+        detail['title'] = {'before': old['title'], 'after': new['title']}
+    if old['status_code'] != new['status_code']:
+        detail['status_code'] = {'before': old['status_code'], 'after': new['status_code']}
+    forms = _drop_empty(_keyed_diff(old['forms'], new['forms'], lambda _, a, b: _drop_empty(_set_diff(a, b))))
+    if forms:
+        detail['forms'] = forms
+    if not detail:
+        detail['content_changed'] = True
+    return detail
+
+def diff_snapshots(baseline, current):
+    """Structural diff of two snapshots: only what was added, removed or changed"""
+    pages = _keyed_diff(baseline['pages'], current['pages'], _page_change)
+    changes = {
+        'pages': _drop_empty({
+            'added': sorted(pages['added']),
+            'removed': sorted(pages['removed']),
+            'changed': pages['changed']
+        }),
+        'forms': _drop_empty(_set_diff(
+            {(url, signature) for url, page in baseline['pages'].items() for signature in page['forms']},
+            {(url, signature) for url, page in current['pages'].items() for signature in page['forms']})),
+        'urls': _drop_empty(_set_diff(baseline['urls'], current['urls'])),
+        'files': _drop_empty(_keyed_diff(baseline['files'], current['files'])),
+        'headers': _drop_empty(_keyed_diff(baseline['headers'], current['headers'])),
+        'technologies': _drop_empty(_set_diff(baseline['technologies'], current['technologies']))
+    }
+    if 'forms' in changes:
+        changes['forms'] = {kind: [{'page': url, 'form': signature} for url, signature in items]
+                            for kind, items in changes['forms'].items()}
+    changes = _drop_empty(changes)
+    summary = {section: {kind: len(items) for kind, items in detail.items()}
+               for section, detail in changes.items()}
+    return {'summary': summary, 'changes': changes,
+            'unchanged_pages': len(baseline['pages'].keys() & current['pages'].keys()) - len(pages['changed']),
+            'limits': snapshot_limits(baseline, current)}
+
+def snapshot_limits(baseline, current):
+    """Per-snapshot caps and what each snapshot dropped; near the caps, added/removed may be cut-off artefacts"""
+    none = {'pages': 0, 'urls': 0}
+    return {'max_pages': MAX_PAGES, 'max_urls': MAX_URLS,
+            'baseline_truncated': baseline.get('truncated', none),
+            'current_truncated': current.get('truncated', none)}
+
+class SnapshotStore:
+    """Snapshots by scan id in a cache of their own (not the page/asset cache), kept for `ttl` seconds"""
+
+    def __init__(self, cache, ttl):
+        self.cache = cache
+        self.ttl = ttl
+
+    def put(self, snapshot, scan_id=None):
+        scan_id = scan_id or uuid.uuid4().hex
+        self.cache.set('snapshot', scan_id, value=snapshot, ttl=self.ttl)
+        return scan_id
+
+    def get(self, scan_id):
+        return self.cache.get('snapshot', scan_id)
@@ -0,0 +1,49 @@
+"""Only assets whose URL pins their content are reused by URL"""
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assets import AssetStore, fingerprinted
+from cache import MemoryCache
+
+class Site:
+    """Serves one asset body that a test can redeploy"""
+
+    def __init__(self, body, immutable=False):
+        self.body = body
+        self.immutable = immutable
+        self.fetches = 0
+
+    def fetch(self, url):
+        self.fetches += 1
+        return [self.body], {'bytes': len(self.body), 'immutable': self.immutable}
+
+def analyze(chunks):
+    return ''.join(chunks).upper()
+
+def test_redeployed_first_party_script_is_fetched_again():
+    store, site = AssetStore(MemoryCache()), Site('v1')
+    assert store.analyze('https://example.com/app.js', site.fetch, analyze)[0] == 'V1'
+    site.body = 'v2'
+    analysis, _, result = store.analyze('https://example.com/app.js', site.fetch, analyze)
+    assert (analysis, result, site.fetches) == ('V2', 'miss', 2)
+
+def test_pinned_assets_are_reused_by_url():
+    store, site = AssetStore(MemoryCache()), Site('lib')
+    for url, third_party in (('https://example.com/app.3f9a1c2e.js', False),
+                             ('https://cdn.example.net/lib.js', True)):
+        store.analyze(url, site.fetch, analyze, third_party=third_party)
+        assert store.analyze(url, site.fetch, analyze, third_party=third_party)[2] == 'url_hit'
+    assert site.fetches == 2
+
+def test_immutable_response_is_reused_by_url():
+    store, site = AssetStore(MemoryCache()), Site('v1', immutable=True)
+    store.analyze('https://example.com/app.js', site.fetch, analyze)
+    assert store.analyze('https://example.com/app.js', site.fetch, analyze)[2] == 'url_hit'
+    assert site.fetches == 1
+
+def test_fingerprinted_names():
+    assert fingerprinted('https://example.com/static/main.5d41402a.js')
+    assert fingerprinted('https://example.com/assets/index-BxK3a9Zq.js')
+    assert not fingerprinted('https://example.com/static/app.js')
+    assert not fingerprinted('https://example.com/js/frontend.js')
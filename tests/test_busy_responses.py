@@ -0,0 +1,35 @@
+"""Requests shed by admission control get a 503 with Retry-After"""
+import os, sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('CACHE_BACKEND', 'none')
+os.environ.setdefault('RESULTS_TTL', '0')
+
+import app
+from admission import AdmissionController
+
+@pytest.fixture
+def busy(monkeypatch):
+    # One slot, already taken, and no queue: every scan is rejected
+    controller = AdmissionController('scan', 1, 0, 0)
+    controller.acquire()
+    monkeypatch.setattr(app, 'admission', controller)
+
+def test_shed_profiled_extract_keeps_503_and_retry_after(busy):
+    response = app.app.test_client().post('/extract', json={
+        'website_url': 'http://127.0.0.1:9/', 'mode': 'advanced', 'profile': True})
+    assert response.status_code == 503
+    body = response.get_json()
+    assert body['message'] == 'Server busy'
+    assert response.headers['Retry-After'] == str(body['retry_after'])
+    assert 'profile' in body
+
+def test_shed_llm_stream_is_503_not_an_event(busy):
+    response = app.app.test_client().post('/llm/stream', json={
+        'website_url': 'http://127.0.0.1:9/', 'mode': 'advanced'})
+    assert response.status_code == 503
+    assert response.mimetype == 'application/json'
+    assert response.headers['Retry-After'] == str(response.get_json()['retry_after'])
@@ -0,0 +1,35 @@
+"""Two scans of an unchanged site must share one LLM cache entry"""
+import json, os, sys, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
+os.environ.setdefault('CACHE_BACKEND', 'none')
+os.environ.setdefault('RESULTS_TTL', '0')
+
+import app
+from records import json_default
+from synthetic_site import start_site
+
+def scan_payload(url):
+    result, status, _ = app.scan_target(url, 'advanced', (30, False, 20, 5), time.time())
+    assert status == 200
+    # What /llm receives: the JSON /extract would have sent
+    return json.loads(json.dumps(result, default=json_default))
+
+def test_repeat_scans_share_llm_cache_key():
+    server, url = start_site(pages=4, sitemap_size=4)
+    try:
+        first = scan_payload(url)
+        time.sleep(1.1)   # a different Date header
+        second = scan_payload(url)
+    finally:
+        server.shutdown()
+    assert first['scan_id'] != second['scan_id']
+    assert app.make_key('llm', *app.llm_cache_key(first, 'auto')) == \
+        app.make_key('llm', *app.llm_cache_key(second, 'auto'))
+
+def test_llm_cache_key_sees_site_changes():
+    data = {'technical_data': {'headers': {'Date': 'a', 'Content-Security-Policy': "default-src 'self'"}}}
+    changed = {'technical_data': {'headers': {'Date': 'b'}}}
+    assert app.llm_cache_key(data, 'auto') != app.llm_cache_key(changed, 'auto')
@@ -0,0 +1,95 @@
+"""LLMClient retries, circuit breaker and concurrency limit against mock_llm"""
+import os, sys, time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_client import CircuitOpenError, LLMBusyError, LLMClient, LLMUpstreamError
+from mock_llm import start_mock_llm
+
+RESET = 0.2   # breaker cooldown, seconds
+
+@pytest.fixture
+def mock_llm():
+    servers = []
+
+    def start(**options):
+        server, url = start_mock_llm(**options)
+        servers.append(server)
+        return url, server.RequestHandlerClass.counters
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+def client(url, **options):
+    options = dict(dict(max_retries=2, backoff_base=0, failure_threshold=2, reset_timeout=RESET), **options)
+    return LLMClient(url, None, timeout=5, **options)
+
+def test_retries_until_the_upstream_recovers(mock_llm):
+    url, counters = mock_llm(fail_first=2, lines=3)
+    llm = client(url)
+    assert len(llm.complete('prompt').splitlines()) == 3
+    assert counters['requests'] == 3
+    assert llm.stats()['retries'] == 2
+    assert llm.breaker.state == 'closed'
+
+def test_gives_up_after_max_retries(mock_llm):
+    url, counters = mock_llm(status=503)
+    llm = client(url, failure_threshold=5)
+    with pytest.raises(LLMUpstreamError):
+        llm.complete('prompt')
+    assert counters['requests'] == 3
+    assert llm.stats()['failures'] == 1
+
+def test_client_errors_are_not_retried(mock_llm):
+    url, counters = mock_llm(status=400)
+    with pytest.raises(LLMUpstreamError):
+        client(url).complete('prompt')
+    assert counters['requests'] == 1
+
+def test_breaker_opens_then_recovers_half_open(mock_llm):
+    url, counters = mock_llm(fail_first=2)
+    llm = client(url, max_retries=0)
+    for _ in range(2):
+        with pytest.raises(LLMUpstreamError):
+            llm.complete('prompt')
+    assert llm.breaker.state == 'open'
+
+    with pytest.raises(CircuitOpenError):
+        llm.complete('prompt')
+    assert counters['requests'] == 2   # failed fast, upstream not called
+    assert llm.stats()['short_circuited'] == 1
+
+    time.sleep(RESET)
+    assert llm.breaker.state == 'half_open'
+    llm.complete('prompt')   # the trial call succeeds
+    assert llm.breaker.state == 'closed'
+
+def test_failed_half_open_trial_reopens(mock_llm):
+    url, counters = mock_llm(status=503)
+    llm = client(url, max_retries=0)
+    for _ in range(2):
+        with pytest.raises(LLMUpstreamError):
+            llm.complete('prompt')
+    time.sleep(RESET)
+    with pytest.raises(LLMUpstreamError):
+        llm.complete('prompt')
+    assert llm.breaker.state == 'open'
+    assert counters['requests'] == 3
+
+def test_concurrency_slots_reject_when_full(mock_llm):
+    url, _ = mock_llm(delay=0.01)
+    llm = client(url, max_concurrency=1, queue_timeout=0.1)
+    stream = llm.stream('prompt')
+    next(stream)   # holds the only slot
+    assert llm.stats()['in_flight'] == 1
+    with pytest.raises(LLMBusyError):
+        llm.complete('prompt')
+    assert llm.stats()['busy_rejected'] == 1
+
+    stream.close()   # consumer went away: slot back, breaker untouched
+    assert llm.stats()['in_flight'] == 0
+    assert llm.breaker.state == 'closed'
+    assert llm.complete('prompt')
@@ -0,0 +1,65 @@
+"""Map-reduce analyses the whole stored crawl, with bounded fan-out"""
+import json, os, sys, threading, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
+os.environ.setdefault('CACHE_BACKEND', 'none')
+
+import app
+from llm_mapreduce import map_reduce_llm, sample_chunks, split_extract_data
+from mock_llm import TEST_CASES
+from pools import SharedPool
+from records import json_default
+from results import ResultStore
+from synthetic_site import start_site
+
+class CountingClient:
+    """Stand-in LLM client that records its peak concurrency"""
+    max_concurrency = 8
+
+    def __init__(self):
+        self.active = self.peak = self.calls = 0
+        self.lock = threading.Lock()
+
+    def complete(self, prompt):
+        with self.lock:
+            self.active += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self.lock:
+            self.active -= 1
+        return '\n'.join(TEST_CASES)
+
+def chunked_pages(data):
+    _, chunks = split_extract_data(data, app.LLM_MAX_PROMPT_CHARS)
+    return sum(1 for chunk in chunks for unit in chunk if 'page' in unit)
+
+def test_map_phase_reads_every_stored_page(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, 'results', ResultStore(str(tmp_path / 'results'), 3600))
+    server, url = start_site(pages=40, sitemap_size=4)
+    try:
+        result, status, _ = app.scan_target(url, 'advanced', (40, False, 20, 0), time.time())
+    finally:
+        server.shutdown()
+    assert status == 200
+    data = json.loads(json.dumps(result, default=json_default))
+    assert len(data['website_structure']['pages']) < data['extraction_summary']['total_pages_extracted']
+    assert app.truncated_crawl(data)
+    assert chunked_pages(app.stored_crawl(data)) == data['extraction_summary']['total_pages_extracted']
+
+def test_fan_out_is_bounded_by_the_request_quota():
+    data = {'website_structure': {'all_urls': [f'https://example.com/s{i}/page' for i in range(200)]}}
+    client = CountingClient()
+    pool = SharedPool('test-llm', 8)
+    _, info = map_reduce_llm(client, data, 300, pool=pool.quota(2), max_chunks=12)
+    assert info['chunks'] == client.calls == 12
+    assert info['skipped_chunks'] > 0
+    assert client.peak <= 2
+
+def test_sample_chunks_spans_the_whole_list():
+    chunks = list(range(100))
+    sampled = sample_chunks(chunks, 10)
+    assert len(sampled) == 10 and sampled[0] == 0 and sampled[-1] >= 90
+    assert sample_chunks(chunks, 0) == chunks
@@ -0,0 +1,56 @@
+"""/llm/stream sends extraction, one test_case per line, then done"""
+import json, os, sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
+os.environ.setdefault('CACHE_BACKEND', 'none')
+os.environ.setdefault('RESULTS_TTL', '0')
+
+import app
+from llm_client import LLMClient
+from mock_llm import TEST_CASES, start_mock_llm
+from synthetic_site import start_site
+
+def parse_sse(body):
+    events = []
+    for block in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines())
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+@pytest.fixture
+def site():
+    server, url = start_site(pages=4, sitemap_size=4)
+    yield url
+    server.shutdown()
+
+def stream(monkeypatch, site, **mock_options):
+    server, llm_url = start_mock_llm(**mock_options)
+    monkeypatch.setattr(app, 'llm_client', LLMClient(llm_url, None, timeout=5, max_retries=0))
+    try:
+        response = app.app.test_client().post('/llm/stream', json={'website_url': site, 'mode': 'basic'})
+        return response, parse_sse(response.get_data(as_text=True))
+    finally:
+        server.shutdown()
+
+def test_stream_event_sequence(monkeypatch, site):
+    response, events = stream(monkeypatch, site, lines=5)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    names = [name for name, _ in events]
+    assert names == ['extraction'] + ['test_case'] * 5 + ['done']
+
+    assert events[0][1]['website_url'] == site
+    assert [data for _, data in events[1:-1]] == [{'index': i + 1, 'line': TEST_CASES[i]} for i in range(5)]
+    done = events[-1][1]
+    assert done['test_cases'] == 5
+    assert done['llm_first_line_time'] is not None
+
+def test_upstream_failure_ends_with_an_error_event(monkeypatch, site):
+    response, events = stream(monkeypatch, site, status=500)
+    assert response.status_code == 200   # the extraction already went out
+    assert [name for name, _ in events] == ['extraction', 'error']
+    assert events[-1][1]['message'] == 'LLM analysis failed'
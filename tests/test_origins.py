@@ -0,0 +1,27 @@
+"""OriginMap learns site moves, not single assets moved to another host"""
+import os, sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from origins import OriginMap
+
+def redirect(url, location, status=301):
+    hop = SimpleNamespace(url=url, status_code=status, headers={'location': location})
+    return SimpleNamespace(url=url, status_code=status, headers=hop.headers, history=[])
+
+def test_cross_host_asset_redirect_is_not_learned():
+    origins = OriginMap('https://example.com/')
+    assert not origins.learn(redirect('https://example.com/static/app.js', 'https://cdn.other.net/static/app.js'))
+    assert origins.rewrite('https://example.com/admin/login') == 'https://example.com/admin/login'
+    assert origins.report()['learned'] == {}
+
+def test_same_site_redirect_is_learned():
+    origins = OriginMap('http://example.com/')
+    assert origins.learn(redirect('http://example.com/about', 'https://www.example.com/about'))
+    assert origins.rewrite('http://example.com/admin/login') == 'https://www.example.com/admin/login'
+
+def test_start_url_redirect_to_another_host_is_learned():
+    origins = OriginMap('https://old.example/app')
+    assert origins.learn(redirect('https://old.example/app', 'https://new.example/app'))
+    assert origins.rewrite('https://old.example/admin/login') == 'https://new.example/admin/login'
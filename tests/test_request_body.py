@@ -0,0 +1,17 @@
+"""JSON bodies that are not objects get a JSON 400, not an HTML 500"""
+import os, sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('CACHE_BACKEND', 'none')
+os.environ.setdefault('RESULTS_TTL', '0')
+
+import app
+
+@pytest.mark.parametrize('path', ['/extract', '/llm', '/llm/stream'])
+@pytest.mark.parametrize('body', [[], 'x', 3])
+def test_non_object_json_body_is_400(path, body):
+    response = app.app.test_client().post(path, json=body)
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'request body must be a JSON object'}
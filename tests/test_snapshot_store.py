@@ -0,0 +1,19 @@
+"""Crawl traffic in the shared cache cannot evict diff baselines"""
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('CACHE_BACKEND', 'none')
+os.environ.setdefault('RESULTS_TTL', '0')
+
+import app
+
+def test_baselines_have_their_own_store():
+    assert app.snapshots.cache is not app.cache
+    scan_id = app.snapshots.put({'target_url': 'https://example.com/', 'pages': {}, 'urls': []})
+    assert app.snapshots.get(scan_id)['target_url'] == 'https://example.com/'
+
+def test_missing_baseline_is_an_explicit_404():
+    response = app.app.test_client().post('/extract', json={
+        'website_url': 'https://example.com/', 'mode': 'advanced', 'baseline': 'gone'})
+    assert response.status_code == 404
+    assert 'evicted' in response.get_json()['error']
@@ -0,0 +1,94 @@
+"""
+Route templates for crawled URLs.
+
+url_template() collapses the variable parts of a URL into placeholders:
+numeric, UUID and long hex path segments, slug-like segments, and query
+values (only the sorted parameter names are kept). So /product?id=7 and
+/product?id=9 share the template /product?id, and /user/123/profile and
+/user/456/profile share /user/{id}/profile.
+
+TemplateInventory counts URLs per template as the crawl discovers them and
+admits the first `samples` of each into the frontier. deep_crawl defers the
+rest to a queue that is drained only once the frontier is empty, so
+structurally identical pages are fetched after everything else instead of
+using up the page budget first.
+"""
+import re
+from urllib.parse import urlsplit, parse_qsl
+
+TEMPLATE_SAMPLES = 5             # URLs fetched per template
+TEMPLATE_INVENTORY_LIMIT = 5000  # templates tracked per crawl; later ones are not capped
+
+_NUMERIC = re.compile(r'^\d+$')
+_UUID = re.compile(r'^[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}$', re.IGNORECASE)
+_HEX = re.compile(r'^[0-9a-f]{16,}$', re.IGNORECASE)
+_SLUG = re.compile(r'^[a-z0-9]+(?:[-_][a-z0-9]+)+$', re.IGNORECASE)
+
+def segment_template(segment):
+    if not segment:
+        return segment
+    if _NUMERIC.match(segment):
+        return '{id}'
+    if _UUID.match(segment):
+        return '{uuid}'
+    if _HEX.match(segment):
+        return '{hash}'
+    # Slugs: three or more words, or words mixed with digits (post-2024-06-01,
+    # item-42). Short hyphenated names (about-us, sign-in) stay literal.
+    if _SLUG.match(segment) and '.' not in segment:
+        words = re.split(r'[-_]', segment)
+        if len(words) >= 3 or any(w.isdigit() for w in words):
+            return '{slug}'
+    return segment
+
+def url_template(url):
+    """Route template for a URL: host + templated path + sorted parameter names"""
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    path = '/'.join(segment_template(segment) for segment in parts.path.split('/'))
+    template = f'{parts.netloc}{path or "/"}'
+    if parts.query:
+        names = sorted({name for name, _ in parse_qsl(parts.query, keep_blank_values=True)})
+        if names:
+            template += '?' + '&'.join(names)
+    return template
+
+class TemplateInventory:
+    """Per-template discovery counts and the sample URLs admitted for fetching"""
+
+    def __init__(self, samples=TEMPLATE_SAMPLES, limit=TEMPLATE_INVENTORY_LIMIT):
+        self.samples = samples
+        self.limit = limit
+        self.templates = {}
+        self.capped = 0
+
+    def admit(self, url):
+        """Record a newly discovered URL; False (defer it) when its template is already sampled"""
+        template = url_template(url)
+        entry = self.templates.get(template)
+        if entry is None:
+            if len(self.templates) >= self.limit:
+                return True
+            entry = self.templates[template] = {'discovered': 0, 'sampled': 0, 'samples': []}
+        entry['discovered'] += 1
+        if self.samples and entry['sampled'] >= self.samples:
+            self.capped += 1
+            return False
+        entry['sampled'] += 1
+        # Uncapped crawls still list only the first few URLs per template
+        if len(entry['samples']) < (self.samples or TEMPLATE_SAMPLES):
+            entry['samples'].append(url)
+        return True
+
+    def inventory(self):
+        """Templates ordered by how many URLs matched them"""
+        return [
+            {'template': template, 'discovered': entry['discovered'],
+             'sampled': entry['sampled'], 'samples': entry['samples']}
+            for template, entry in sorted(self.templates.items(), key=lambda item: -item[1]['discovered'])
+        ]
+
+    def __len__(self):
+        return len(self.templates)
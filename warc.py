@@ -0,0 +1,245 @@
+"""
+WARC record and replay for the fetch layer.
+
+WarcRecorder appends every fetch (each redirect hop included) to gzipped
+WARC/1.1 files as a request + response record pair, rotating files at
+max_bytes. Each file also gets a .cdxj sidecar with one line per response
+record:
+
+    <method> <url> <offset> <length>
+
+WarcArchive loads those sidecars (or indexes a .warc.gz without one by
+reading it once) and answers fetches from the archive: the same
+requests.Response objects the network would have produced, with redirects
+followed inside the archive. A URL that was never recorded raises
+ConnectionError, like an unreachable host.
+
+Bodies are stored as requests delivered them, after Content-Encoding was
+removed, so Content-Encoding and Transfer-Encoding are dropped from recorded
+headers. Streamed fetches stopped at a byte cap are stored with a
+WARC-Truncated header.
+"""
+import gzip, os, threading, time, uuid, zlib
+from datetime import datetime, timezone
+
+import requests
+from requests.models import PreparedRequest
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+import metrics
+
+WARC_RECORDS = metrics.Counter('extractor_warc_records_total', 'Response records written to WARC files')
+WARC_REPLAYS = metrics.Counter('extractor_warc_replays_total', 'Fetches answered from a WARC archive, by result',
+                               ['result'])
+
+DROPPED_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length')
+MAX_REDIRECTS = 30
+
+class NotInArchive(requests.exceptions.ConnectionError):
+    """The URL was not recorded in any replayed WARC file"""
+
+def normalize_url(url):
+    """The URL as requests sends it, so recorded and replayed keys agree"""
+    prepared = PreparedRequest()
+    prepared.prepare_url(url, None)
+    return prepared.url
+
+def _warc_date():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def _record(warc_type, url, block, extra=()):
+    headers = [
+        ('WARC-Type', warc_type),
+        ('WARC-Record-ID', f'<urn:uuid:{uuid.uuid4()}>'),
+        ('WARC-Date', _warc_date()),
+        ('WARC-Target-URI', url),
+        ('Content-Type', f'application/http; msgtype={warc_type}'),
+        ('Content-Length', str(len(block))),
+    ] + list(extra)
+    head = 'WARC/1.1\r\n' + ''.join(f'{k}: {v}\r\n' for k, v in headers) + '\r\n'
+    return head.encode('utf-8') + block + b'\r\n\r\n', headers[1][1]
+
+class WarcRecorder:
+    def __init__(self, directory, prefix='extractor', max_bytes=1024 * 1024 * 1024):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.file = None
+        self.index = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _rotate(self):
+        if self.file:
+            self.file.close()
+            self.index.close()
+        stamp = time.strftime('%Y%m%d%H%M%S')
+        path = os.path.join(self.directory, f'{self.prefix}-{stamp}-{os.getpid()}-{uuid.uuid4().hex[:8]}.warc.gz')
+        self.file = open(path, 'ab')
+        self.index = open(path + '.cdxj', 'a', encoding='utf-8')
+
+    def record(self, resp, body=None, truncated=False):
+        """Write every hop of resp (history first); body overrides the final hop's content"""
+        hops = list(resp.history) + [resp]
+        for i, hop in enumerate(hops):
+            last = i == len(hops) - 1
+            content = body if last and body is not None else (hop.content if hop.content is not None else b'')
+            self._write(hop, content, truncated and last)
+
+    def _write(self, resp, content, truncated):
+        request = resp.request
+        url = normalize_url(resp.url)
+        method = request.method if request is not None else 'GET'
+
+        target = request.path_url if request is not None else '/'
+        request_head = f'{method} {target} HTTP/1.1\r\n'
+        for name, value in (request.headers.items() if request is not None else []):
+            request_head += f'{name}: {value}\r\n'
+        request_block = (request_head + '\r\n').encode('utf-8')
+
+        status_line = f'HTTP/1.1 {resp.status_code} {resp.reason or ""}\r\n'
+        header_lines = ''.join(f'{name}: {value}\r\n' for name, value in resp.headers.items()
+                               if name.lower() not in DROPPED_HEADERS)
+        header_lines += f'Content-Length: {len(content)}\r\n'
+        response_block = (status_line + header_lines + '\r\n').encode('latin-1', 'replace') + content
+
+        extra = [('WARC-Truncated', 'length')] if truncated else []
+        response, response_id = _record('response', url, response_block, extra)
+        request_record, _ = _record('request', url, request_block, [('WARC-Concurrent-To', response_id)])
+
+        with self.lock:
+            if self.file is None or self.file.tell() >= self.max_bytes:
+                self._rotate()
+            offset = self.file.tell()
+            self.file.write(gzip.compress(response))
+            length = self.file.tell() - offset
+            self.file.write(gzip.compress(request_record))
+            self.file.flush()
+            self.index.write(f'{method} {url} {offset} {length}\n')
+            self.index.flush()
+        WARC_RECORDS.inc()
+
+    def close(self):
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.index.close()
+                self.file = None
+
+def _read_member(f, offset, length=None):
+    """Decompress the single gzip member at offset; returns (data, compressed_length)"""
+    f.seek(offset)
+    decompressor = zlib.decompressobj(wbits=31)
+    out = []
+    consumed = 0
+    while not decompressor.eof:
+        chunk = f.read(length or 64 * 1024)
+        if not chunk:
+            break
+        out.append(decompressor.decompress(chunk))
+        consumed += len(chunk) - len(decompressor.unused_data)
+    return b''.join(out), consumed
+
+def _parse_record(data):
+    """(warc headers, block) of one WARC record"""
+    head, _, rest = data.partition(b'\r\n\r\n')
+    headers = {}
+    for line in head.decode('utf-8', 'replace').split('\r\n')[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', len(rest)))
+    return headers, rest[:length]
+
+def _parse_response(block):
+    head, _, body = block.partition(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    _, status, *reason = lines[0].split(' ', 2)
+    headers = CaseInsensitiveDict()
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip()] = value.strip()
+    return int(status), (reason[0] if reason else ''), headers, body
+
+class WarcArchive:
+    """Replays recorded fetches from WARC files (paths may be files or directories)"""
+
+    def __init__(self, paths):
+        self.index = {}   # (method, url) -> (path, offset, length)
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                files += sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.warc.gz'))
+            else:
+                files.append(path)
+        for path in files:
+            self._load(path)
+
+    def _load(self, path):
+        sidecar = path + '.cdxj'
+        if os.path.exists(sidecar):
+            with open(sidecar, encoding='utf-8') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 4:
+                        method, url, offset, length = parts
+                        self.index[(method, url)] = (path, int(offset), int(length))
+            return
+        # No sidecar: index by reading the file once
+        with open(path, 'rb') as f:
+            offset = 0
+            size = os.path.getsize(path)
+            while offset < size:
+                data, length = _read_member(f, offset)
+                if not length:
+                    break
+                headers, block = _parse_record(data)
+                if headers.get('warc-type') == 'response':
+                    self.index[('GET', headers.get('warc-target-uri'))] = (path, offset, length)
+                elif headers.get('warc-type') == 'request':
+                    method = block.split(b' ', 1)[0].decode('ascii', 'replace')
+                    key = ('GET', headers.get('warc-target-uri'))
+                    if method != 'GET' and key in self.index:
+                        self.index[(method, key[1])] = self.index.pop(key)
+                offset += length
+
+    def __len__(self):
+        return len(self.index)
+
+    def _response(self, method, url):
+        entry = self.index.get((method, url))
+        if entry is None:
+            WARC_REPLAYS.inc(result='miss')
+            raise NotInArchive(f"{method} {url} is not in the replayed WARC archive")
+        path, offset, length = entry
+        with open(path, 'rb') as f:
+            data, _ = _read_member(f, offset, length)
+        _, block = _parse_record(data)
+        status, reason, headers, body = _parse_response(block)
+        WARC_REPLAYS.inc(result='hit')
+
+        resp = requests.Response()
+        resp.status_code = status
+        resp.reason = reason
+        resp.headers = headers
+        resp.url = url
+        resp.encoding = get_encoding_from_headers(headers)
+        resp._content = body
+        resp._content_consumed = True
+        request = requests.Request(method, url).prepare()
+        resp.request = request
+        return resp
+
+    def fetch(self, method, url, allow_redirects=None, **kwargs):
+        """Recorded response for method + url, following redirects like requests.request"""
+        if allow_redirects is None:
+            allow_redirects = method != 'HEAD'
+        resp = self._response(method, normalize_url(url))
+        history = []
+        while allow_redirects and resp.is_redirect and len(history) < MAX_REDIRECTS:
+            history.append(resp)
+            location = requests.compat.urljoin(resp.url, resp.headers['location'])
+            next_method = 'GET' if resp.status_code == 303 and method != 'HEAD' else method
+            resp = self._response(next_method, normalize_url(location))
+        resp.history = history
+        return resp